@@ -1,8 +1,13 @@
 import streamlit as st
-import pandas as pd
+from analise.aquecimento import aquecer
+from analise.dados import carregar_dataset
+from analise.instrumentacao import iniciar, painel
 
 # Configuração da Página
 st.set_page_config(page_title="Checkpoint 6 - 2ESPR", layout="wide")
+iniciar("Introdução")
+# Carrega dados e bibliotecas em segundo plano, uma vez por processo do servidor
+aquecer()
 
 # Barra lateral com informações
 st.sidebar.markdown("""🧑‍💻 Desenvolvido por:
@@ -53,8 +58,7 @@ st.write(
 
 st.markdown("#### Exemplo de Dados")
 try:
-    df = pd.read_csv("src/dataset.csv")
-    st.dataframe(df.head())
+    st.dataframe(carregar_dataset().head())
 except:
     st.warning("⚠️ Dataset não encontrado. Certifique-se de fazer o upload do arquivo.")
 
@@ -91,3 +95,4 @@ st.write(
 # Finalização
 st.markdown("🚀 Vamos explorar os dados e gerar insights valiosos!")
 
+painel()
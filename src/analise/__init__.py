@@ -0,0 +1 @@
+"""Rotinas de dados e estatística compartilhadas pelas páginas do dashboard."""
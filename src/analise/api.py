@@ -0,0 +1,183 @@
+"""Consultas de intervalos, testes e regressões sem depender do Streamlit.
+
+Cada função devolve um dicionário serializável em JSON, montado sobre os
+mesmos resultados em cache usados pelas páginas. É a camada usada pelo
+servidor HTTP (``analise.servidor``) e pode ser importada por scripts e jobs.
+"""
+
+import json
+
+from analise.cubo import DIMENSOES, agregar, cubo, dimensoes_consulta
+from analise.dados import CAMINHO_DATASET
+from analise.esbocos import quantis_grupo
+from analise.moedas import conversoes_discrepantes, regressoes_por_moeda, taxas_implicitas
+from analise.intervalos import colunas_grupo, estatisticas_grupo, intervalos_t, momentos
+from analise.regressao import ALVO, PREDITORES, ajustar, regressao_simples as _regressao_simples
+from analise.tendencias import ANO, medianas_anuais, medias_anuais, variacoes_anuais
+from analise.testes import (
+    comparacoes_dimensao,
+    corrigir_pvalores,
+    teste_binomial_exato,
+    teste_proporcao_z,
+    teste_t_welch,
+)
+
+
+def _registros(df, indice=True):
+    """Linhas de um DataFrame como dicionários de tipos nativos (com o índice, por padrão)."""
+    if indice:
+        df = df.reset_index()
+    return json.loads(df.to_json(orient="records", double_precision=15))
+
+
+def _dimensoes(coluna):
+    colunas = colunas_grupo(coluna)
+    invalidas = [c for c in colunas if c not in DIMENSOES]
+    if invalidas:
+        raise ValueError(f"Dimensões desconhecidas: {', '.join(invalidas)}")
+    return colunas
+
+
+def _preditores(preditores):
+    if not isinstance(preditores, list) or not preditores:
+        raise ValueError("preditores deve ser uma lista não vazia de colunas")
+    invalidos = [p for p in preditores if p not in PREDITORES]
+    if invalidos:
+        raise ValueError(f"Preditores desconhecidos: {', '.join(map(str, invalidos))}")
+    if len(set(preditores)) < len(preditores):
+        raise ValueError("preditores não deve repetir colunas")
+    return preditores
+
+
+def _grupos(estatisticas, *grupos):
+    for grupo in grupos:
+        if grupo not in estatisticas.index:
+            raise KeyError(f"Grupo não encontrado: {grupo!r}")
+    return estatisticas.loc[list(grupos)]
+
+
+def intervalos(coluna=None, confianca=95, n_minimo=2, filtros=None, escala=1, caminho=CAMINHO_DATASET):
+    """Intervalos t da média de ``salary_in_usd`` por grupo, com filtros opcionais por dimensão."""
+    colunas = _dimensoes(coluna)
+    estatisticas = agregar(cubo(caminho=caminho, dimensoes=dimensoes_consulta(colunas, filtros)), colunas, filtros)
+    estatisticas = estatisticas[estatisticas["n"] >= max(n_minimo, 2)]
+    tabela = intervalos_t(estatisticas, confianca, escala)
+    tabela.index = estatisticas.index
+    if not colunas:
+        tabela.index.name = "grupo"
+    return {"confianca": confianca, "grupos": _registros(tabela)}
+
+
+def quantis(coluna=None, quantil=0.5, confianca=95, n_minimo=1, filtros=None, escala=1, caminho=CAMINHO_DATASET):
+    """Quantil de ``salary_in_usd`` (mediana por padrão) com intervalo livre de distribuição por grupo."""
+    if not 0 < quantil < 1:
+        raise ValueError("quantil deve estar entre 0 e 1")
+    colunas = _dimensoes(coluna)
+    tabela = quantis_grupo(colunas, quantil, confianca, filtros, escala, caminho)
+    tabela = tabela[tabela["n"] >= n_minimo]
+    if not colunas:
+        tabela.index.name = "grupo"
+    return {"quantil": quantil, "confianca": confianca, "grupos": _registros(tabela)}
+
+
+def teste_t(coluna, grupo_a, grupo_b, caminho=CAMINHO_DATASET):
+    """Teste t de Welch entre dois grupos de uma dimensão."""
+    pares = _grupos(estatisticas_grupo(_dimensoes(coluna)[0], caminho=caminho), grupo_a, grupo_b)
+    (media_a, media_b), (desvio_a, desvio_b) = momentos(pares)
+    n_a, n_b = (int(n) for n in pares["n"])
+    t, p, gl = teste_t_welch(n_a, media_a, desvio_a**2, n_b, media_b, desvio_b**2)
+    return {
+        "grupo_a": grupo_a,
+        "grupo_b": grupo_b,
+        "n_a": n_a,
+        "n_b": n_b,
+        "media_a": float(media_a),
+        "media_b": float(media_b),
+        "t": float(t),
+        "gl": float(gl),
+        "p": float(p),
+    }
+
+
+def teste_proporcao(coluna, grupo, coluna_evento, valor_evento, p0=0.5, caminho=CAMINHO_DATASET):
+    """Proporção de linhas de ``grupo`` com ``coluna_evento == valor_evento`` (H₁: p > p0).
+
+    Retorna o teste z e o teste binomial exato.
+    """
+    estatisticas = estatisticas_grupo(_dimensoes([coluna, coluna_evento]), caminho=caminho)
+    if grupo not in estatisticas.index.get_level_values(0):
+        raise KeyError(f"Grupo não encontrado: {grupo!r}")
+    linhas = estatisticas.xs(grupo, level=coluna)["linhas"]
+    sucessos = int(linhas.get(valor_evento, 0))
+    total = int(linhas.sum())
+    z, p_z = teste_proporcao_z(sucessos, total, p0)
+    _, p_exato = teste_binomial_exato(sucessos, total, p0, "greater")
+    return {
+        "sucessos": sucessos,
+        "total": total,
+        "proporcao": sucessos / total,
+        "z": float(z),
+        "p": float(p_z),
+        "p_exato": float(p_exato),
+    }
+
+
+def comparacoes(coluna, n_minimo=2, correcao="holm", caminho=CAMINHO_DATASET):
+    """Teste de Welch para todos os pares de grupos de uma dimensão, com p-valores ajustados."""
+    pares = comparacoes_dimensao(_dimensoes(coluna)[0], n_minimo, caminho)
+    pares = pares.assign(p_ajustado=corrigir_pvalores(pares["p"], correcao))
+    return {"correcao": correcao, "pares": _registros(pares, indice=False)}
+
+
+def regressao(preditores, confianca=95, caminho=CAMINHO_DATASET):
+    """Regressão múltipla de ``salary_in_usd`` sobre preditores categóricos (subconjunto de ``PREDITORES``)."""
+    ajuste = ajustar(_preditores(preditores), ALVO, confianca, caminho)
+    return {
+        "r2": float(ajuste.r2),
+        "r2_ajustado": float(ajuste.r2_ajustado),
+        "n": int(ajuste.n),
+        "graus_liberdade": int(ajuste.graus_liberdade),
+        "linhas_excluidas": int(ajuste.linhas_excluidas),
+        "erro_padrao_residual": float(ajuste.erro_padrao_residual),
+        "coeficientes": _registros(ajuste.coeficientes),
+    }
+
+
+def regressao_simples(x="salary", y=ALVO, caminho=CAMINHO_DATASET):
+    """Correlação e reta de mínimos quadrados entre duas colunas numéricas."""
+    acumulado = _regressao_simples(x, y, caminho)
+    return {
+        "n": int(acumulado.n),
+        "correlacao": float(acumulado.correlacao),
+        "intercepto": float(acumulado.intercepto),
+        "inclinacao": float(acumulado.inclinacao),
+        "r2": float(acumulado.r2),
+    }
+
+
+def moedas(por_ano=False, confianca=95, caminho=CAMINHO_DATASET):
+    """Taxas implícitas por moeda e ano, conversões discrepantes e retas de MQO por moeda."""
+    return {
+        "taxas": _registros(taxas_implicitas(caminho)),
+        "discrepantes": _registros(conversoes_discrepantes(caminho), indice=False),
+        "regressoes": _registros(regressoes_por_moeda(por_ano, confianca, caminho)),
+    }
+
+
+def tendencias(dimensao=None, estatistica="media", confianca=95, correcao="holm", n_minimo=2, caminho=CAMINHO_DATASET):
+    """Média ou mediana por ano (e grupo de ``dimensao``) e a variação entre anos consecutivos."""
+    if dimensao is not None and dimensao not in set(DIMENSOES) - {ANO}:
+        raise ValueError(f"Dimensão desconhecida: {dimensao}")
+    if estatistica == "media":
+        tabela = medias_anuais(dimensao, confianca, caminho=caminho).rename(columns={"media": "estimativa"})
+    elif estatistica == "mediana":
+        tabela = medianas_anuais(dimensao, confianca, caminho=caminho)
+    else:
+        raise ValueError("estatistica deve ser 'media' ou 'mediana'")
+    tabela = tabela[tabela["n"] >= n_minimo]
+    return {
+        "estatistica": estatistica,
+        "confianca": confianca,
+        "anos": _registros(tabela),
+        "variacoes": _registros(variacoes_anuais(dimensao, correcao, n_minimo, estatistica, caminho), indice=False),
+    }
@@ -0,0 +1,57 @@
+"""Pré-carregamento dos dados e resultados compartilhados, uma vez por processo.
+
+O servidor do Streamlit executa todas as sessões no mesmo processo: a
+primeira página aberta dispara ``aquecer``, que em uma thread de fundo
+importa as bibliotecas pesadas e preenche os caches usados pelas páginas
+(dataset, cubo, esboços de quantis, estatísticas por grupo e regressão). As sessões seguintes
+encontram tudo pronto. Desativado com ``DSSC_AQUECIMENTO=0``.
+"""
+
+import os
+import threading
+
+_TRAVA = threading.Lock()
+_iniciado = False
+
+
+def _preencher_caches():
+    from analise.cubo import cubo
+    from analise.dados import carregar_dataset, modo_streaming
+    from analise.esbocos import esbocos
+    from analise.intervalos import estatisticas_grupo
+    from analise.regressao import regressao_simples
+
+    if not modo_streaming():
+        carregar_dataset()
+    cubo()
+    esbocos()
+    for coluna in ["experience_level", "remote_ratio", ["experience_level", "remote_ratio"]]:
+        estatisticas_grupo(coluna)
+    regressao_simples("salary", "salary_in_usd")
+
+    # Importadas aqui para que a primeira renderização de gráfico não pague por elas
+    import matplotlib.figure  # noqa: F401
+    from matplotlib.backends import backend_agg  # noqa: F401
+
+
+def _executar():
+    try:
+        _preencher_caches()
+    except (OSError, ValueError, KeyError):
+        # Sem dataset válido as páginas mostram o erro na própria execução
+        pass
+
+
+def aquecer(em_segundo_plano=True):
+    """Preenche os caches do processo na primeira chamada; as demais não fazem nada."""
+    global _iniciado
+    if os.environ.get("DSSC_AQUECIMENTO", "") == "0":
+        return
+    with _TRAVA:
+        if _iniciado:
+            return
+        _iniciado = True
+    if em_segundo_plano:
+        threading.Thread(target=_executar, name="aquecimento", daemon=True).start()
+    else:
+        _executar()
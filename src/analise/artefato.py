@@ -0,0 +1,270 @@
+"""Artefato com as estatísticas pré-calculadas do dataset.
+
+Gerado offline por ``python -m analise.build_stats`` e lido pelas páginas na
+inicialização: tabelas de estatísticas suficientes (o cubo), histogramas dos
+gráficos de intervalo, esboços de quantis por célula do cubo base, co-momentos da
+regressão e um resumo com os números exibidos nas páginas. O artefato é ignorado se tiver outro formato ou se o
+CSV tiver mudado desde que foi gerado; se o CSV só recebeu linhas novas, ele
+é atualizado com o trecho anexado (``anexar``).
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analise.cubo import DIMENSOES_BASE, METRICAS, agregar
+from analise.dados import (
+    CAMINHO_DATASET,
+    TIPOS_COLUNAS,
+    assinatura,
+    carregar_dataset,
+    hash_dataset,
+    impressao,
+)
+from analise.esbocos import combinar, construir_esbocos
+from analise.graficos import Distribuicao, calcular_distribuicao
+from analise.ingestao import ler_anexadas
+from analise.intervalos import VALOR, colunas_grupo, estatisticas_suficientes, momentos
+from analise.streaming import CoMomentos
+
+VERSAO_FORMATO = 2
+
+CAMINHO_ARTEFATO = CAMINHO_DATASET.with_name("estatisticas.json.gz")
+
+# Grupos exibidos nos histogramas da página de intervalos: (coluna, grupos, bins)
+HISTOGRAMAS = [
+    (None, [None], 80),
+    ("experience_level", ["EN", "MI", "SE", "EX"], 40),
+    ("remote_ratio", [0, 50, 100], 40),
+]
+ESCALA_HISTOGRAMAS = 1000
+
+
+def _chave_distribuicao(coluna, grupo, bins, escala):
+    return f"{coluna}|{grupo}|{bins}|{escala}"
+
+
+def _resumo(cubo, regressao):
+    """Números exibidos nas páginas, derivados só do cubo e dos co-momentos."""
+    geral = agregar(cubo)
+    nivel = agregar(cubo, ["experience_level"])
+    medias_geral, desvios_geral = momentos(geral)
+    medias_nivel, _ = momentos(nivel)
+    seniors = agregar(cubo, ["remote_ratio"], {"experience_level": ["SE"]})
+    total_seniors = seniors["linhas"].sum()
+    return {
+        "linhas": int(geral["linhas"].iloc[0]),
+        "media_salarial": float(medias_geral[0]),
+        "desvio_padrao": float(desvios_geral[0]),
+        "medias_por_nivel": {str(k): float(v) for k, v in zip(nivel.index, medias_nivel)},
+        "proporcao_senior_remoto": (
+            float(seniors["linhas"].get(100, 0) / total_seniors) if total_seniors else None
+        ),
+        "correlacao": float(regressao.correlacao),
+        "intercepto": float(regressao.intercepto),
+        "inclinacao": float(regressao.inclinacao),
+        "r2": float(regressao.r2),
+    }
+
+
+def _colunas(tabela):
+    return {coluna: tabela[coluna].tolist() for coluna in tabela.columns}
+
+
+def _campos_regressao(regressao):
+    return {
+        campo: float(getattr(regressao, campo))
+        for campo in ["n", "media_x", "media_y", "cxx", "cyy", "cxy", "minimo_x", "maximo_x"]
+    }
+
+
+def _posicao(caminho, versao):
+    """Campos usados pela ingestão incremental para reconhecer linhas anexadas."""
+    return {
+        "assinatura_dataset": list(versao),
+        "bytes": versao[1],
+        "impressao": impressao(caminho, versao[1]),
+    }
+
+
+def construir(caminho=CAMINHO_DATASET):
+    """Calcula todas as estatísticas do artefato a partir do CSV."""
+    versao = assinatura(caminho)
+    df = carregar_dataset(caminho)
+    cubo = estatisticas_suficientes(df, DIMENSOES_BASE, VALOR).reset_index()
+
+    distribuicoes = {}
+    for coluna, grupos, bins in HISTOGRAMAS:
+        for grupo in grupos:
+            salarios = df[VALOR] if coluna is None else df.loc[df[coluna] == grupo, VALOR]
+            valores = salarios.dropna().to_numpy(dtype="float64") / ESCALA_HISTOGRAMAS
+            if len(valores) < 2:
+                continue
+            dist = calcular_distribuicao(valores, bins)
+            distribuicoes[_chave_distribuicao(coluna, grupo, bins, ESCALA_HISTOGRAMAS)] = {
+                campo: getattr(dist, campo).tolist() for campo in Distribuicao._fields
+            }
+
+    regressao = CoMomentos()
+    regressao.atualizar(df["salary"].to_numpy(dtype="float64"), df[VALOR].to_numpy(dtype="float64"))
+
+    return {
+        "versao_formato": VERSAO_FORMATO,
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "hash_dataset": hash_dataset(caminho),
+        **_posicao(caminho, versao),
+        "resumo": _resumo(cubo, regressao),
+        "cubo": _colunas(cubo),
+        "esbocos": _colunas(construir_esbocos(df)),
+        "distribuicoes": distribuicoes,
+        "regressao": _campos_regressao(regressao),
+    }
+
+
+def anexar(dados, caminho=CAMINHO_DATASET):
+    """Atualiza o artefato com as linhas anexadas ao CSV desde que foi gerado.
+
+    O cubo e os esboços de quantis são somados célula a célula com os do
+    trecho novo e os co-momentos da regressão são combinados, então o custo é
+    proporcional ao trecho. Os histogramas dependem de todas as linhas e são
+    descartados (as páginas voltam a calculá-los a partir do dataset). Retorna ``None`` se o CSV
+    mudou de outra forma.
+    """
+    versao = assinatura(caminho)
+    df, _ = ler_anexadas(caminho, dados.get("bytes"), dados.get("impressao"))
+    if df is None:
+        return None
+
+    cubo = pd.DataFrame(dados["cubo"])
+    if len(df):
+        df = df.astype({c: t for c, t in TIPOS_COLUNAS.items() if c in df})
+        novo = estatisticas_suficientes(df, DIMENSOES_BASE, VALOR).reset_index()
+        cubo = (
+            pd.concat([cubo, pd.DataFrame({c: novo[c].tolist() for c in novo.columns})], ignore_index=True)
+            .groupby(list(DIMENSOES_BASE), sort=False, dropna=False)[list(METRICAS)]
+            .sum()
+            .reset_index()
+        )
+    esbocos = dados.get("esbocos")
+    if esbocos is not None and len(df):
+        esbocos = _colunas(combinar(pd.DataFrame(esbocos), construir_esbocos(df)))
+    regressao = Artefato(dados).regressao()
+    trecho = CoMomentos()
+    trecho.atualizar(df["salary"].to_numpy(dtype="float64"), df[VALOR].to_numpy(dtype="float64"))
+    regressao.combinar(trecho)
+
+    cubo_tipado = cubo.astype({c: TIPOS_COLUNAS.get(c, "category") for c in DIMENSOES_BASE})
+    return {
+        **dados,
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        # O hash exigiria ler o CSV inteiro; a assinatura identifica a versão anexada
+        "hash_dataset": None,
+        **_posicao(caminho, versao),
+        "resumo": _resumo(cubo_tipado, regressao),
+        "cubo": _colunas(cubo),
+        "esbocos": esbocos,
+        "distribuicoes": {},
+        "regressao": _campos_regressao(regressao),
+    }
+
+
+def salvar(dados, destino=CAMINHO_ARTEFATO):
+    """Grava o artefato (JSON compactado) de forma atômica."""
+    temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    with gzip.open(temporario, "wt", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo, separators=(",", ":"))
+    os.replace(temporario, destino)
+    return destino
+
+
+class Artefato:
+    """Acesso às estatísticas de um artefato carregado."""
+
+    def __init__(self, dados):
+        self.resumo = dados["resumo"]
+        self.gerado_em = dados["gerado_em"]
+        self.hash_dataset = dados["hash_dataset"]
+
+        cubo = pd.DataFrame(dados["cubo"])
+        for coluna in DIMENSOES_BASE:
+            cubo[coluna] = cubo[coluna].astype(TIPOS_COLUNAS.get(coluna, "category"))
+        self.cubo = cubo
+
+        # Artefatos gerados antes dos esboços não os têm: calculados a partir dos dados
+        self.esbocos = None
+        if dados.get("esbocos"):
+            self.esbocos = pd.DataFrame(dados["esbocos"]).astype(
+                {"balde": "int16", **{c: TIPOS_COLUNAS.get(c, "category") for c in DIMENSOES_BASE}}
+            )
+
+        self._distribuicoes = {
+            chave: Distribuicao(*(np.asarray(valores[campo]) for campo in Distribuicao._fields))
+            for chave, valores in dados["distribuicoes"].items()
+        }
+        self._regressao = dados["regressao"]
+
+    def cobre(self, coluna, valor=VALOR):
+        return valor == VALOR and all(c in DIMENSOES_BASE for c in colunas_grupo(coluna))
+
+    def estatisticas(self, coluna=None):
+        """Estatísticas suficientes no formato de ``estatisticas_suficientes``, consolidadas do cubo."""
+        tabela = agregar(self.cubo, colunas_grupo(coluna))
+        if isinstance(coluna, str):
+            tabela.index.name = coluna
+        return tabela
+
+    def distribuicao(self, coluna, grupo, bins, escala):
+        return self._distribuicoes.get(_chave_distribuicao(coluna, grupo, bins, escala))
+
+    def regressao(self):
+        acumulado = CoMomentos()
+        for campo, valor in self._regressao.items():
+            setattr(acumulado, campo, valor)
+        return acumulado
+
+
+@lru_cache(maxsize=2)
+def _ler_artefato(caminho_artefato, versao_artefato, caminho_dataset, versao_dataset):
+    with gzip.open(caminho_artefato, "rt", encoding="utf-8") as arquivo:
+        dados = json.load(arquivo)
+    if dados.get("versao_formato") != VERSAO_FORMATO:
+        return None
+    if versao_dataset is None or dados.get("assinatura_dataset") == list(versao_dataset):
+        return Artefato(dados)
+    if dados["hash_dataset"] is not None and dados["hash_dataset"] == hash_dataset(caminho_dataset):
+        return Artefato(dados)
+    # CSV com linhas anexadas: atualiza o artefato só com o trecho novo
+    dados = anexar(dados, caminho_dataset)
+    if dados is None:
+        return None
+    salvar(dados, Path(caminho_artefato))
+    return Artefato(dados)
+
+
+def carregar_artefato(caminho_dataset=CAMINHO_DATASET, caminho_artefato=CAMINHO_ARTEFATO):
+    """Artefato válido para o dataset atual, ou ``None`` se não existir ou estiver desatualizado.
+
+    Sem o CSV disponível, o artefato é usado como está. Ele descreve todas as
+    linhas do CSV: análises com uma receita ``robusto`` não o consultam.
+    """
+    try:
+        info = os.stat(caminho_artefato)
+    except FileNotFoundError:
+        return None
+    try:
+        info_dataset = os.stat(caminho_dataset)
+        versao_dataset = (info_dataset.st_mtime_ns, info_dataset.st_size)
+    except FileNotFoundError:
+        versao_dataset = None
+    return _ler_artefato(
+        str(caminho_artefato),
+        (info.st_mtime_ns, info.st_size),
+        str(caminho_dataset),
+        versao_dataset,
+    )
@@ -0,0 +1,305 @@
+"""Benchmark das etapas executadas pelas páginas sobre datasets sintéticos.
+
+Gera CSVs com o mesmo esquema de ``dataset.csv`` (categorias com a
+assimetria do dataset real: maioria Sênior, tempo integral, empresas médias
+e localizadas nos EUA, cargos com cauda longa) e mede cada etapa com os
+caches vazios. O resultado vai para um JSON com o commit atual, para
+comparar versões.
+
+Uso (a partir da pasta ``src``)::
+
+    python -m analise.benchmark
+    python -m analise.benchmark --linhas 10000 1000000 10000000 --repeticoes 5 -o resultado.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analise.dados import CAMINHO_DATASET, TIPOS_COLUNAS
+
+DIRETORIO_SINTETICOS = CAMINHO_DATASET.parent / ".cache" / "benchmark"
+# O dataset de 10 milhões de linhas só é gerado quando pedido em --linhas
+TAMANHOS = [10_000, 1_000_000]
+LINHAS_POR_BLOCO = 1_000_000
+
+# Frequências aproximadas do dataset real de salários em AI/ML/DS
+ANOS = {2020: 0.01, 2021: 0.02, 2022: 0.08, 2023: 0.30, 2024: 0.59}
+NIVEIS = {"SE": 0.64, "MI": 0.23, "EN": 0.09, "EX": 0.04}
+TIPOS_EMPREGO = {"FT": 0.994, "CT": 0.003, "PT": 0.002, "FL": 0.001}
+TAMANHOS_EMPRESA = {"M": 0.90, "L": 0.08, "S": 0.02}
+REMOTO = {0: 0.66, 100: 0.32, 50: 0.02}
+# País: (frequência, fator salarial em relação aos EUA, moeda local)
+PAISES = {
+    "US": (0.86, 1.00, "USD"),
+    "CA": (0.04, 0.80, "CAD"),
+    "GB": (0.04, 0.65, "GBP"),
+    "DE": (0.01, 0.60, "EUR"),
+    "ES": (0.01, 0.45, "EUR"),
+    "FR": (0.005, 0.50, "EUR"),
+    "AU": (0.005, 0.75, "AUD"),
+    "IN": (0.01, 0.25, "INR"),
+    "BR": (0.005, 0.30, "BRL"),
+    "NL": (0.01, 0.60, "EUR"),
+}
+# Dólares por unidade da moeda
+TAXAS = {"USD": 1.0, "CAD": 0.74, "GBP": 1.26, "EUR": 1.09, "AUD": 0.66, "INR": 0.012, "BRL": 0.19}
+SALARIO_BASE = {"EN": 90_000, "MI": 125_000, "SE": 160_000, "EX": 195_000}
+CARGOS = [
+    "Data Engineer", "Data Scientist", "Data Analyst", "Machine Learning Engineer",
+    "Research Scientist", "Applied Scientist", "Analytics Engineer", "Research Engineer",
+    "Data Architect", "Business Intelligence Engineer", "ML Engineer", "Data Science Manager",
+    "AI Engineer", "Machine Learning Scientist", "Data Manager", "Data Specialist",
+    "Business Intelligence Analyst", "Computer Vision Engineer", "Data Science Consultant",
+    "Data Product Manager", "MLOps Engineer", "AI Architect", "Data Analytics Manager",
+    "Head of Data", "NLP Engineer", "Deep Learning Engineer", "Data Modeler", "BI Developer",
+    "Data Operations Engineer", "Director of Data Science", "AI Developer", "Prompt Engineer",
+    "Data Quality Analyst", "Machine Learning Researcher", "Big Data Engineer",
+    "Principal Data Scientist", "Data Infrastructure Engineer", "Robotics Engineer",
+    "AI Research Scientist", "Lead Data Engineer",
+]
+
+
+def _sortear(gerador, frequencias, n):
+    valores = list(frequencias)
+    pesos = np.array(list(frequencias.values()), dtype="float64")
+    return np.asarray(valores)[gerador.choice(len(valores), n, p=pesos / pesos.sum())]
+
+
+def gerar(n, semente=0):
+    """DataFrame sintético com ``n`` linhas e as colunas de ``dataset.csv``."""
+    gerador = np.random.default_rng(semente)
+    paises = list(PAISES)
+    local = _sortear(gerador, {p: f for p, (f, _, _) in PAISES.items()}, n)
+    nivel = _sortear(gerador, NIVEIS, n)
+
+    # Residência igual à sede na maior parte das vezes
+    residencia = np.where(gerador.random(n) < 0.95, local, np.asarray(paises)[gerador.integers(len(paises), size=n)])
+    # Cargos com frequência de Zipf: poucos cargos concentram quase todas as linhas
+    pesos_cargos = 1.0 / np.arange(1, len(CARGOS) + 1) ** 1.3
+    cargo = np.asarray(CARGOS)[gerador.choice(len(CARGOS), n, p=pesos_cargos / pesos_cargos.sum())]
+
+    fator_pais = pd.Series({p: v for p, (_, v, _) in PAISES.items()})[local].to_numpy()
+    base = pd.Series(SALARIO_BASE)[nivel].to_numpy()
+    salario_usd = np.round(base * fator_pais * gerador.lognormal(0.0, 0.35, n))
+
+    moeda_local = pd.Series({p: m for p, (_, _, m) in PAISES.items()})[local].to_numpy()
+    moeda = np.where(gerador.random(n) < 0.95, moeda_local, "USD")
+    taxa = pd.Series(TAXAS)[moeda].to_numpy() * gerador.normal(1.0, 0.02, n)
+    salario = np.round(salario_usd / taxa)
+    salario[moeda == "USD"] = salario_usd[moeda == "USD"]
+
+    return pd.DataFrame(
+        {
+            "work_year": _sortear(gerador, ANOS, n),
+            "experience_level": nivel,
+            "employment_type": _sortear(gerador, TIPOS_EMPREGO, n),
+            "job_title": cargo,
+            "salary": salario.astype("int64"),
+            "salary_currency": moeda,
+            "salary_in_usd": salario_usd.astype("int64"),
+            "employee_residence": residencia,
+            "remote_ratio": _sortear(gerador, REMOTO, n),
+            "company_location": local,
+            "company_size": _sortear(gerador, TAMANHOS_EMPRESA, n),
+        }
+    )
+
+
+def dataset_sintetico(n, semente=0, diretorio=DIRETORIO_SINTETICOS):
+    """Caminho de um CSV sintético com ``n`` linhas, gerado em blocos só na primeira vez."""
+    caminho = Path(diretorio) / f"sintetico-{n}-{semente}.csv"
+    if caminho.exists():
+        return caminho
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f".{caminho.name}.tmp")
+    sementes = np.random.SeedSequence(semente).spawn(-(-n // LINHAS_POR_BLOCO))
+    with open(temporario, "w", newline="") as arquivo:
+        for i, semente_bloco in enumerate(sementes):
+            linhas = min(LINHAS_POR_BLOCO, n - i * LINHAS_POR_BLOCO)
+            gerar(linhas, semente_bloco).to_csv(arquivo, index=False, header=i == 0)
+    temporario.replace(caminho)
+    return caminho
+
+
+def _limpar_caches(manter_dados=True):
+    """Esvazia os caches em memória do pacote para medir cada etapa a frio."""
+    for nome, modulo in list(sys.modules.items()):
+        if not nome.startswith("analise.") or (manter_dados and nome == "analise.dados"):
+            continue
+        for objeto in vars(modulo).values():
+            if callable(getattr(objeto, "cache_clear", None)):
+                objeto.cache_clear()
+
+
+def _etapas(caminho):
+    """Etapas das páginas, na ordem em que são executadas: nome -> função sem argumentos."""
+    from scipy import stats
+
+    from analise.dados import _pyarrow_disponivel, carregar_dataset, converter_para_colunar, valores_grupo
+    from analise.esbocos import construir_esbocos, quantis_esbocos
+    from analise.graficos import Serie, figura_distribuicao
+    from analise.intervalos import estatisticas_grupo, intervalos_t, momentos
+    from analise.regressao import ajustar, regressao_simples
+    from analise.testes import teste_proporcao_z, teste_t_welch
+
+    def leitura_csv():
+        pd.read_csv(caminho, dtype=TIPOS_COLUNAS)
+
+    def conversao_colunar():
+        converter_para_colunar(caminho)
+
+    def carregamento():
+        _limpar_caches(manter_dados=False)
+        carregar_dataset(caminho)
+
+    def filtragem_grupos():
+        for grupo in NIVEIS:
+            valores_grupo("experience_level", grupo, caminho=caminho)
+
+    def intervalos():
+        intervalos_t(estatisticas_grupo("experience_level", caminho=caminho), 95, escala=1000)
+
+    def quantis():
+        # Construção explícita: o esboço anterior do processo seria reaproveitado
+        tabela = construir_esbocos(carregar_dataset(caminho))
+        for quantil in (0.1, 0.5, 0.9):
+            quantis_esbocos(tabela, ["experience_level"], quantil, 95)
+
+    def ttest_ind():
+        pleno = valores_grupo("experience_level", "MI", caminho=caminho)
+        senior = valores_grupo("experience_level", "SE", caminho=caminho)
+        stats.ttest_ind(pleno, senior, equal_var=False)
+
+    def teste_t_suficientes():
+        estat = estatisticas_grupo("experience_level", caminho=caminho).loc[["MI", "SE"]]
+        (m1, m2), (s1, s2) = momentos(estat)
+        n1, n2 = estat["n"]
+        teste_t_welch(n1, m1, s1**2, n2, m2, s2**2)
+
+    def teste_proporcao():
+        estat = estatisticas_grupo(["experience_level", "remote_ratio"], caminho=caminho)
+        seniors = estat.xs("SE", level="experience_level")["linhas"]
+        teste_proporcao_z(int(seniors.get(100, 0)), int(seniors.sum()))
+
+    def regressao():
+        regressao_simples("salary", "salary_in_usd", caminho=caminho)
+
+    def regressao_multipla():
+        ajustar(["experience_level", "company_size", "remote_ratio"], caminho=caminho)
+
+    def figura():
+        estat = intervalos_t(estatisticas_grupo("experience_level", caminho=caminho), 95, escala=1000)
+        media, lim_inf, lim_sup = estat.loc["MI", ["media", "lim_inf", "lim_sup"]]
+        figura_distribuicao(
+            [Serie("experience_level", "MI", "orange", "Pleno", media, lim_inf, lim_sup, " Pleno")],
+            "Benchmark",
+            caminho=caminho,
+        )
+
+    etapas = {
+        "leitura_csv": leitura_csv,
+        "conversao_colunar": conversao_colunar,
+        "carregamento": carregamento,
+        "filtragem_grupos": filtragem_grupos,
+        "intervalos": intervalos,
+        "quantis": quantis,
+        "ttest_ind": ttest_ind,
+        "teste_t_suficientes": teste_t_suficientes,
+        "teste_proporcao": teste_proporcao,
+        "regressao": regressao,
+        "regressao_multipla": regressao_multipla,
+        "figura": figura,
+    }
+    if not _pyarrow_disponivel():
+        del etapas["conversao_colunar"]
+    return etapas
+
+
+def medir(caminho, repeticoes=3, etapas=None):
+    """Tempos (s) de cada etapa; os caches são esvaziados antes de cada repetição.
+
+    O dataset em memória é mantido entre as etapas, exceto em ``carregamento``,
+    que mede justamente a leitura a frio. A verificação do artefato
+    pré-calculado (leitura do JSON e hash do CSV) também é feita fora do tempo
+    medido, para não somar um custo fixo a todas as etapas.
+    """
+    from analise.artefato import carregar_artefato
+    from analise.dados import carregar_dataset
+
+    disponiveis = _etapas(caminho)
+    resultados = {}
+    for nome in etapas or disponiveis:
+        tempos = []
+        for _ in range(repeticoes):
+            _limpar_caches()
+            carregar_dataset(caminho)
+            carregar_artefato(caminho)
+            inicio = time.perf_counter()
+            disponiveis[nome]()
+            tempos.append(time.perf_counter() - inicio)
+        resultados[nome] = {
+            "tempos": tempos,
+            "minimo": min(tempos),
+            "mediana": float(np.median(tempos)),
+        }
+    return resultados
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede as etapas do dashboard em datasets sintéticos.")
+    parser.add_argument("--linhas", nargs="+", type=int, default=TAMANHOS, help="tamanhos dos datasets")
+    parser.add_argument("--repeticoes", type=int, default=3, help="repetições por etapa")
+    parser.add_argument("--etapas", nargs="+", default=None, help="subconjunto de etapas a medir")
+    parser.add_argument("--semente", type=int, default=0, help="semente dos datasets sintéticos")
+    parser.add_argument("-o", "--saida", type=Path, default=None, help="arquivo JSON (padrão: src/.cache/benchmark/benchmark-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    commit = _commit()
+    resultado = {
+        "commit": commit,
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "versoes": {"numpy": np.__version__, "pandas": pd.__version__},
+        "repeticoes": args.repeticoes,
+        "datasets": {},
+    }
+    for n in args.linhas:
+        inicio = time.perf_counter()
+        caminho = dataset_sintetico(n, args.semente)
+        print(f"{n:,} linhas: {caminho} ({time.perf_counter() - inicio:.1f}s)")
+        etapas = medir(caminho, args.repeticoes, args.etapas)
+        for nome, tempos in etapas.items():
+            print(f"  {nome:<22}{tempos['mediana'] * 1000:>12.1f} ms")
+        resultado["datasets"][str(n)] = etapas
+
+    saida = args.saida or DIRETORIO_SINTETICOS / f"benchmark-{(commit or 'local')[:10]}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, indent=2))
+    print(f"Resultados gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
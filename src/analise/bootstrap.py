@@ -0,0 +1,113 @@
+"""Intervalos de confiança bootstrap (percentil e BCa) para média e mediana.
+
+As reamostragens são feitas em lotes de índices gerados com sementes
+derivadas de ``np.random.SeedSequence``, então o resultado depende apenas da
+semente e de ``B``, não do número de processos usados.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import stats
+
+from analise.dados import CAMINHO_DATASET, assinatura, valores_grupo
+from analise.intervalos import VALOR
+from analise.paralelo import Processos
+
+ESTATISTICAS = {
+    "media": lambda amostras: amostras.mean(axis=-1),
+    "mediana": lambda amostras: np.median(amostras, axis=-1),
+}
+
+# Limite de elementos da matriz de índices de cada lote (~32 MB em int64)
+ELEMENTOS_POR_LOTE = 4_000_000
+# Abaixo disso o custo de iniciar processos supera o ganho
+MINIMO_PARALELO = 5_000
+REAMOSTRAS_POR_TAREFA = 2_000
+
+def _reamostrar(valores, estatistica, reamostras, semente):
+    """Calcula ``reamostras`` réplicas da estatística em lotes de índices."""
+    rng = np.random.default_rng(semente)
+    n = len(valores)
+    funcao = ESTATISTICAS[estatistica]
+    lote = max(1, ELEMENTOS_POR_LOTE // n)
+    resultado = np.empty(reamostras)
+    for inicio in range(0, reamostras, lote):
+        fim = min(inicio + lote, reamostras)
+        indices = rng.integers(0, n, size=(fim - inicio, n))
+        resultado[inicio:fim] = funcao(valores[indices])
+    return resultado
+
+
+def distribuicao_bootstrap(valores, estatistica="media", B=10_000, semente=0, processos=None):
+    """Réplicas bootstrap da estatística, distribuídas entre processos quando ``B`` é grande."""
+    valores = np.asarray(valores, dtype="float64")
+    tamanhos = [REAMOSTRAS_POR_TAREFA] * (B // REAMOSTRAS_POR_TAREFA)
+    if B % REAMOSTRAS_POR_TAREFA:
+        tamanhos.append(B % REAMOSTRAS_POR_TAREFA)
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    tarefas = [(estatistica, tamanho, s) for tamanho, s in zip(tamanhos, sementes)]
+
+    if B < MINIMO_PARALELO:
+        processos = 1
+    with Processos(valores, processos, len(tarefas)) as pool:
+        partes = pool.mapear(_reamostrar, tarefas)
+    return np.concatenate(partes)
+
+
+def jackknife(valores, estatistica="media"):
+    """Valores leave-one-out da estatística, calculados sem laço em Python."""
+    valores = np.asarray(valores, dtype="float64")
+    n = len(valores)
+    if estatistica == "media":
+        return (valores.sum() - valores) / (n - 1)
+
+    # Mediana: ao remover o elemento de posição i da amostra ordenada, a posição j
+    # da amostra restante corresponde a j + (j >= i) na original
+    ordenados = np.sort(valores)
+    removido = np.arange(n)[:, None]
+    restantes = n - 1
+    posicoes = np.array([restantes // 2] if restantes % 2 else [restantes // 2 - 1, restantes // 2])
+    return ordenados[posicoes + (posicoes >= removido)].mean(axis=1)
+
+
+def intervalo_percentil(replicas, confianca):
+    alpha = 1 - confianca / 100
+    return tuple(np.quantile(replicas, [alpha / 2, 1 - alpha / 2]))
+
+
+def intervalo_bca(replicas, estimativa, jack, confianca):
+    """Intervalo BCa (bias-corrected and accelerated) de Efron."""
+    alpha = 1 - confianca / 100
+    proporcao = (np.mean(replicas < estimativa) + np.mean(replicas <= estimativa)) / 2
+    z0 = stats.norm.ppf(np.clip(proporcao, 1e-10, 1 - 1e-10))
+    desvios = jack.mean() - jack
+    denominador = 6 * np.sum(desvios**2) ** 1.5
+    aceleracao = np.sum(desvios**3) / denominador if denominador > 0 else 0.0
+    z = stats.norm.ppf([alpha / 2, 1 - alpha / 2])
+    ajustados = stats.norm.cdf(z0 + (z0 + z) / (1 - aceleracao * (z0 + z)))
+    return tuple(np.quantile(replicas, ajustados))
+
+
+@lru_cache(maxsize=16)
+def _bootstrap_grupo(caminho, versao, robusto, coluna, grupo, valor, estatistica, B, semente):
+    valores = valores_grupo(coluna, grupo, valor, caminho, robusto)
+    estimativa = ESTATISTICAS[estatistica](valores)
+    replicas = distribuicao_bootstrap(valores, estatistica, B, semente)
+    return estimativa, replicas, jackknife(valores, estatistica)
+
+
+def bootstrap_grupo(coluna=None, grupo=None, estatistica="media", B=10_000, semente=0, valor=VALOR, caminho=CAMINHO_DATASET, robusto=None):
+    """Estimativa, réplicas e jackknife de um grupo, em cache por (grupo, estatística, B, semente)."""
+    caminho = str(caminho)
+    return _bootstrap_grupo(caminho, assinatura(caminho), robusto, coluna, grupo, valor, estatistica, B, semente)
+
+
+def intervalo_bootstrap(coluna=None, grupo=None, estatistica="media", confianca=95, metodo="percentil", B=10_000, semente=0, caminho=CAMINHO_DATASET, robusto=None):
+    """Intervalo bootstrap de um grupo. Mudar ``confianca`` ou ``metodo`` não refaz a reamostragem."""
+    estimativa, replicas, jack = bootstrap_grupo(coluna, grupo, estatistica, B, semente, caminho=caminho, robusto=robusto)
+    if metodo == "bca":
+        lim_inf, lim_sup = intervalo_bca(replicas, estimativa, jack, confianca)
+    else:
+        lim_inf, lim_sup = intervalo_percentil(replicas, confianca)
+    return estimativa, lim_inf, lim_sup
@@ -0,0 +1,39 @@
+"""Gera o artefato de estatísticas pré-calculadas a partir do CSV.
+
+Uso (a partir da pasta ``src``)::
+
+    python -m analise.build_stats dataset.csv
+    python -m analise.build_stats dataset.csv -o estatisticas.json.gz
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from analise.artefato import CAMINHO_ARTEFATO, construir, salvar
+from analise.dados import CAMINHO_DATASET
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pré-calcula as estatísticas exibidas pelo dashboard.")
+    parser.add_argument("dataset", nargs="?", type=Path, default=CAMINHO_DATASET, help="CSV de origem")
+    parser.add_argument(
+        "-o",
+        "--saida",
+        type=Path,
+        default=None,
+        help="arquivo de saída (padrão: estatisticas.json.gz ao lado do CSV padrão)",
+    )
+    args = parser.parse_args(argv)
+    saida = args.saida or CAMINHO_ARTEFATO
+
+    inicio = time.perf_counter()
+    dados = construir(args.dataset.resolve())
+    salvar(dados, saida)
+    resumo = dados["resumo"]
+    print(f"Artefato gravado em {saida} ({saida.stat().st_size / 1024:.1f} KiB, {time.perf_counter() - inicio:.2f}s)")
+    print(f"  linhas: {resumo['linhas']}  células do cubo: {len(dados['cubo']['n'])}  contadores dos esboços: {len(dados['esbocos']['contagem'])}  histogramas: {len(dados['distribuicoes'])}")
+
+
+if __name__ == "__main__":
+    main()
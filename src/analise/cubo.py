@@ -0,0 +1,77 @@
+"""Cubos de estatísticas suficientes sobre as dimensões do dataset.
+
+Um cubo guarda contagem, soma e soma dos quadrados de ``salary_in_usd`` no
+grão mais fino das suas dimensões. Qualquer agrupamento ou filtro é
+respondido somando células do cubo, sem voltar às linhas originais.
+
+O cubo base cobre só as dimensões de baixa cardinalidade: cruzar todas com
+``job_title`` levaria o número de células para perto do número de linhas.
+Consultas que usam uma dimensão de ``ALTA_CARDINALIDADE`` são respondidas
+por um cubo marginal, restrito às dimensões agrupadas e filtradas
+(``dimensoes_consulta``), também em cache.
+"""
+
+from functools import lru_cache
+
+import pandas as pd
+
+from analise.dados import CAMINHO_DATASET, DIMENSOES, assinatura, modo_streaming
+from analise.intervalos import VALOR, estatisticas_grupo
+
+METRICAS = ["n", "soma", "soma_quadrados", "linhas"]
+
+ALTA_CARDINALIDADE = ["job_title"]
+DIMENSOES_BASE = [d for d in DIMENSOES if d not in ALTA_CARDINALIDADE]
+
+
+def dimensoes_consulta(dimensoes=(), filtros=None):
+    """Dimensões do cubo que responde a uma consulta: as do cubo base ou, se a
+    consulta usa uma dimensão de alta cardinalidade, só as agrupadas e filtradas."""
+    usadas = set(dimensoes) | {d for d, valores in (filtros or {}).items() if valores}
+    if usadas <= set(DIMENSOES_BASE):
+        return tuple(DIMENSOES_BASE)
+    return tuple(d for d in DIMENSOES if d in usadas)
+
+
+@lru_cache(maxsize=16)
+def _cubo(caminho, versao, robusto, valor, streaming, dimensoes):
+    return estatisticas_grupo(dimensoes, valor, caminho, robusto).reset_index()
+
+
+def cubo(valor=VALOR, caminho=CAMINHO_DATASET, robusto=None, dimensoes=DIMENSOES_BASE):
+    """Cubo em cache, reconstruído apenas quando o dataset (ou a receita ``robusto``) muda.
+
+    Por padrão é o cubo base; ``dimensoes_consulta`` dá as ``dimensoes`` do
+    cubo que responde a um agrupamento e filtros.
+    """
+    caminho = str(caminho)
+    return _cubo(caminho, assinatura(caminho), robusto, valor, modo_streaming(), tuple(dimensoes))
+
+
+def filtrar(tabela, filtros=None):
+    """Células do cubo que atendem a ``filtros`` (dimensão -> valores aceitos; vazio aceita todos)."""
+    if filtros:
+        mascara = pd.Series(True, index=tabela.index)
+        for dimensao, valores in filtros.items():
+            if valores:
+                mascara &= tabela[dimensao].isin(valores)
+        tabela = tabela[mascara]
+    return tabela
+
+
+def agregar(tabela, dimensoes=(), filtros=None):
+    """Consolida o cubo nas ``dimensoes`` pedidas após aplicar ``filtros``.
+
+    ``filtros`` mapeia dimensão -> valores aceitos. O resultado tem o mesmo
+    formato de ``estatisticas_suficientes`` e pode ir direto para ``intervalos_t``.
+    """
+    tabela = filtrar(tabela, filtros)
+    dimensoes = list(dimensoes)
+    if not dimensoes:
+        return pd.DataFrame([tabela[METRICAS].sum()], index=pd.Index(["Todos"]))
+    return tabela.groupby(dimensoes, observed=True, dropna=False)[METRICAS].sum()
+
+
+def valores_dimensao(tabela, dimensao):
+    """Valores presentes de uma dimensão, em ordem, para montar os seletores."""
+    return sorted(tabela[dimensao].dropna().unique().tolist())
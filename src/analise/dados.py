@@ -0,0 +1,295 @@
+"""Acesso ao dataset de salários com cache compartilhado pelo processo.
+
+O pandas só é importado quando o dataset é realmente lido.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+from analise.instrumentacao import medido
+
+CAMINHO_DATASET = Path(__file__).resolve().parent.parent / "dataset.csv"
+
+# Tipos explícitos: evita a inferência do pandas a cada leitura e reduz memória.
+# Os inteiros são anuláveis para aceitar linhas (inclusive anexadas) sem ano ou regime remoto
+TIPOS_COLUNAS = {
+    "work_year": "Int16",
+    "experience_level": "category",
+    "employment_type": "category",
+    "company_size": "category",
+    "employee_residence": "category",
+    "company_location": "category",
+    "remote_ratio": "Int8",
+}
+
+# No formato colunar as demais colunas de texto também viram dicionários
+TIPOS_COLUNAR = {
+    **TIPOS_COLUNAS,
+    "job_title": "category",
+    "salary_currency": "category",
+}
+
+# Dimensões categóricas usadas para agrupar salary_in_usd (ver analise.cubo)
+DIMENSOES = [
+    "work_year",
+    "experience_level",
+    "employment_type",
+    "company_size",
+    "company_location",
+    "remote_ratio",
+    "job_title",
+]
+
+NOMES_DIMENSOES = {
+    "work_year": "Ano do pagamento",
+    "experience_level": "Nível de experiência",
+    "employment_type": "Tipo de emprego",
+    "company_size": "Tamanho da empresa",
+    "company_location": "Localização da empresa",
+    "remote_ratio": "Proporção de trabalho remoto",
+    "job_title": "Título do cargo",
+}
+
+VERSAO_COLUNAR = 3
+MANIFESTO = "_manifesto.json"
+# Trecho final (em bytes) usado para conferir que o CSV só recebeu linhas novas
+TAMANHO_IMPRESSAO = 64 * 1024
+AMOSTRAS_IMPRESSAO = 64
+TAMANHO_AMOSTRA = 4 * 1024
+
+# Leituras de colunas novas, uma por vez no processo (sessões do Streamlit rodam em threads)
+_TRAVA_LEITURA = threading.Lock()
+
+
+def modo_streaming():
+    """Ativado por ``DSSC_STREAMING=1``: estatísticas lidas do CSV em blocos, sem carregar tudo."""
+    return os.environ.get("DSSC_STREAMING", "") not in ("", "0")
+
+
+def assinatura(caminho=CAMINHO_DATASET):
+    """Identifica a versão do arquivo (mtime + tamanho) para invalidar o cache."""
+    info = os.stat(caminho)
+    return info.st_mtime_ns, info.st_size
+
+
+@lru_cache(maxsize=4)
+def _hash_arquivo(caminho, versao):
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for parte in iter(lambda: arquivo.read(1 << 20), b""):
+            resumo.update(parte)
+    return resumo.hexdigest()
+
+
+def hash_dataset(caminho=CAMINHO_DATASET):
+    """SHA-256 do conteúdo do arquivo, recalculado apenas quando ele muda."""
+    caminho = str(caminho)
+    return _hash_arquivo(caminho, assinatura(caminho))
+
+
+def caminho_colunar(caminho_csv=CAMINHO_DATASET):
+    """Diretório do armazenamento colunar: uma ou mais partes Parquet e um manifesto."""
+    return Path(caminho_csv).with_suffix(".parquet")
+
+
+def _pyarrow_disponivel():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def impressao(caminho, posicao):
+    """SHA-256 do cabeçalho, de amostras espaçadas e dos últimos bytes antes de ``posicao``.
+
+    Se o CSV atual tiver a mesma impressão na posição registrada, o conteúdo
+    até ali é tratado como inalterado e só há linhas anexadas depois dela.
+    Edições que mudam o tamanho do trecho deslocam o final e são sempre
+    detectadas; as amostras cobrem parte das edições de mesmo tamanho.
+    """
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        resumo.update(arquivo.readline())
+        for i in range(AMOSTRAS_IMPRESSAO):
+            arquivo.seek(posicao * i // AMOSTRAS_IMPRESSAO)
+            resumo.update(arquivo.read(min(TAMANHO_AMOSTRA, posicao - arquivo.tell())))
+        inicio = max(0, posicao - TAMANHO_IMPRESSAO)
+        arquivo.seek(inicio)
+        resumo.update(arquivo.read(posicao - inicio))
+    return resumo.hexdigest()
+
+
+def _manifesto_bruto(destino):
+    try:
+        return json.loads((Path(destino) / MANIFESTO).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def ler_manifesto(destino):
+    manifesto = _manifesto_bruto(destino)
+    if manifesto is None or manifesto.get("versao_formato") != VERSAO_COLUNAR:
+        return None
+    return manifesto
+
+
+def gravar_manifesto(destino, manifesto):
+    arquivo = Path(destino) / MANIFESTO
+    temporario = arquivo.with_name(f".{arquivo.name}.{os.getpid()}.tmp")
+    temporario.write_text(json.dumps(manifesto))
+    os.replace(temporario, arquivo)
+
+
+def gravar_parte(df, destino, geracao, indice):
+    """Grava ``df`` como uma nova parte Parquet da ``geracao`` atual do armazenamento colunar."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arquivo = Path(destino) / f"parte-{geracao}-{indice:06d}.parquet"
+    # Arquivo temporário oculto: leitores concorrentes nunca veem uma parte incompleta
+    temporario = arquivo.with_name(f".{arquivo.name}.{os.getpid()}.tmp")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), temporario)
+    os.replace(temporario, arquivo)
+    return arquivo.name
+
+
+def converter_para_colunar(caminho_csv=CAMINHO_DATASET, destino=None):
+    """Reconstrói o armazenamento colunar a partir do CSV inteiro.
+
+    Grava uma única parte com as colunas de texto codificadas como categorias
+    e um manifesto com a assinatura do CSV e a posição (em bytes) até onde ele
+    foi lido, usada pela ingestão incremental (``analise.ingestao``).
+
+    As partes de cada reconstrução têm nomes novos (uma ``geracao``) e só passam
+    a valer quando o manifesto é substituído atomicamente; as partes do
+    manifesto anterior são removidas depois disso.
+    """
+    import pandas as pd
+
+    destino = Path(destino or caminho_colunar(caminho_csv))
+    if destino.is_file():
+        # Formato antigo: um único arquivo Parquet
+        destino.unlink()
+    destino.mkdir(parents=True, exist_ok=True)
+
+    versao = assinatura(caminho_csv)
+    df = pd.read_csv(caminho_csv, dtype=TIPOS_COLUNAR)
+    anterior = _manifesto_bruto(destino) or {}
+    geracao = uuid.uuid4().hex[:12]
+    parte = gravar_parte(df, destino, geracao, 0)
+    gravar_manifesto(
+        destino,
+        {
+            "versao_formato": VERSAO_COLUNAR,
+            "geracao": geracao,
+            "origem": list(versao),
+            "bytes": versao[1],
+            "linhas": len(df),
+            "impressao": impressao(caminho_csv, versao[1]),
+            "tipos": {coluna: str(tipo) for coluna, tipo in df.dtypes.items()},
+            "partes": [parte],
+        },
+    )
+    for antiga in anterior.get("partes", []):
+        if antiga != parte:
+            (destino / antiga).unlink(missing_ok=True)
+    return destino
+
+
+def ler_colunar(destino, colunas=None, tentativas=3):
+    """Lê exatamente as partes listadas no manifesto de ``destino``.
+
+    Se uma reconstrução concorrente (outro processo) trocar o manifesto e
+    remover as partes antigas durante a leitura, o manifesto é relido.
+    """
+    import pyarrow.parquet as pq
+
+    destino = Path(destino)
+    for tentativa in range(tentativas):
+        manifesto = ler_manifesto(destino)
+        if manifesto is None:
+            raise FileNotFoundError(f"Manifesto do armazenamento colunar ausente em {destino}")
+        arquivos = [str(destino / parte) for parte in manifesto["partes"]]
+        try:
+            return pq.ParquetDataset(arquivos).read(columns=colunas, use_pandas_metadata=True).to_pandas()
+        except OSError:
+            if tentativa == tentativas - 1:
+                raise
+
+
+def _cabecalho(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return arquivo.readline().strip().split(",")
+
+
+@lru_cache(maxsize=2)
+def _colunas_lidas(caminho, versao):
+    """Colunas (``pd.Series``) já lidas de uma versão do arquivo, preenchidas sob demanda."""
+    return {}
+
+
+def _ler(caminho, versao, colunas):
+    import pandas as pd
+
+    lidas = _colunas_lidas(caminho, versao)
+    atual = versao
+    with _TRAVA_LEITURA:
+        faltantes = [c for c in colunas if c not in lidas]
+        if faltantes:
+            if _pyarrow_disponivel():
+                from analise.ingestao import sincronizar
+
+                df = ler_colunar(sincronizar(caminho), faltantes)
+            else:
+                df = pd.read_csv(caminho, dtype={c: t for c, t in TIPOS_COLUNAS.items() if c in faltantes}, usecols=faltantes)
+            atual = assinatura(caminho)
+            if atual == versao:
+                lidas.update({c: df[c] for c in faltantes})
+    if atual != versao:
+        # O CSV mudou durante a leitura: as colunas lidas não se misturam às da versão anterior
+        return _ler(caminho, atual, colunas)
+    return pd.DataFrame({c: lidas[c] for c in colunas}, copy=False)
+
+
+@medido("carregar_dataset")
+def carregar_dataset(caminho=CAMINHO_DATASET, colunas=None, robusto=None):
+    """Retorna o dataset, relendo o arquivo apenas quando o CSV muda.
+
+    Com ``pyarrow`` instalado a leitura é feita do armazenamento colunar
+    (atualizado incrementalmente quando o CSV só recebeu linhas novas); sem
+    ele, o CSV é lido diretamente. Só as ``colunas`` pedidas são lidas, e cada
+    coluna fica em cache uma única vez por versão do arquivo: projeções
+    diferentes compartilham as mesmas colunas em memória.
+
+    ``robusto`` é uma receita ``(metodo, limite, grupo)`` de
+    ``analise.robustez.receita``: as linhas discrepantes são removidas, com as
+    colunas filtradas em cache uma única vez por versão do arquivo e receita.
+
+    O DataFrame é compartilhado entre páginas e sessões: não deve ser alterado
+    in-place por quem o recebe.
+    """
+    caminho = str(caminho)
+    colunas = list(colunas) if colunas else _cabecalho(caminho)
+    if robusto is not None:
+        from analise.robustez import sem_discrepantes
+
+        return sem_discrepantes(caminho, colunas, robusto)
+    return _ler(caminho, assinatura(caminho), colunas)
+
+
+def valores_grupo(coluna=None, grupo=None, valor="salary_in_usd", caminho=CAMINHO_DATASET, robusto=None):
+    """Valores não nulos de ``valor`` para as linhas em que ``coluna == grupo``.
+
+    Com ``coluna=None`` retorna a coluna inteira.
+    """
+    if coluna is None:
+        df = carregar_dataset(caminho, colunas=[valor], robusto=robusto)
+        return df[valor].dropna().to_numpy(dtype="float64")
+    df = carregar_dataset(caminho, colunas=[coluna, valor], robusto=robusto)
+    return df.loc[df[coluna] == grupo, valor].dropna().to_numpy(dtype="float64")
@@ -0,0 +1,193 @@
+"""Esboços de quantis mescláveis por célula do cubo (base ou marginal, ver ``analise.cubo``).
+
+Cada salário é contado em um balde logarítmico (no estilo do DDSketch): o
+balde ``k`` cobre ``(GAMA**(k-1), GAMA**k]``, e o valor que o representa
+está a no máximo ``ERRO_RELATIVO`` de qualquer valor do balde. Os baldes são
+limitados a ``[VALOR_MINIMO, VALOR_MAXIMO]``, então cada célula usa no
+máximo ``BALDES`` contadores, qualquer que seja o número de linhas.
+
+Um esboço é só uma contagem por (célula, balde): combinar grupos,
+dimensões ou lotes de dados é somar contagens, como no cubo. As consultas
+por qualquer agrupamento e filtro não voltam às linhas, e as linhas
+anexadas ao CSV são incorporadas lendo apenas o trecho novo.
+"""
+
+import math
+import threading
+from functools import lru_cache, reduce
+
+import numpy as np
+import pandas as pd
+
+from analise.cubo import DIMENSOES_BASE, dimensoes_consulta, filtrar
+from analise.dados import (
+    CAMINHO_DATASET,
+    TIPOS_COLUNAR,
+    assinatura,
+    carregar_dataset,
+    impressao,
+    modo_streaming,
+)
+from analise.intervalos import VALOR, colunas_grupo, posicoes_quantil
+
+ERRO_RELATIVO = 0.01
+GAMA = (1 + ERRO_RELATIVO) / (1 - ERRO_RELATIVO)
+VALOR_MINIMO = 1.0
+VALOR_MAXIMO = 1e9
+BALDE_MINIMO = math.ceil(math.log(VALOR_MINIMO) / math.log(GAMA))
+BALDE_MAXIMO = math.ceil(math.log(VALOR_MAXIMO) / math.log(GAMA))
+BALDES = BALDE_MAXIMO - BALDE_MINIMO + 1
+
+# Último esboço completo de cada dataset e dimensões, para incorporar só as linhas anexadas
+_ULTIMOS = {}
+_TRAVA = threading.Lock()
+
+
+def baldes(valores):
+    """Balde de cada valor; valores fora dos limites vão para o balde da ponta."""
+    with np.errstate(divide="ignore"):
+        k = np.ceil(np.log(np.maximum(valores, 0.0)) / math.log(GAMA))
+    return np.clip(k, BALDE_MINIMO, BALDE_MAXIMO).astype("int16")
+
+
+def representante(balde):
+    """Valor que representa o balde, com erro relativo de no máximo ``ERRO_RELATIVO``."""
+    return 2 * GAMA ** np.asarray(balde, dtype="float64") / (GAMA + 1)
+
+
+def limites(balde):
+    """Limites inferior e superior dos valores que caem em cada balde."""
+    balde = np.asarray(balde, dtype="float64")
+    inferior = np.where(balde == BALDE_MINIMO, 0.0, GAMA ** (balde - 1))
+    superior = np.where(balde == BALDE_MAXIMO, np.inf, GAMA**balde)
+    return inferior, superior
+
+
+def _tipar(tabela, dimensoes):
+    return tabela.astype({d: TIPOS_COLUNAR.get(d, "category") for d in dimensoes})
+
+
+def construir_esbocos(df, dimensoes=DIMENSOES_BASE, valor=VALOR):
+    """Contagens por (célula, balde) de ``valor`` em uma única passada agrupada."""
+    dimensoes = list(dimensoes)
+    validos = df.loc[df[valor].notna(), dimensoes + [valor]]
+    validos = validos.assign(balde=baldes(validos[valor].to_numpy(dtype="float64")))
+    tabela = validos.groupby(dimensoes + ["balde"], observed=True, dropna=False).size().rename("contagem").reset_index()
+    return _tipar(tabela, dimensoes)
+
+
+def combinar(*tabelas, dimensoes=DIMENSOES_BASE):
+    """Soma, célula a célula e balde a balde, os esboços de lotes diferentes."""
+    dimensoes = list(dimensoes)
+    tabela = (
+        pd.concat(tabelas, ignore_index=True)
+        .groupby(dimensoes + ["balde"], observed=True, sort=False, dropna=False)["contagem"]
+        .sum()
+        .reset_index()
+    )
+    return _tipar(tabela, dimensoes)
+
+
+def _construir(caminho, streaming, dimensoes, robusto=None):
+    dimensoes = list(dimensoes)
+    colunas = dimensoes + [VALOR]
+    if streaming:
+        from analise.streaming import ler_em_blocos
+
+        return reduce(
+            lambda a, b: combinar(a, b, dimensoes=dimensoes),
+            (construir_esbocos(bloco, dimensoes) for bloco in ler_em_blocos(colunas, caminho)),
+        )
+    return construir_esbocos(carregar_dataset(caminho, colunas=colunas, robusto=robusto), dimensoes)
+
+
+@lru_cache(maxsize=8)
+def _esbocos(caminho, versao, robusto, streaming, dimensoes):
+    from analise.ingestao import ler_anexadas
+
+    # Linhas anexadas podem mudar quais linhas antigas são discrepantes: o robusto é sempre reconstruído
+    if robusto is not None:
+        return _construir(caminho, streaming, dimensoes, robusto)
+    with _TRAVA:
+        tabela = None
+        anterior = _ULTIMOS.get((caminho, dimensoes))
+        if anterior is not None:
+            df, _ = ler_anexadas(caminho, anterior["bytes"], anterior["impressao"])
+            if df is not None:
+                tabela = anterior["tabela"]
+                if len(df):
+                    tabela = combinar(tabela, construir_esbocos(df, dimensoes), dimensoes=dimensoes)
+        if tabela is None:
+            tabela = _construir(caminho, streaming, dimensoes)
+        _ULTIMOS[(caminho, dimensoes)] = {
+            "bytes": versao[1],
+            "impressao": impressao(caminho, versao[1]),
+            "tabela": tabela,
+        }
+        return tabela
+
+
+def esbocos(caminho=CAMINHO_DATASET, robusto=None, dimensoes=DIMENSOES_BASE):
+    """Esboços de ``salary_in_usd`` por célula do cubo, em cache por versão do dataset.
+
+    Por padrão são os do cubo base, que vêm do artefato pré-calculado quando
+    ele é válido; os demais são construídos ao carregar os dados (em blocos no
+    modo streaming). Quando o CSV só recebeu linhas novas, apenas elas são
+    lidas e somadas ao esboço anterior. Com uma receita ``robusto`` são
+    construídos sem as linhas discrepantes.
+    """
+    from analise.artefato import carregar_artefato
+
+    caminho = str(caminho)
+    dimensoes = tuple(dimensoes)
+    artefato = carregar_artefato(caminho) if robusto is None and dimensoes == tuple(DIMENSOES_BASE) else None
+    if artefato is not None and artefato.esbocos is not None:
+        return artefato.esbocos
+    return _esbocos(caminho, assinatura(caminho), robusto, modo_streaming(), dimensoes)
+
+
+def quantis_esbocos(tabela, dimensoes=(), quantil=0.5, confianca=95, escala=1):
+    """Quantil e intervalo livre de distribuição por grupo, a partir dos esboços.
+
+    Os limites do intervalo são as estatísticas de ordem de ``posicoes_quantil``,
+    tomadas nas bordas externas dos seus baldes: a cobertura é ao menos a
+    nominal, ao custo de alargar cada limite em até ``ERRO_RELATIVO``. Retorna o
+    mesmo formato de ``intervalos_quantil`` (n, estimativa, lim_inf, lim_sup).
+    """
+    dimensoes = list(dimensoes)
+    contagens = tabela.groupby(dimensoes + ["balde"], observed=True, dropna=False)["contagem"].sum()
+    contagens = contagens[contagens > 0]
+    if contagens.empty:
+        return pd.DataFrame(columns=["n", "estimativa", "lim_inf", "lim_sup"])
+    # Ordenadas por grupo e balde: o acumulado é crescente dentro e entre os grupos
+    if dimensoes:
+        n = contagens.groupby(level=dimensoes, observed=True, sort=False, dropna=False).sum()
+    else:
+        n = pd.Series([contagens.sum()], index=pd.Index(["Todos"]))
+    acumulado = np.cumsum(contagens.to_numpy(dtype="int64"))
+    baldes_ordenados = contagens.index.get_level_values("balde").to_numpy()
+    tamanhos = n.to_numpy(dtype="int64")
+    inicios = np.cumsum(tamanhos) - tamanhos
+
+    def balde_na_posicao(posicao):
+        return baldes_ordenados[np.searchsorted(acumulado, inicios + posicao, side="right")]
+
+    posicao = np.floor((tamanhos - 1) * quantil).astype("int64")
+    inferior, superior = posicoes_quantil(tamanhos, quantil, confianca)
+    lim_inf, _ = limites(balde_na_posicao(inferior))
+    _, lim_sup = limites(balde_na_posicao(superior))
+    return pd.DataFrame(
+        {
+            "n": tamanhos,
+            "estimativa": representante(balde_na_posicao(posicao)) / escala,
+            "lim_inf": lim_inf / escala,
+            "lim_sup": lim_sup / escala,
+        },
+        index=n.index,
+    )
+
+
+def quantis_grupo(coluna=None, quantil=0.5, confianca=95, filtros=None, escala=1, caminho=CAMINHO_DATASET, robusto=None):
+    """Quantil de ``salary_in_usd`` com intervalo por grupo de ``coluna``, após ``filtros``."""
+    tabela = filtrar(esbocos(caminho, robusto, dimensoes_consulta(colunas_grupo(coluna), filtros)), filtros)
+    return quantis_esbocos(tabela, colunas_grupo(coluna), quantil, confianca, escala)
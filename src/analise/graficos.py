@@ -0,0 +1,202 @@
+"""Dados pré-agregados para os gráficos e renderização em cache.
+
+Histogramas/KDEs dos intervalos são calculados uma vez por grupo; a cada
+mudança de confiança só as linhas do intervalo mudam. As figuras usam a API
+orientada a objetos do matplotlib (sem ``pyplot``), então não ficam
+registradas em memória entre execuções, e o matplotlib só é importado na
+primeira renderização. Os gráficos de dispersão usam
+rasters de densidade ou amostras estratificadas, com custo de desenho
+independente do número de linhas.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+
+from analise.dados import CAMINHO_DATASET, assinatura, carregar_dataset, valores_grupo
+
+PONTOS_GRADE = 512
+
+Distribuicao = namedtuple("Distribuicao", ["bordas", "probabilidades", "grade", "kde"])
+
+# Uma série do gráfico: histograma de um grupo e, opcionalmente, seu intervalo
+Serie = namedtuple(
+    "Serie",
+    ["coluna", "grupo", "cor", "rotulo", "media", "lim_inf", "lim_sup", "sufixo"],
+    defaults=(None, None, None, None, None, None, None, ""),
+)
+
+
+def kde_binada(valores, grade):
+    """KDE gaussiana (largura de banda de Scott) avaliada na ``grade`` igualmente espaçada.
+
+    Os pontos são distribuídos nos nós vizinhos da grade por interpolação linear
+    e a soma dos núcleos vira uma convolução por FFT (``numpy.fft``), com custo
+    independente do número de observações.
+    """
+    n = len(valores)
+    passo = grade[1] - grade[0]
+    largura = np.std(valores, ddof=1) * n ** (-1 / 5)
+    if not np.isfinite(largura) or largura <= 0 or passo <= 0:
+        return np.zeros_like(grade)
+
+    posicao = (valores - grade[0]) / passo
+    esquerda = np.clip(np.floor(posicao).astype(np.int64), 0, len(grade) - 2)
+    fracao = posicao - esquerda
+    contagens = np.bincount(esquerda, weights=1 - fracao, minlength=len(grade))
+    contagens += np.bincount(esquerda + 1, weights=fracao, minlength=len(grade))
+
+    alcance = min(len(grade) - 1, int(np.ceil(4 * largura / passo)))
+    deslocamentos = np.arange(-alcance, alcance + 1) * passo
+    nucleo = np.exp(-0.5 * (deslocamentos / largura) ** 2)
+    # Convolução linear (com zeros nas bordas), recortada ao tamanho da grade
+    tamanho = len(contagens) + len(nucleo) - 1
+    completa = np.fft.irfft(np.fft.rfft(contagens, tamanho) * np.fft.rfft(nucleo, tamanho), tamanho)
+    densidade = completa[alcance : alcance + len(grade)]
+    return np.clip(densidade, 0, None) / (n * largura * np.sqrt(2 * np.pi))
+
+
+def calcular_distribuicao(valores, bins=40):
+    """Histograma em probabilidade e KDE na mesma escala (como ``sns.histplot(kde=True, stat="probability")``)."""
+    contagens, bordas = np.histogram(valores, bins=bins)
+    grade = np.linspace(bordas[0], bordas[-1], PONTOS_GRADE)
+    largura_bin = bordas[1] - bordas[0]
+    return Distribuicao(bordas, contagens / len(valores), grade, kde_binada(valores, grade) * largura_bin)
+
+
+@lru_cache(maxsize=64)
+def _distribuicao(caminho, versao, robusto, coluna, grupo, bins, escala):
+    return calcular_distribuicao(valores_grupo(coluna, grupo, caminho=caminho, robusto=robusto) / escala, bins)
+
+
+def distribuicao(coluna=None, grupo=None, bins=40, escala=1000, caminho=CAMINHO_DATASET, robusto=None):
+    """Histograma e KDE de ``salary_in_usd`` de um grupo, em cache por versão do dataset.
+
+    Usa o artefato pré-calculado quando ele contém o grupo pedido.
+    """
+    from analise.artefato import carregar_artefato
+
+    caminho = str(caminho)
+    artefato = carregar_artefato(caminho) if robusto is None else None
+    if artefato is not None:
+        dist = artefato.distribuicao(coluna, grupo, bins, escala)
+        if dist is not None:
+            return dist
+    return _distribuicao(caminho, assinatura(caminho), robusto, coluna, grupo, bins, escala)
+
+
+@lru_cache(maxsize=32)
+def _figura(caminho, versao, robusto, series, titulo, bins, escala):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    fig = Figure(figsize=(15, 10))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+
+    for serie in series:
+        dist = distribuicao(serie.coluna, serie.grupo, bins, escala, caminho, robusto)
+        ax.stairs(dist.probabilidades, dist.bordas, fill=True, alpha=0.4, color=serie.cor, label=serie.rotulo)
+        ax.plot(dist.grade, dist.kde, color=serie.cor)
+        if serie.media is None:
+            continue
+        ax.axvspan(serie.lim_inf, serie.lim_sup, color=serie.cor, alpha=0.15)
+        ax.axvline(serie.media, color=serie.cor, linestyle="--", label=f"Média{serie.sufixo}: ${serie.media:,.1f}K")
+        ax.axvline(serie.lim_inf, color=serie.cor, linestyle=":", linewidth=2, label=f"Limite Inferior{serie.sufixo}")
+        ax.axvline(serie.lim_sup, color=serie.cor, linestyle=":", linewidth=2, label=f"Limite Superior{serie.sufixo}")
+
+    ax.set_xlabel("Salário Anual (K USD)")
+    ax.set_ylabel("Probabilidade")
+    ax.set_title(titulo)
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f"{int(x)}K"))
+    if any(serie.rotulo or serie.media is not None for serie in series):
+        ax.legend()
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def figura_distribuicao(series, titulo, bins=40, escala=1000, caminho=CAMINHO_DATASET, robusto=None):
+    """PNG com os histogramas das ``series`` e seus intervalos.
+
+    As imagens ficam em um cache LRU limitado, indexado pelas séries (grupos e
+    limites do intervalo) e pelo título, que já contém o nível de confiança.
+    """
+    caminho = str(caminho)
+    return _figura(caminho, assinatura(caminho), robusto, tuple(series), titulo, bins, escala)
+
+
+def densidade_2d(x, y, bins=150):
+    """Contagens de um histograma 2D (raster de densidade) e suas bordas."""
+    return np.histogram2d(x, y, bins=bins)
+
+
+def indices_estratificados(estrato, extremos=(), tamanho=5_000, faixas=20, fracao_extremos=0.005, semente=0):
+    """Índices de uma amostra estratificada que preserva os valores extremos.
+
+    Linhas fora dos quantis ``fracao_extremos`` / ``1 - fracao_extremos`` de
+    qualquer array em ``extremos`` entram sempre (até metade da amostra). O
+    restante é sorteado proporcionalmente em ``faixas`` de quantis de ``estrato``.
+    """
+    n = len(estrato)
+    if n <= tamanho:
+        return np.arange(n)
+    rng = np.random.default_rng(semente)
+
+    mascara = np.zeros(n, dtype=bool)
+    for valores in extremos:
+        baixo, alto = np.quantile(valores, [fracao_extremos, 1 - fracao_extremos])
+        mascara |= (valores < baixo) | (valores > alto)
+    fixos = np.flatnonzero(mascara)
+    if len(fixos) > tamanho // 2:
+        fixos = rng.choice(fixos, tamanho // 2, replace=False)
+
+    candidatos = np.flatnonzero(~mascara)
+    restante = tamanho - len(fixos)
+    bordas = np.quantile(estrato[candidatos], np.linspace(0, 1, faixas + 1)[1:-1])
+    faixa = np.searchsorted(bordas, estrato[candidatos], side="right")
+
+    # Ordena por (faixa, chave aleatória) e mantém as primeiras posições de cada faixa
+    tamanhos = np.bincount(faixa, minlength=faixas)
+    cotas = np.round(tamanhos * restante / len(candidatos)).astype(np.int64)
+    ordem = np.lexsort((rng.random(len(candidatos)), faixa))
+    inicio_faixa = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    posicao = np.arange(len(candidatos)) - inicio_faixa[faixa[ordem]]
+    escolhidos = candidatos[ordem[posicao < cotas[faixa[ordem]]]]
+    return np.sort(np.concatenate([fixos, escolhidos]))
+
+
+def _dados_regressao(caminho, robusto, x_col, y_col, intercepto, inclinacao):
+    df = carregar_dataset(caminho, colunas=[x_col, y_col], robusto=robusto).dropna(subset=[x_col, y_col])
+    x = df[x_col].to_numpy(dtype="float64")
+    y = df[y_col].to_numpy(dtype="float64")
+    return x, y, y - (intercepto + inclinacao * x)
+
+
+@lru_cache(maxsize=8)
+def _densidades_regressao(caminho, versao, robusto, x_col, y_col, intercepto, inclinacao, bins):
+    x, y, residuos = _dados_regressao(caminho, robusto, x_col, y_col, intercepto, inclinacao)
+    return densidade_2d(x, y, bins), densidade_2d(x, residuos, bins)
+
+
+def densidades_regressao(x_col, y_col, intercepto, inclinacao, bins=150, caminho=CAMINHO_DATASET, robusto=None):
+    """Rasters de densidade de (x, y) e (x, resíduo) sobre todas as linhas, em cache."""
+    caminho = str(caminho)
+    return _densidades_regressao(caminho, assinatura(caminho), robusto, x_col, y_col, intercepto, inclinacao, bins)
+
+
+@lru_cache(maxsize=8)
+def _amostra_regressao(caminho, versao, robusto, x_col, y_col, intercepto, inclinacao, tamanho, semente):
+    x, y, residuos = _dados_regressao(caminho, robusto, x_col, y_col, intercepto, inclinacao)
+    indices = indices_estratificados(x, (x, y, residuos), tamanho, semente=semente)
+    return x[indices], y[indices], residuos[indices]
+
+
+def amostra_regressao(x_col, y_col, intercepto, inclinacao, tamanho=5_000, semente=0, caminho=CAMINHO_DATASET, robusto=None):
+    """Amostra estratificada de (x, y, resíduo) que mantém os extremos, em cache."""
+    caminho = str(caminho)
+    return _amostra_regressao(caminho, assinatura(caminho), robusto, x_col, y_col, intercepto, inclinacao, tamanho, semente)
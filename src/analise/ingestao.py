@@ -0,0 +1,155 @@
+"""Ingestão incremental de linhas anexadas ao final do CSV.
+
+O armazenamento colunar e o artefato de estatísticas registram até qual byte
+do CSV já foram processados e uma impressão (``dados.impressao``) do conteúdo
+até ali. Se o arquivo atual mantém a mesma impressão nessa posição, ele só
+recebeu linhas novas: apenas o trecho final é lido e anexado como uma nova
+parte Parquet, e as estatísticas acumuladas são combinadas com as do trecho.
+Qualquer outra mudança (edição, remoção, reescrita) leva à reconstrução
+completa. A página, o servidor da API e esta CLI podem sincronizar o mesmo
+armazenamento ao mesmo tempo: uma trava de arquivo (``fcntl.flock``) ao lado
+do diretório serializa as atualizações entre processos.
+
+Uso (a partir da pasta ``src``)::
+
+    python -m analise.ingestao dataset.csv
+"""
+
+import argparse
+import contextlib
+import io
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: apenas a trava entre threads
+    fcntl = None
+
+from analise.dados import (
+    CAMINHO_DATASET,
+    TIPOS_COLUNAR,
+    assinatura,
+    caminho_colunar,
+    converter_para_colunar,
+    gravar_manifesto,
+    gravar_parte,
+    impressao,
+    ler_manifesto,
+)
+
+# Sessões do Streamlit rodam em threads: uma sincronização por vez no processo
+_TRAVA = threading.Lock()
+
+
+@contextlib.contextmanager
+def _travado(destino):
+    """Exclusão mútua entre as threads do processo e, com ``fcntl``, entre processos."""
+    with _TRAVA:
+        if fcntl is None:
+            yield
+            return
+        with open(destino.with_name(f".{destino.name}.lock"), "a") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+def ler_anexadas(caminho, posicao, impressao_registrada, tipos=None):
+    """Linhas gravadas no CSV depois de ``posicao``.
+
+    Retorna ``(df, tamanho)``, com ``tamanho`` sendo a nova posição a registrar,
+    ou ``(None, tamanho)`` se o conteúdo até ``posicao`` mudou e só uma
+    reconstrução completa é confiável. ``tipos`` converte as colunas do trecho
+    para os tipos já armazenados.
+    """
+    tamanho = assinatura(caminho)[1]
+    # Mesmo tamanho com outra assinatura: o arquivo foi alterado, não anexado
+    if posicao is None or impressao_registrada is None or tamanho <= posicao:
+        return None, tamanho
+    if impressao(caminho, posicao) != impressao_registrada:
+        return None, tamanho
+
+    with open(caminho, "rb") as arquivo:
+        cabecalho = arquivo.readline().decode("utf-8").strip().split(",")
+        arquivo.seek(posicao - 1)
+        # Uma linha que não terminava em "\n" pode ter sido completada pelo anexo
+        if posicao > 0 and arquivo.read(1) != b"\n":
+            return None, tamanho
+        trecho = arquivo.read(tamanho - posicao)
+
+    if not trecho.strip():
+        return pd.DataFrame(columns=cabecalho), tamanho
+    df = pd.read_csv(
+        io.BytesIO(trecho),
+        header=None,
+        names=cabecalho,
+        dtype={c: t for c, t in TIPOS_COLUNAR.items() if c in cabecalho},
+    )
+    if tipos:
+        try:
+            df = df.astype({c: t for c, t in tipos.items() if c in df and t != "category"})
+        except (TypeError, ValueError):
+            return None, tamanho
+    return df, tamanho
+
+
+def sincronizar(caminho_csv=CAMINHO_DATASET, destino=None):
+    """Deixa o armazenamento colunar em dia com o CSV e retorna o seu diretório.
+
+    Linhas anexadas viram uma nova parte Parquet; qualquer outra mudança
+    reconstrói o armazenamento a partir do CSV inteiro.
+    """
+    destino = Path(destino or caminho_colunar(caminho_csv))
+    with _travado(destino):
+        versao = assinatura(caminho_csv)
+        manifesto = ler_manifesto(destino) if destino.is_dir() else None
+        if manifesto is not None and tuple(manifesto["origem"]) == versao:
+            return destino
+        if manifesto is None:
+            return converter_para_colunar(caminho_csv, destino)
+
+        df, tamanho = ler_anexadas(
+            caminho_csv, manifesto["bytes"], manifesto["impressao"], manifesto.get("tipos")
+        )
+        if df is None:
+            return converter_para_colunar(caminho_csv, destino)
+        if len(df):
+            manifesto["partes"].append(gravar_parte(df, destino, manifesto["geracao"], len(manifesto["partes"])))
+        manifesto.update(
+            origem=list(versao),
+            bytes=tamanho,
+            linhas=manifesto["linhas"] + len(df),
+            impressao=impressao(caminho_csv, tamanho),
+        )
+        gravar_manifesto(destino, manifesto)
+        return destino
+
+
+def main(argv=None):
+    from analise.artefato import carregar_artefato
+    from analise.dados import _pyarrow_disponivel
+
+    parser = argparse.ArgumentParser(description="Incorpora as linhas anexadas ao CSV sem reprocessá-lo inteiro.")
+    parser.add_argument("dataset", nargs="?", type=Path, default=CAMINHO_DATASET, help="CSV de origem")
+    args = parser.parse_args(argv)
+    caminho = args.dataset.resolve()
+
+    inicio = time.perf_counter()
+    if _pyarrow_disponivel():
+        destino = sincronizar(caminho)
+        manifesto = ler_manifesto(destino)
+        print(f"Armazenamento colunar: {manifesto['linhas']} linhas em {len(manifesto['partes'])} parte(s)")
+    artefato = carregar_artefato(caminho)
+    if artefato is not None:
+        print(f"Artefato de estatísticas: {artefato.resumo['linhas']} linhas")
+    print(f"Concluído em {time.perf_counter() - inicio:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Medição opcional do tempo de cada etapa das páginas.
+
+Ativada por ``DSSC_PERFIL=1`` ou pelo parâmetro ``?perfil=1`` na URL. Cada
+execução (rerun) de uma página vira um perfil com etapas aninhadas, cada uma
+com tempo de relógio, tempo de CPU da thread da sessão e pico de memória
+alocada (``tracemalloc``, que também contabiliza os arrays do NumPy). O
+rastreamento de memória vale para o processo inteiro, então só é ligado por
+``DSSC_PERFIL``; pela URL, o perfil mede apenas os tempos. O painel na
+barra lateral mostra o detalhamento e permite baixar as etapas em JSONL ou no formato de trace do Chrome (``chrome://tracing`` / Perfetto).
+Com ``DSSC_PERFIL_ARQUIVO`` definido, toda execução é anexada a esse arquivo
+JSONL para análise posterior de sessões em produção.
+
+Desativada, ``etapa`` é um contexto vazio e o custo é desprezível.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextvars import ContextVar
+
+_perfil_atual = ContextVar("perfil_atual", default=None)
+_TRAVA_ARQUIVO = threading.Lock()
+
+
+class Etapa:
+    __slots__ = ("nome", "profundidade", "inicio", "duracao", "cpu", "memoria_pico", "_pico_filhas")
+
+    def __init__(self, nome, profundidade, inicio):
+        self.nome = nome
+        self.profundidade = profundidade
+        self.inicio = inicio
+        self.duracao = self.cpu = 0.0
+        self.memoria_pico = None
+        self._pico_filhas = 0
+
+
+class Perfil:
+    """Etapas de uma execução de página, na ordem em que foram abertas."""
+
+    def __init__(self, pagina, memoria=False):
+        self.pagina = pagina
+        self.memoria = memoria
+        self.id = uuid.uuid4().hex
+        self.criado_em = time.time()
+        self.etapas = []
+        self._pilha = []
+        self._origem = time.perf_counter()
+        self._thread = threading.get_ident()
+        self._raiz = None
+
+    @contextlib.contextmanager
+    def etapa(self, nome):
+        if self.memoria:
+            # O pico do tracemalloc é global: antes de zerá-lo, repassa o pico atual à etapa aberta
+            memoria_inicial, pico = tracemalloc.get_traced_memory()
+            if self._pilha:
+                self._pilha[-1]._pico_filhas = max(self._pilha[-1]._pico_filhas, pico)
+            tracemalloc.reset_peak()
+
+        atual = Etapa(nome, len(self._pilha), time.perf_counter() - self._origem)
+        self.etapas.append(atual)
+        self._pilha.append(atual)
+        inicio_cpu = time.thread_time()
+        try:
+            yield atual
+        finally:
+            atual.cpu = time.thread_time() - inicio_cpu
+            atual.duracao = time.perf_counter() - self._origem - atual.inicio
+            self._pilha.pop()
+            if self.memoria:
+                pico = max(tracemalloc.get_traced_memory()[1], atual._pico_filhas)
+                atual.memoria_pico = max(0, pico - memoria_inicial)
+                if self._pilha:
+                    self._pilha[-1]._pico_filhas = max(self._pilha[-1]._pico_filhas, pico)
+
+    def registros(self):
+        """Uma linha (dict) por etapa, no formato exportado em JSONL."""
+        return [
+            {
+                "pagina": self.pagina,
+                "execucao": self.id,
+                "criado_em": self.criado_em,
+                "etapa": e.nome,
+                "profundidade": e.profundidade,
+                "inicio_ms": e.inicio * 1000,
+                "duracao_ms": e.duracao * 1000,
+                "cpu_ms": e.cpu * 1000,
+                "memoria_pico_bytes": e.memoria_pico,
+            }
+            for e in self.etapas
+        ]
+
+    def jsonl(self):
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.registros())
+
+    def trace_chrome(self):
+        """Etapas como eventos completos (``"ph": "X"``) do formato de trace do Chrome."""
+        inicio = self.criado_em * 1e6
+        eventos = [
+            {
+                "name": e.nome,
+                "ph": "X",
+                "ts": inicio + e.inicio * 1e6,
+                "dur": e.duracao * 1e6,
+                "pid": os.getpid(),
+                "tid": self._thread,
+                "args": {"cpu_ms": e.cpu * 1000, "memoria_pico_bytes": e.memoria_pico},
+            }
+            for e in self.etapas
+        ]
+        return json.dumps({"traceEvents": eventos, "displayTimeUnit": "ms"})
+
+
+def _ativa_por_ambiente():
+    return os.environ.get("DSSC_PERFIL", "") not in ("", "0")
+
+
+def ativa():
+    """Instrumentação pedida pelo ambiente ou pela URL (``?perfil=1``)."""
+    if _ativa_por_ambiente():
+        return True
+    import streamlit as st
+
+    return st.query_params.get("perfil", "") not in ("", "0")
+
+
+def iniciar(pagina):
+    """Abre o perfil da execução atual da página, se a instrumentação estiver ativa.
+
+    A execução inteira é a etapa raiz; ``painel`` a encerra e exibe o resultado.
+    O ``tracemalloc`` só é ligado (e nunca desligado) quando a instrumentação
+    vem do ambiente: ligado por um ``?perfil=1``, ele pesaria sobre todas as
+    sessões do processo e os ``reset_peak`` de uma corromperiam as medidas das
+    outras.
+    """
+    if not ativa():
+        _perfil_atual.set(None)
+        return None
+    memoria = _ativa_por_ambiente()
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    perfil = Perfil(pagina, memoria)
+    raiz = perfil.etapa(pagina)
+    raiz.__enter__()
+    perfil._raiz = raiz
+    _perfil_atual.set(perfil)
+    return perfil
+
+
+def etapa(nome):
+    """Contexto que mede ``nome`` dentro do perfil da execução atual (ou nada faz)."""
+    perfil = _perfil_atual.get()
+    if perfil is None:
+        return contextlib.nullcontext()
+    return perfil.etapa(nome)
+
+
+def medido(nome):
+    """Decorador equivalente a envolver a função em ``etapa(nome)``."""
+
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with etapa(nome):
+                return funcao(*args, **kwargs)
+
+        return envolvida
+
+    return decorador
+
+
+def encerrar():
+    """Fecha a etapa raiz e grava a execução em ``DSSC_PERFIL_ARQUIVO``, se definido."""
+    perfil = _perfil_atual.get()
+    if perfil is None:
+        return None
+    _perfil_atual.set(None)
+    perfil._raiz.__exit__(None, None, None)
+    arquivo = os.environ.get("DSSC_PERFIL_ARQUIVO")
+    if arquivo:
+        with _TRAVA_ARQUIVO, open(arquivo, "a", encoding="utf-8") as saida:
+            saida.write(perfil.jsonl())
+    return perfil
+
+
+def painel():
+    """Encerra o perfil e mostra o detalhamento em um painel recolhível da barra lateral.
+
+    Deve ser chamado no fim da página (e antes de cada ``st.stop``).
+    """
+    perfil = encerrar()
+    if perfil is None:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    raiz = perfil.etapas[0]
+    tabela = pd.DataFrame(
+        {
+            "Etapa": [" " * e.profundidade + e.nome for e in perfil.etapas[1:]],
+            "Tempo (ms)": [e.duracao * 1000 for e in perfil.etapas[1:]],
+            "CPU (ms)": [e.cpu * 1000 for e in perfil.etapas[1:]],
+            "% do total": [100 * e.duracao / raiz.duracao if raiz.duracao else 0.0 for e in perfil.etapas[1:]],
+        }
+    )
+    resumo = [f"- **Tempo total:** {raiz.duracao * 1000:,.1f} ms", f"- **CPU:** {raiz.cpu * 1000:,.1f} ms"]
+    if perfil.memoria:
+        tabela.insert(3, "Pico de memória (MiB)", [e.memoria_pico / 2**20 for e in perfil.etapas[1:]])
+        resumo.append(f"- **Pico de memória:** {raiz.memoria_pico / 2**20:,.1f} MiB")
+    with st.sidebar.expander("⏱️ Perfil da execução", expanded=False):
+        st.markdown("\n".join(resumo))
+        st.dataframe(tabela, hide_index=True)
+        if perfil.memoria:
+            st.caption("O pico de memória é medido no processo: sessões simultâneas interferem entre si.")
+        else:
+            st.caption("O pico de memória só é medido com `DSSC_PERFIL=1` definido ao iniciar o servidor.")
+        col1, col2 = st.columns(2)
+        col1.download_button("JSONL", perfil.jsonl(), file_name=f"perfil-{perfil.id}.jsonl", mime="application/jsonl")
+        col2.download_button(
+            "Trace do Chrome", perfil.trace_chrome(), file_name=f"perfil-{perfil.id}.json", mime="application/json"
+        )
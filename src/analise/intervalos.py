@@ -0,0 +1,177 @@
+"""Intervalos de confiança t calculados a partir de estatísticas suficientes por grupo."""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from analise.dados import CAMINHO_DATASET, assinatura, carregar_dataset, modo_streaming
+
+VALOR = "salary_in_usd"
+
+
+def estatisticas_suficientes(df, coluna=None, valor=VALOR):
+    """Contagem, soma e soma dos quadrados de ``valor`` por grupo em uma única passada.
+
+    ``linhas`` conta também os valores ausentes. ``coluna`` pode ser um nome ou uma lista de nomes (índice multinível). Com
+    ``coluna=None`` todo o DataFrame forma um único grupo, indexado por "Todos". Chaves ausentes formam
+    um grupo próprio, para que os totais do cubo e do artefato batam com o dataset.
+    """
+    x = df[valor].astype("float64")
+    base = pd.DataFrame({"x": x, "q": x * x})
+    if coluna is None:
+        chaves = pd.Series("Todos", index=df.index)
+    elif isinstance(coluna, str):
+        chaves = df[coluna]
+    else:
+        chaves = [df[c] for c in coluna]
+    return base.groupby(chaves, observed=True, dropna=False).agg(
+        n=("x", "count"), soma=("x", "sum"), soma_quadrados=("q", "sum"), linhas=("x", "size")
+    )
+
+
+def colunas_grupo(coluna):
+    """Normaliza ``coluna`` (None, nome ou lista) para uma tupla de nomes."""
+    if coluna is None:
+        return ()
+    if isinstance(coluna, str):
+        return (coluna,)
+    return tuple(coluna)
+
+
+@lru_cache(maxsize=32)
+def _estatisticas_grupo(caminho, versao, robusto, coluna, valor):
+    df = carregar_dataset(caminho, colunas=colunas_grupo(coluna) + (valor,), robusto=robusto)
+    return estatisticas_suficientes(df, coluna, valor)
+
+
+def estatisticas_grupo(coluna=None, valor=VALOR, caminho=CAMINHO_DATASET, robusto=None):
+    """Estatísticas suficientes em cache, recalculadas só quando o dataset muda.
+
+    Se houver um artefato pré-calculado válido (``analise.build_stats``), a
+    tabela é consolidada a partir dele. No modo streaming (``DSSC_STREAMING=1``)
+    o CSV é lido em blocos e o resultado tem o mesmo formato. Com uma receita
+    ``robusto`` (``analise.robustez.receita``) as linhas discrepantes são
+    removidas e o artefato não é usado.
+    """
+    from analise.artefato import carregar_artefato
+
+    caminho = str(caminho)
+    if not (coluna is None or isinstance(coluna, str)):
+        coluna = tuple(coluna)
+    if robusto is not None:
+        return _estatisticas_grupo(caminho, assinatura(caminho), robusto, coluna, valor)
+    artefato = carregar_artefato(caminho)
+    if artefato is not None and artefato.cobre(coluna, valor):
+        return artefato.estatisticas(coluna)
+    if modo_streaming():
+        from analise.streaming import estatisticas_grupo_em_blocos
+
+        return estatisticas_grupo_em_blocos(coluna, valor, caminho)
+    return _estatisticas_grupo(caminho, assinatura(caminho), None, coluna, valor)
+
+
+def momentos(estatisticas):
+    """Média e desvio padrão amostral (ddof=1) a partir das somas."""
+    n = estatisticas["n"].to_numpy(dtype="float64")
+    soma = estatisticas["soma"].to_numpy(dtype="float64")
+    media = soma / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variancia = (estatisticas["soma_quadrados"].to_numpy(dtype="float64") - soma * media) / (n - 1)
+    return media, np.sqrt(np.clip(variancia, 0, None))
+
+
+def intervalos_t(estatisticas, confianca, escala=1):
+    """Intervalos t para todos os grupos de uma vez.
+
+    ``confianca`` é dada em porcentagem (ex.: 95) e ``escala`` divide os valores
+    retornados (ex.: 1000 para exibir em milhares de USD).
+    """
+    alpha = 1 - confianca / 100
+    n = estatisticas["n"].to_numpy(dtype="float64")
+    media, desvio = momentos(estatisticas)
+    t_critico = stats.t.ppf(1 - alpha / 2, df=n - 1)
+    margem = t_critico * desvio / np.sqrt(n)
+    return pd.DataFrame(
+        {
+            "n": estatisticas["n"].to_numpy(),
+            "media": media / escala,
+            "desvio": desvio / escala,
+            "t_critico": t_critico,
+            "margem": margem / escala,
+            "lim_inf": (media - margem) / escala,
+            "lim_sup": (media + margem) / escala,
+        },
+        index=estatisticas.index,
+    )
+
+
+def posicoes_quantil(n, quantil, confianca):
+    """Posições (base 0) das estatísticas de ordem que formam um intervalo para o ``quantil``.
+
+    Intervalo livre de distribuição: o número de observações abaixo do quantil
+    populacional segue uma Binomial(n, quantil), então
+    ``[x(inf), x(sup)]`` cobre o quantil com probabilidade de ao menos ``confianca``%.
+    """
+    alpha = 1 - confianca / 100
+    n = np.asarray(n, dtype="int64")
+    inferior = stats.binom.ppf(alpha / 2, n, quantil) - 1
+    superior = stats.binom.ppf(1 - alpha / 2, n, quantil)
+    return (
+        np.clip(inferior, 0, n - 1).astype("int64"),
+        np.clip(superior, 0, n - 1).astype("int64"),
+    )
+
+
+def intervalos_quantil(df, coluna=None, quantil=0.5, confianca=95, valor=VALOR, escala=1):
+    """Quantil amostral e intervalo livre de distribuição por grupo, com uma ordenação só.
+
+    As linhas são ordenadas por (grupo, valor); o quantil e os limites de cada
+    grupo são lidos diretamente nas posições calculadas para o seu tamanho.
+    Retorna um DataFrame indexado pelos grupos com n, estimativa, lim_inf e lim_sup.
+    """
+    x = df[valor].to_numpy(dtype="float64")
+    validos = ~np.isnan(x)
+    if coluna is None:
+        codigos = np.zeros(validos.sum(), dtype="int64")
+        grupos = pd.Index(["Todos"])
+    else:
+        chaves = [df[c] for c in colunas_grupo(coluna)]
+        if len(chaves) > 1:
+            codigos, grupos = pd.MultiIndex.from_arrays(chaves).factorize(sort=True)
+        else:
+            codigos, grupos = pd.factorize(chaves[0], sort=True)
+        codigos = codigos[validos]
+    x = x[validos]
+
+    ordem = np.lexsort((x, codigos))
+    ordenados = x[ordem]
+    n = np.bincount(codigos, minlength=len(grupos))
+    inicios = np.concatenate([[0], np.cumsum(n)[:-1]])
+    # Grupos cujos valores são todos ausentes ficam de fora
+    presentes = n > 0
+    n, inicios, grupos = n[presentes], inicios[presentes], grupos[presentes]
+
+    # Quantil tipo 7 (o padrão do NumPy): interpolação entre as posições vizinhas
+    h = (n - 1) * quantil
+    baixo = np.floor(h).astype("int64")
+    alto = np.minimum(baixo + 1, n - 1)
+    fracao = h - baixo
+    inferior, superior = posicoes_quantil(n, quantil, confianca)
+    estimativa = ordenados[inicios + baixo] * (1 - fracao) + ordenados[inicios + alto] * fracao
+
+    nomes = list(colunas_grupo(coluna))
+    if len(nomes) > 1:
+        grupos = pd.MultiIndex.from_tuples(list(grupos), names=nomes)
+    elif nomes:
+        grupos = pd.Index(grupos, name=nomes[0])
+    return pd.DataFrame(
+        {
+            "n": n,
+            "estimativa": estimativa / escala,
+            "lim_inf": ordenados[inicios + inferior] / escala,
+            "lim_sup": ordenados[inicios + superior] / escala,
+        },
+        index=grupos,
+    )
@@ -0,0 +1,159 @@
+"""Normalização de moedas: taxas de câmbio implícitas e regressões por moeda.
+
+A taxa implícita de cada linha é ``salary / salary_in_usd`` (unidades da
+moeda por dólar). Por (``salary_currency``, ``work_year``) a taxa de
+referência é a mediana dessas razões, e uma conversão é marcada como
+discrepante quando se afasta da mediana do seu grupo além de um limite
+robusto (MAD) e de uma tolerância relativa. Tudo é calculado com operações
+agrupadas, sem laços por moeda, e fica em cache pela versão do dataset.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from analise.dados import CAMINHO_DATASET, assinatura, carregar_dataset
+from analise.intervalos import VALOR
+from analise.robustez import ESCALA_MAD
+from analise.streaming import CoMomentos
+
+MOEDA = "salary_currency"
+ANO = "work_year"
+SALARIO = "salary"
+
+# Discrepante: desvio robusto acima de LIMITE_Z e diferença relativa acima de TOLERANCIA
+LIMITE_Z = 3.5
+TOLERANCIA = 0.05
+
+Conversoes = namedtuple("Conversoes", ["taxas", "linhas"])
+
+
+@lru_cache(maxsize=4)
+def _conversoes(caminho, versao, robusto):
+    df = carregar_dataset(caminho, colunas=[MOEDA, ANO, SALARIO, VALOR], robusto=robusto)
+    validos = df[(df[SALARIO] > 0) & (df[VALOR] > 0) & df[MOEDA].notna()]
+    chaves = [validos[MOEDA], validos[ANO]]
+
+    log_taxa = np.log(validos[SALARIO].astype("float64")) - np.log(validos[VALOR].astype("float64"))
+    mediana = log_taxa.groupby(chaves, observed=True).transform("median")
+    desvio = (log_taxa - mediana).abs()
+    mad = desvio.groupby(chaves, observed=True).transform("median")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (desvio / (ESCALA_MAD * mad)).fillna(0.0)
+    discrepante = (z > LIMITE_Z) & (desvio > np.log1p(TOLERANCIA))
+
+    taxa = np.exp(mediana)
+    linhas = pd.DataFrame(
+        {
+            MOEDA: validos[MOEDA],
+            ANO: validos[ANO],
+            SALARIO: validos[SALARIO],
+            VALOR: validos[VALOR],
+            "taxa_implicita": validos[SALARIO] / validos[VALOR],
+            "taxa_referencia": taxa,
+            "salario_normalizado": validos[SALARIO] / taxa,
+            "desvio_pct": 100 * np.expm1(log_taxa - mediana),
+            "z_robusto": z,
+            "discrepante": discrepante,
+        }
+    )
+    taxas = linhas.groupby([MOEDA, ANO], observed=True).agg(
+        n=(SALARIO, "size"),
+        taxa=("taxa_referencia", "first"),
+        taxa_minima=("taxa_implicita", "min"),
+        taxa_maxima=("taxa_implicita", "max"),
+        discrepantes=("discrepante", "sum"),
+    )
+    dispersao = (ESCALA_MAD * mad).groupby(chaves, observed=True).first()
+    taxas["dispersao_pct"] = 100 * np.expm1(dispersao.to_numpy())
+    return Conversoes(taxas, linhas)
+
+
+def conversoes(caminho=CAMINHO_DATASET, robusto=None):
+    """Taxas por (moeda, ano) e as conversões de cada linha, em cache por versão do dataset."""
+    caminho = str(caminho)
+    return _conversoes(caminho, assinatura(caminho), robusto)
+
+
+def taxas_implicitas(caminho=CAMINHO_DATASET, robusto=None):
+    """Taxa implícita (unidades da moeda por USD) por moeda e ano.
+
+    Colunas: n, taxa (mediana), taxa_minima, taxa_maxima, discrepantes e
+    dispersao_pct (desvio robusto das taxas do grupo, em %).
+    """
+    return conversoes(caminho, robusto).taxas
+
+
+def conversoes_discrepantes(caminho=CAMINHO_DATASET, robusto=None):
+    """Linhas cuja taxa implícita destoa da taxa de referência do seu grupo, da maior diferença para a menor."""
+    linhas = conversoes(caminho, robusto).linhas
+    discrepantes = linhas[linhas["discrepante"]].drop(columns="discrepante")
+    return discrepantes.sort_values("desvio_pct", key=np.abs, ascending=False)
+
+
+@lru_cache(maxsize=4)
+def _regressao_normalizada(caminho, versao, robusto):
+    linhas = _conversoes(caminho, versao, robusto).linhas
+    acumulado = CoMomentos()
+    acumulado.atualizar(linhas["salario_normalizado"].to_numpy(dtype="float64"), linhas[VALOR].to_numpy(dtype="float64"))
+    return acumulado
+
+
+def regressao_normalizada(caminho=CAMINHO_DATASET, robusto=None):
+    """Co-momentos de (salário convertido pela taxa de referência, ``salary_in_usd``)."""
+    caminho = str(caminho)
+    return _regressao_normalizada(caminho, assinatura(caminho), robusto)
+
+
+@lru_cache(maxsize=8)
+def _regressoes_por_moeda(caminho, versao, robusto, por_ano, confianca):
+    df = carregar_dataset(caminho, colunas=[MOEDA, ANO, SALARIO, VALOR], robusto=robusto)
+    df = df[df[SALARIO].notna() & df[VALOR].notna()]
+    x = df[SALARIO].to_numpy(dtype="float64")
+    y = df[VALOR].to_numpy(dtype="float64")
+    chaves = [df[MOEDA], df[ANO]] if por_ano else df[MOEDA]
+
+    # Uma única agregação agrupada com as somas do MQO de todas as moedas
+    somas = pd.DataFrame({"sx": x, "sy": y, "sxx": x * x, "syy": y * y, "sxy": x * y}, index=df.index)
+    somas = somas.groupby(chaves, observed=True).sum()
+    n = df.groupby(chaves, observed=True).size().to_numpy(dtype="float64")
+
+    sx, sy = somas["sx"].to_numpy(), somas["sy"].to_numpy()
+    cxx = somas["sxx"].to_numpy() - sx * sx / n
+    cyy = somas["syy"].to_numpy() - sy * sy / n
+    cxy = somas["sxy"].to_numpy() - sx * sy / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inclinacao = cxy / cxx
+        intercepto = (sy - inclinacao * sx) / n
+        correlacao = cxy / np.sqrt(cxx * cyy)
+        residuos = np.clip(cyy - inclinacao * cxy, 0, None)
+        erro_padrao = np.sqrt(residuos / (n - 2) / cxx)
+    t_critico = stats.t.ppf(1 - (1 - confianca / 100) / 2, n - 2)
+    return pd.DataFrame(
+        {
+            "n": n.astype("int64"),
+            "intercepto": intercepto,
+            "inclinacao": inclinacao,
+            "erro_padrao": erro_padrao,
+            "lim_inf": inclinacao - t_critico * erro_padrao,
+            "lim_sup": inclinacao + t_critico * erro_padrao,
+            "correlacao": correlacao,
+            "r2": correlacao**2,
+            "taxa_implicita": 1 / inclinacao,
+        },
+        index=somas.index,
+    )
+
+
+def regressoes_por_moeda(por_ano=False, confianca=95, caminho=CAMINHO_DATASET, robusto=None):
+    """Reta de MQO de ``salary_in_usd`` sobre ``salary`` para cada moeda (e ano), em forma fechada.
+
+    Todas as retas saem de uma agregação agrupada das somas (n, Σx, Σy, Σx²,
+    Σy², Σxy). A inclinação é a cotação média em USD por unidade da moeda, e
+    ``taxa_implicita`` é o seu inverso; o intervalo de ``confianca``% é o da inclinação.
+    """
+    caminho = str(caminho)
+    return _regressoes_por_moeda(caminho, assinatura(caminho), robusto, por_ano, confianca)
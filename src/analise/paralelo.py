@@ -0,0 +1,67 @@
+"""Execução de tarefas numéricas em um pool de processos.
+
+Os dados compartilhados são enviados uma única vez para cada processo (no
+inicializador), e cada tarefa carrega apenas seus parâmetros.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+_dados_processo = None
+
+
+def _iniciar_processo(dados):
+    global _dados_processo
+    _dados_processo = dados
+
+
+def _executar(args):
+    funcao, tarefa = args
+    return funcao(_dados_processo, *tarefa)
+
+
+class Processos:
+    """Aplica ``funcao(dados, *tarefa)`` em paralelo; com um processo executa em série.
+
+    Uso como gerenciador de contexto, para reaproveitar o pool entre várias
+    rodadas de tarefas. ``tarefas_por_rodada`` limita o número de processos:
+    cada processo recebe uma cópia dos dados, e os excedentes ficariam ociosos.
+    """
+
+    def __init__(self, dados, processos=None, tarefas_por_rodada=None):
+        self.dados = dados
+        self.processos = processos or os.cpu_count() or 1
+        if tarefas_por_rodada is not None:
+            self.processos = max(1, min(self.processos, tarefas_por_rodada))
+        self._executor = None
+
+    def __enter__(self):
+        if self.processos > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processos,
+                initializer=_iniciar_processo,
+                initargs=(self.dados,),
+            )
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if self._executor is not None:
+            # Numa saída antecipada (exceção ou gerador descartado por um rerun)
+            # as tarefas ainda na fila são canceladas em vez de executadas
+            self._executor.shutdown(cancel_futures=tipo is not None)
+            self._executor = None
+
+    def mapear(self, funcao, tarefas):
+        if self._executor is None:
+            return [funcao(self.dados, *tarefa) for tarefa in tarefas]
+        return list(self._executor.map(_executar, [(funcao, tarefa) for tarefa in tarefas]))
+
+    def conforme_concluir(self, funcao, tarefas):
+        """Gera pares (índice da tarefa, resultado) à medida que as tarefas terminam."""
+        if self._executor is None:
+            for indice, tarefa in enumerate(tarefas):
+                yield indice, funcao(self.dados, *tarefa)
+            return
+        futuros = {self._executor.submit(_executar, (funcao, tarefa)): indice for indice, tarefa in enumerate(tarefas)}
+        for futuro in as_completed(futuros):
+            yield futuros[futuro], futuro.result()
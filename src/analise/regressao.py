@@ -0,0 +1,218 @@
+"""Regressão linear múltipla sobre as colunas categóricas do dataset.
+
+Cada preditor vira um bloco one-hot esparso. As matrizes XᵀX e Xᵀy são
+acumuladas bloco a bloco (por par de preditores e por faixa de linhas), sem
+montar a matriz de desenho densa. Os blocos ficam em cache, então ligar ou
+desligar um preditor só monta e resolve o sistema normal com blocos já
+calculados. Linhas com algum preditor ausente ficam fora do ajuste: a sua
+contribuição (poucas linhas) é subtraída dos blocos em cache.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+
+from analise.dados import CAMINHO_DATASET, assinatura, carregar_dataset, modo_streaming
+from analise.streaming import CoMomentos, regressao_em_blocos
+
+PREDITORES = [
+    "experience_level",
+    "employment_type",
+    "company_size",
+    "remote_ratio",
+    "work_year",
+    "company_location",
+    "employee_residence",
+    "job_title",
+]
+
+ALVO = "salary_in_usd"
+
+LINHAS_POR_BLOCO = 500_000
+
+Ajuste = namedtuple(
+    "Ajuste", ["coeficientes", "r2", "r2_ajustado", "n", "graus_liberdade", "erro_padrao_residual", "linhas_excluidas"]
+)
+
+
+@lru_cache(maxsize=16)
+def _codigos(caminho, versao, robusto, preditor, alvo):
+    """Códigos inteiros e níveis do preditor nas linhas com ``alvo`` presente."""
+    df = carregar_dataset(caminho, colunas=[preditor, alvo], robusto=robusto)
+    categorias = df.loc[df[alvo].notna(), preditor].astype("category")
+    return categorias.cat.codes.to_numpy(), np.asarray(categorias.cat.categories)
+
+
+def one_hot(codigos, niveis):
+    """Bloco one-hot esparso (linhas × níveis); códigos ausentes (-1) ficam zerados."""
+    validos = codigos >= 0
+    linhas = np.flatnonzero(validos)
+    return sparse.csr_matrix(
+        (np.ones(len(linhas)), (linhas, codigos[validos])),
+        shape=(len(codigos), niveis),
+    )
+
+
+@lru_cache(maxsize=32)
+def _alvo(caminho, versao, robusto, alvo):
+    df = carregar_dataset(caminho, colunas=[alvo], robusto=robusto)
+    return df[alvo].dropna().to_numpy(dtype="float64")
+
+
+@lru_cache(maxsize=64)
+def _bloco_cruzado(caminho, versao, robusto, p, q, alvo):
+    """Bloco XₚᵀX_q acumulado por faixas de linhas."""
+    codigos_p, niveis_p = _codigos(caminho, versao, robusto, p, alvo)
+    codigos_q, niveis_q = _codigos(caminho, versao, robusto, q, alvo)
+    bloco = np.zeros((len(niveis_p), len(niveis_q)))
+    for inicio in range(0, len(codigos_p), LINHAS_POR_BLOCO):
+        faixa = slice(inicio, inicio + LINHAS_POR_BLOCO)
+        x_p = one_hot(codigos_p[faixa], len(niveis_p))
+        x_q = one_hot(codigos_q[faixa], len(niveis_q))
+        bloco += (x_p.T @ x_q).toarray()
+    return bloco
+
+
+@lru_cache(maxsize=32)
+def _bloco_alvo(caminho, versao, robusto, p, alvo):
+    """Contagens por nível (Xₚᵀ1) e somas do alvo por nível (Xₚᵀy)."""
+    codigos, niveis = _codigos(caminho, versao, robusto, p, alvo)
+    y = _alvo(caminho, versao, robusto, alvo)
+    contagens = np.zeros(len(niveis))
+    somas = np.zeros(len(niveis))
+    for inicio in range(0, len(codigos), LINHAS_POR_BLOCO):
+        faixa = slice(inicio, inicio + LINHAS_POR_BLOCO)
+        x_p = one_hot(codigos[faixa], len(niveis))
+        contagens += np.asarray(x_p.sum(axis=0)).ravel()
+        somas += x_p.T @ y[faixa]
+    return contagens, somas
+
+
+def _colunas_mantidas(contagens):
+    """Remove níveis sem observações e o nível de referência (o mais frequente)."""
+    mantidas = contagens > 0
+    mantidas[np.argmax(contagens)] = False
+    return np.flatnonzero(mantidas)
+
+
+def ajustar_sistema(gram, xty, yty, n):
+    """Resolve as equações normais e calcula erros padrão a partir de XᵀX, Xᵀy e yᵀy."""
+    inversa = np.linalg.pinv(gram, hermitian=True)
+    beta = inversa @ xty
+    posto = np.linalg.matrix_rank(gram, hermitian=True)
+    soma_residuos = max(yty - beta @ xty, 0.0)
+    graus_liberdade = n - posto
+    sigma2 = soma_residuos / graus_liberdade
+    erros = np.sqrt(np.clip(np.diag(inversa), 0, None) * sigma2)
+    soma_total = yty - xty[0] ** 2 / n
+    return beta, erros, soma_residuos, soma_total, posto, graus_liberdade
+
+
+@lru_cache(maxsize=32)
+def _ajustar(caminho, versao, robusto, preditores, alvo, confianca):
+    y = _alvo(caminho, versao, robusto, alvo)
+    codigos = {p: _codigos(caminho, versao, robusto, p, alvo) for p in preditores}
+
+    # Monta XᵀX e Xᵀy com todos os níveis a partir dos blocos em cache (a primeira coluna é o intercepto)
+    linhas_gram = [[np.array([[float(len(y))]])] + [_bloco_alvo(caminho, versao, robusto, q, alvo)[0][None, :] for q in preditores]]
+    xty = [np.array([y.sum()])]
+    for p in preditores:
+        contagens, somas = _bloco_alvo(caminho, versao, robusto, p, alvo)
+        linhas_gram.append([contagens[:, None]] + [_bloco_cruzado(caminho, versao, robusto, p, q, alvo) for q in preditores])
+        xty.append(somas)
+    gram = np.block(linhas_gram)
+    xty = np.concatenate(xty)
+    yty = y @ y
+
+    # Linhas com algum preditor ausente: a sua parte é retirada de XᵀX, Xᵀy e yᵀy
+    completas = np.ones(len(y), dtype=bool)
+    for p in preditores:
+        completas &= codigos[p][0] >= 0
+    excluidas = np.flatnonzero(~completas)
+    if len(excluidas):
+        x_excluidas = sparse.hstack(
+            [sparse.csr_matrix(np.ones((len(excluidas), 1)))]
+            + [one_hot(codigos[p][0][excluidas], len(codigos[p][1])) for p in preditores],
+            format="csr",
+        )
+        gram -= (x_excluidas.T @ x_excluidas).toarray()
+        xty -= x_excluidas.T @ y[excluidas]
+        yty -= y[excluidas] @ y[excluidas]
+    n = len(y) - len(excluidas)
+
+    # Mantém o intercepto e, de cada preditor, os níveis observados menos o de referência
+    termos = ["Intercepto"]
+    posicoes = [0]
+    inicio = 1
+    for p in preditores:
+        niveis = codigos[p][1]
+        mantidas = _colunas_mantidas(gram[0, inicio : inicio + len(niveis)])
+        termos += [f"{p}={nivel}" for nivel in niveis[mantidas]]
+        posicoes += list(inicio + mantidas)
+        inicio += len(niveis)
+    gram = gram[np.ix_(posicoes, posicoes)]
+    xty = xty[posicoes]
+
+    beta, erros, soma_residuos, soma_total, posto, graus_liberdade = ajustar_sistema(gram, xty, yty, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = beta / erros
+    t_critico = stats.t.ppf(1 - (1 - confianca / 100) / 2, graus_liberdade)
+    coeficientes = pd.DataFrame(
+        {
+            "coeficiente": beta,
+            "erro_padrao": erros,
+            "t": t,
+            "p": 2 * stats.t.sf(np.abs(t), graus_liberdade),
+            "lim_inf": beta - t_critico * erros,
+            "lim_sup": beta + t_critico * erros,
+        },
+        index=pd.Index(termos, name="termo"),
+    )
+    r2 = 1 - soma_residuos / soma_total
+    r2_ajustado = 1 - (1 - r2) * (n - 1) / graus_liberdade
+    return Ajuste(
+        coeficientes, r2, r2_ajustado, n, graus_liberdade, np.sqrt(soma_residuos / graus_liberdade), len(excluidas)
+    )
+
+
+def ajustar(preditores, alvo=ALVO, confianca=95, caminho=CAMINHO_DATASET, robusto=None):
+    """Ajusta ``alvo`` ~ preditores categóricos (codificação one-hot com nível de referência).
+
+    O nível mais frequente de cada preditor é a referência. Linhas com algum
+    dos ``preditores`` ausente não entram no ajuste. Retorna um ``Ajuste`` com
+    a tabela de coeficientes (erro padrão, t, p e intervalo de ``confianca``%),
+    R², R² ajustado, graus de liberdade e o número de linhas excluídas.
+    """
+    caminho = str(caminho)
+    return _ajustar(caminho, assinatura(caminho), robusto, tuple(preditores), alvo, confianca)
+
+
+@lru_cache(maxsize=8)
+def _regressao_simples(caminho, versao, robusto, x, y):
+    df = carregar_dataset(caminho, colunas=[x, y], robusto=robusto)
+    acumulado = CoMomentos()
+    acumulado.atualizar(df[x].to_numpy(dtype="float64"), df[y].to_numpy(dtype="float64"))
+    return acumulado
+
+
+def regressao_simples(x="salary", y=ALVO, caminho=CAMINHO_DATASET, robusto=None):
+    """Co-momentos de (x, y), com correlação de Pearson e reta de MQO em forma fechada.
+
+    Vêm do artefato pré-calculado quando disponível, da leitura em blocos no
+    modo streaming ou do dataset em memória. Com uma receita ``robusto``, sempre
+    do dataset em memória sem as linhas discrepantes.
+    """
+    from analise.artefato import carregar_artefato
+
+    caminho = str(caminho)
+    if robusto is not None:
+        return _regressao_simples(caminho, assinatura(caminho), robusto, x, y)
+    artefato = carregar_artefato(caminho)
+    if artefato is not None and (x, y) == ("salary", ALVO):
+        return artefato.regressao()
+    if modo_streaming():
+        return regressao_em_blocos(x, y, caminho)
+    return _regressao_simples(caminho, assinatura(caminho), None, x, y)
@@ -0,0 +1,168 @@
+"""Detecção de salários discrepantes e versão robusta do dataset.
+
+Três métodos, todos calculados por grupo (``experience_level`` por padrão)
+em uma única passada agrupada:
+
+- ``iqr``: fora de ``[Q1 - k·IQR, Q3 + k·IQR]``;
+- ``mad``: ``|x - mediana| > k · 1,4826 · MAD``;
+- ``zscore``: ``|x - média| > k · desvio padrão``.
+
+As máscaras ficam em cache como bitmaps (``np.packbits``, um bit por linha)
+indexados por dataset, método, limite e grupo. As páginas passam às funções
+de análise uma ``receita`` ``(metodo, limite, grupo)`` no parâmetro
+``robusto``: ``carregar_dataset`` aplica o bitmap ao dataset em memória, sem
+gravar cópias, e cada coluna filtrada fica em cache uma única vez por versão
+do dataset e receita. Intervalos, testes e regressões robustos ficam em cache
+pelas mesmas chaves.
+
+O numpy e o pandas só são importados quando uma máscara é calculada: as
+páginas chamam ``seletor`` antes de qualquer análise.
+"""
+
+import threading
+from functools import lru_cache
+
+from analise.dados import CAMINHO_DATASET, DIMENSOES, NOMES_DIMENSOES, assinatura, carregar_dataset, modo_streaming
+
+METODOS = {
+    "iqr": "Intervalo interquartil (IQR)",
+    "mad": "Desvio absoluto mediano (MAD)",
+    "zscore": "Escore z",
+}
+LIMITES_PADRAO = {"iqr": 1.5, "mad": 3.5, "zscore": 3.0}
+GRUPO_PADRAO = "experience_level"
+# Converte o MAD em estimativa do desvio padrão sob normalidade
+ESCALA_MAD = 1.4826
+
+# Filtragem de colunas novas, uma por vez no processo
+_TRAVA_FILTRO = threading.Lock()
+
+
+def receita(metodo="iqr", limite=None, grupo=GRUPO_PADRAO):
+    """Receita ``(metodo, limite, grupo)`` aceita pelo parâmetro ``robusto`` das análises.
+
+    Normalizada (limite em ``float``) para que receitas iguais compartilhem os caches.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconhecido: {metodo}")
+    return metodo, LIMITES_PADRAO[metodo] if limite is None else float(limite), grupo
+
+
+def discrepantes(valores, codigos, metodo="iqr", limite=None):
+    """Máscara das linhas discrepantes em relação ao seu grupo (``codigos`` de 0 a k-1).
+
+    Valores ausentes nunca são marcados.
+    """
+    import pandas as pd
+
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconhecido: {metodo}")
+    limite = LIMITES_PADRAO[metodo] if limite is None else limite
+    x = pd.Series(valores, dtype="float64")
+    grupos = x.groupby(codigos, sort=True)
+
+    if metodo == "iqr":
+        q1 = grupos.quantile(0.25).to_numpy()[codigos]
+        q3 = grupos.quantile(0.75).to_numpy()[codigos]
+        amplitude = limite * (q3 - q1)
+        return ((x < q1 - amplitude) | (x > q3 + amplitude)).to_numpy()
+    if metodo == "mad":
+        mediana = grupos.median().to_numpy()[codigos]
+        desvio = (x - mediana).abs()
+        mad = desvio.groupby(codigos, sort=True).median().to_numpy()[codigos]
+        return (desvio > limite * ESCALA_MAD * mad).to_numpy()
+    media = grupos.mean().to_numpy()[codigos]
+    desvio_padrao = grupos.std().to_numpy()[codigos]
+    return ((x - media).abs() > limite * desvio_padrao).to_numpy()
+
+
+@lru_cache(maxsize=16)
+def _bitmap(caminho, versao, metodo, limite, grupo):
+    import numpy as np
+    import pandas as pd
+
+    from analise.intervalos import VALOR
+
+    colunas = [VALOR] if grupo is None else [grupo, VALOR]
+    df = carregar_dataset(caminho, colunas=colunas)
+    if grupo is None:
+        codigos = np.zeros(len(df), dtype="int64")
+    else:
+        codigos, _ = pd.factorize(df[grupo], use_na_sentinel=False)
+    return np.packbits(discrepantes(df[VALOR].to_numpy(dtype="float64"), codigos, metodo, limite)), len(df)
+
+
+def mascara(metodo="iqr", limite=None, grupo=GRUPO_PADRAO, caminho=CAMINHO_DATASET):
+    """Linhas discrepantes do dataset (booleano por linha), a partir do bitmap em cache."""
+    import numpy as np
+
+    caminho = str(caminho)
+    limite = LIMITES_PADRAO[metodo] if limite is None else float(limite)
+    bits, n = _bitmap(caminho, assinatura(caminho), metodo, limite, grupo)
+    return np.unpackbits(bits, count=n).astype(bool)
+
+
+@lru_cache(maxsize=4)
+def _colunas_filtradas(caminho, versao, robusto):
+    """Colunas (``pd.Series``) já filtradas de uma versão do dataset e receita, preenchidas sob demanda."""
+    return {}
+
+
+def sem_discrepantes(caminho, colunas, robusto):
+    """Colunas do dataset de ``caminho`` sem as linhas discrepantes segundo a receita ``robusto``."""
+    import pandas as pd
+
+    caminho = str(caminho)
+    versao = assinatura(caminho)
+    filtradas = _colunas_filtradas(caminho, versao, robusto)
+    mudou = False
+    with _TRAVA_FILTRO:
+        faltantes = [c for c in colunas if c not in filtradas]
+        if faltantes:
+            df = carregar_dataset(caminho, colunas=faltantes)
+            removidas = mascara(*robusto, caminho)
+            mudou = len(removidas) != len(df) or assinatura(caminho) != versao
+            if not mudou:
+                filtradas.update({c: df[c][~removidas].reset_index(drop=True) for c in faltantes})
+    if mudou:
+        # O CSV mudou durante a leitura: a máscara e as colunas vêm da nova versão
+        return sem_discrepantes(caminho, colunas, robusto)
+    return pd.DataFrame({c: filtradas[c] for c in colunas}, copy=False)
+
+
+def seletor(caminho=CAMINHO_DATASET):
+    """Controles "Estatística robusta" na barra lateral; retorna a receita para o parâmetro ``robusto``.
+
+    Com a opção desligada (ou no modo streaming) retorna ``None``.
+    """
+    import streamlit as st
+
+    with st.sidebar.expander("🛡️ Estatística robusta"):
+        if modo_streaming():
+            st.caption("A remoção de discrepantes precisa do dataset em memória e não está disponível no modo streaming.")
+            return None
+        ativo = st.toggle("Remover salários discrepantes", key="robusto")
+        metodo = st.selectbox("Método", list(METODOS), format_func=METODOS.get, key="robusto_metodo", disabled=not ativo)
+        limite = st.number_input(
+            "Limite (k)",
+            min_value=0.5,
+            max_value=10.0,
+            value=LIMITES_PADRAO[metodo],
+            step=0.5,
+            key=f"robusto_limite_{metodo}",
+            disabled=not ativo,
+        )
+        grupo = st.selectbox(
+            "Comparar dentro de",
+            [None] + DIMENSOES,
+            index=DIMENSOES.index(GRUPO_PADRAO) + 1,
+            format_func=lambda d: NOMES_DIMENSOES.get(d, "Todo o dataset"),
+            key="robusto_grupo",
+            disabled=not ativo,
+        )
+        if not ativo:
+            return None
+        robusto = receita(metodo, limite, grupo)
+        removidas = int(mascara(*robusto, caminho).sum())
+        st.caption(f"{removidas:,} linhas discrepantes removidas de todas as análises desta página.")
+        return robusto
@@ -0,0 +1,187 @@
+"""Servidor HTTP local (ASGI) com as consultas de ``analise.api`` em JSON.
+
+Todas as requisições compartilham o mesmo processo e, portanto, os caches já
+aquecidos do dataset e das estatísticas. As respostas prontas ficam em um
+cache LRU indexado pela rota, pelos parâmetros e pela versão do dataset, e
+requisições idênticas que chegam enquanto a primeira ainda está sendo
+calculada aguardam o mesmo resultado em vez de refazer o cálculo.
+
+Uso (a partir da pasta ``src``; requer ``uvicorn``)::
+
+    python -m analise.servidor --porta 8502
+    curl 'http://127.0.0.1:8502/intervalos?coluna=experience_level&confianca=90'
+    curl 'http://127.0.0.1:8502/teste-t?coluna=experience_level&grupo_a=MI&grupo_b=SE'
+
+Os parâmetros podem vir na query string (valores em JSON quando possível,
+senão texto) ou como objeto JSON no corpo de um POST.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+from collections import OrderedDict
+from urllib.parse import parse_qsl
+
+from analise import api
+from analise.dados import CAMINHO_DATASET, assinatura
+
+ROTAS = {
+    "/intervalos": api.intervalos,
+    "/quantis": api.quantis,
+    "/teste-t": api.teste_t,
+    "/teste-proporcao": api.teste_proporcao,
+    "/comparacoes": api.comparacoes,
+    "/regressao": api.regressao,
+    "/regressao-simples": api.regressao_simples,
+    "/moedas": api.moedas,
+    "/tendencias": api.tendencias,
+}
+# Parâmetros controlados pelo servidor, não pelo cliente
+PARAMETROS_RESERVADOS = {"caminho"}
+MAX_RESPOSTAS = 256
+
+registro = logging.getLogger(__name__)
+
+
+def _valor(texto):
+    try:
+        return json.loads(texto)
+    except ValueError:
+        return texto
+
+
+def _finitos(valor):
+    """Troca NaN e ±inf (grupos degenerados, como desvio com n=1) por ``None``, que vira ``null``."""
+    if isinstance(valor, float):
+        return valor if math.isfinite(valor) else None
+    if isinstance(valor, dict):
+        return {chave: _finitos(v) for chave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_finitos(v) for v in valor]
+    return valor
+
+
+def _json(valor):
+    return json.dumps(_finitos(valor), ensure_ascii=False, allow_nan=False).encode("utf-8")
+
+
+def _parametros(query_string, corpo):
+    if corpo:
+        parametros = json.loads(corpo)
+        if not isinstance(parametros, dict):
+            raise ValueError("O corpo deve ser um objeto JSON")
+    else:
+        parametros = {chave: _valor(valor) for chave, valor in parse_qsl(query_string.decode("latin-1"))}
+    reservados = PARAMETROS_RESERVADOS & parametros.keys()
+    if reservados:
+        raise ValueError(f"Parâmetros não permitidos: {', '.join(sorted(reservados))}")
+    return parametros
+
+
+class Servidor:
+    """Aplicação ASGI com cache de respostas e coalescência de requisições idênticas."""
+
+    def __init__(self, caminho=CAMINHO_DATASET, max_respostas=MAX_RESPOSTAS):
+        self.caminho = str(caminho)
+        self.max_respostas = max_respostas
+        self._respostas = OrderedDict()
+        self._em_andamento = {}
+
+    async def consultar(self, rota, parametros):
+        """Resposta (bytes JSON) da ``rota``, do cache, de um cálculo em andamento ou calculada agora."""
+        chave = (rota, json.dumps(parametros, sort_keys=True), assinatura(self.caminho))
+        if chave in self._respostas:
+            self._respostas.move_to_end(chave)
+            return self._respostas[chave]
+        if chave in self._em_andamento:
+            return await asyncio.shield(self._em_andamento[chave])
+
+        funcao = ROTAS[rota]
+        tarefa = asyncio.ensure_future(asyncio.to_thread(lambda: _json(funcao(**parametros, caminho=self.caminho))))
+        self._em_andamento[chave] = tarefa
+        try:
+            resposta = await asyncio.shield(tarefa)
+        finally:
+            self._em_andamento.pop(chave, None)
+        self._respostas[chave] = resposta
+        while len(self._respostas) > self.max_respostas:
+            self._respostas.popitem(last=False)
+        return resposta
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._ciclo_de_vida(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem["type"] == "lifespan.startup":
+                # Aquece os caches do processo antes da primeira requisição; uma falha aqui
+                # (dataset ausente, por exemplo) aparece nas requisições, sem impedir a subida
+                try:
+                    await asyncio.to_thread(api.intervalos, caminho=self.caminho)
+                except Exception:
+                    registro.exception("Falha ao aquecer os caches na inicialização")
+                await send({"type": "lifespan.startup.complete"})
+            elif mensagem["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        corpo = b""
+        while True:
+            mensagem = await receive()
+            corpo += mensagem.get("body", b"")
+            if not mensagem.get("more_body"):
+                break
+
+        rota = scope["path"].rstrip("/") or "/"
+        if rota == "/":
+            status, resposta = 200, _json({"rotas": sorted(ROTAS)})
+        elif rota not in ROTAS:
+            status, resposta = 404, _json({"erro": f"Rota desconhecida: {rota}"})
+        elif scope["method"] not in ("GET", "POST"):
+            status, resposta = 405, _json({"erro": "Use GET ou POST"})
+        else:
+            try:
+                resposta = await self.consultar(rota, _parametros(scope["query_string"], corpo))
+                status = 200
+            except (KeyError, TypeError, ValueError) as erro:
+                mensagem = erro.args[0] if isinstance(erro, KeyError) and erro.args else str(erro)
+                status, resposta = 400, _json({"erro": mensagem})
+            except Exception as erro:
+                registro.exception("Erro ao responder %s", rota)
+                status, resposta = 500, _json({"erro": f"Erro interno: {type(erro).__name__}"})
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json; charset=utf-8")],
+            }
+        )
+        await send({"type": "http.response.body", "body": resposta})
+
+
+app = Servidor()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve os intervalos e testes do dashboard em JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: apenas local)")
+    parser.add_argument("--porta", type=int, default=8502, help="porta HTTP")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        parser.error("o servidor requer o pacote uvicorn (pip install uvicorn)")
+    uvicorn.run(app, host=args.host, port=args.porta, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
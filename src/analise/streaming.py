@@ -0,0 +1,181 @@
+"""Estatísticas calculadas lendo o CSV em blocos, com memória limitada.
+
+Cada bloco é resumido e combinado ao acumulado com as fórmulas de Chan
+(generalização do algoritmo de Welford), que são numericamente estáveis e
+não dependem do tamanho total do arquivo.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from analise.dados import CAMINHO_DATASET, TIPOS_COLUNAS, assinatura
+
+TAMANHO_BLOCO = 250_000
+
+
+def ler_em_blocos(colunas, caminho=CAMINHO_DATASET, tamanho_bloco=TAMANHO_BLOCO):
+    """Itera sobre o CSV em DataFrames de até ``tamanho_bloco`` linhas."""
+    tipos = {c: t for c, t in TIPOS_COLUNAS.items() if c in colunas}
+    return pd.read_csv(caminho, usecols=list(colunas), dtype=tipos, chunksize=tamanho_bloco)
+
+
+class MomentosPorGrupo:
+    """Contagem, média e soma dos desvios quadráticos (M2) por grupo."""
+
+    def __init__(self):
+        self.tabela = pd.DataFrame(columns=["n", "media", "m2", "linhas"], dtype="float64")
+
+    def atualizar(self, valores, chaves):
+        """Resume um bloco de ``valores`` agrupado por ``chaves`` e o combina ao acumulado."""
+        grupos = valores.astype("float64").groupby(chaves, observed=True, dropna=False)
+        bloco = pd.DataFrame(
+            {
+                "n": grupos.count(),
+                "media": grupos.mean(),
+                "m2": grupos.var(ddof=0) * grupos.count(),
+                "linhas": grupos.size(),
+            }
+        ).fillna({"media": 0.0, "m2": 0.0})
+        self.combinar(bloco)
+
+    def combinar(self, outro):
+        """Combina com outra tabela de momentos (n, media, m2, linhas) pelo método de Chan."""
+        if isinstance(outro, MomentosPorGrupo):
+            outro = outro.tabela
+        indice = self.tabela.index.union(outro.index)
+        a = self.tabela.reindex(indice, fill_value=0.0)
+        b = outro.reindex(indice, fill_value=0.0)
+        n = a["n"] + b["n"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            peso = (b["n"] / n).fillna(0.0)
+            delta = b["media"] - a["media"]
+            self.tabela = pd.DataFrame(
+                {
+                    "n": n,
+                    "media": a["media"] + delta * peso,
+                    "m2": a["m2"] + b["m2"] + delta**2 * a["n"] * peso,
+                    "linhas": a["linhas"] + b["linhas"],
+                },
+                index=indice,
+            )
+
+    def como_somas(self):
+        """Converte para o formato de ``estatisticas_suficientes`` (n, soma, soma_quadrados)."""
+        t = self.tabela
+        return pd.DataFrame(
+            {
+                "n": t["n"].astype("int64"),
+                "soma": t["n"] * t["media"],
+                "soma_quadrados": t["m2"] + t["n"] * t["media"] ** 2,
+                "linhas": t["linhas"].astype("int64"),
+            },
+            index=t.index,
+        )
+
+
+class CoMomentos:
+    """Médias e co-momentos de um par (x, y) para correlação e regressão simples."""
+
+    def __init__(self):
+        self.n = 0.0
+        self.media_x = self.media_y = 0.0
+        self.cxx = self.cyy = self.cxy = 0.0
+        self.minimo_x = np.inf
+        self.maximo_x = -np.inf
+
+    def atualizar(self, x, y):
+        x = np.asarray(x, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        validos = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[validos], y[validos]
+        if len(x) == 0:
+            return
+        outro = CoMomentos()
+        outro.n = float(len(x))
+        outro.media_x, outro.media_y = x.mean(), y.mean()
+        dx, dy = x - outro.media_x, y - outro.media_y
+        outro.cxx, outro.cyy, outro.cxy = dx @ dx, dy @ dy, dx @ dy
+        outro.minimo_x, outro.maximo_x = x.min(), x.max()
+        self.combinar(outro)
+
+    def combinar(self, outro):
+        n = self.n + outro.n
+        if n == 0:
+            return
+        peso = outro.n / n
+        dx = outro.media_x - self.media_x
+        dy = outro.media_y - self.media_y
+        fator = self.n * peso
+        self.cxx += outro.cxx + dx * dx * fator
+        self.cyy += outro.cyy + dy * dy * fator
+        self.cxy += outro.cxy + dx * dy * fator
+        self.media_x += dx * peso
+        self.media_y += dy * peso
+        self.minimo_x = min(self.minimo_x, outro.minimo_x)
+        self.maximo_x = max(self.maximo_x, outro.maximo_x)
+        self.n = n
+
+    @property
+    def correlacao(self):
+        return self.cxy / np.sqrt(self.cxx * self.cyy)
+
+    @property
+    def inclinacao(self):
+        return self.cxy / self.cxx
+
+    @property
+    def intercepto(self):
+        return self.media_y - self.inclinacao * self.media_x
+
+    @property
+    def r2(self):
+        return self.correlacao**2
+
+
+def momentos_em_blocos(coluna=None, valor="salary_in_usd", caminho=CAMINHO_DATASET, tamanho_bloco=TAMANHO_BLOCO):
+    """Momentos de ``valor`` por grupo em uma passada pelo CSV."""
+    if coluna is None:
+        grupo = []
+    elif isinstance(coluna, str):
+        grupo = [coluna]
+    else:
+        grupo = list(coluna)
+    acumulado = MomentosPorGrupo()
+    for bloco in ler_em_blocos(grupo + [valor], caminho, tamanho_bloco):
+        if grupo:
+            chaves = [bloco[c] for c in grupo] if len(grupo) > 1 else bloco[grupo[0]]
+        else:
+            chaves = pd.Series("Todos", index=bloco.index)
+        acumulado.atualizar(bloco[valor], chaves)
+    if len(grupo) > 1:
+        acumulado.tabela.index = pd.MultiIndex.from_tuples(acumulado.tabela.index, names=grupo)
+    else:
+        acumulado.tabela.index.name = coluna
+    return acumulado
+
+
+@lru_cache(maxsize=32)
+def _estatisticas_grupo_em_blocos(caminho, versao, coluna, valor, tamanho_bloco):
+    return momentos_em_blocos(coluna, valor, caminho, tamanho_bloco).como_somas()
+
+
+def estatisticas_grupo_em_blocos(coluna=None, valor="salary_in_usd", caminho=CAMINHO_DATASET, tamanho_bloco=TAMANHO_BLOCO):
+    """Equivalente em blocos de ``intervalos.estatisticas_grupo``, em cache por versão do arquivo."""
+    caminho = str(caminho)
+    return _estatisticas_grupo_em_blocos(caminho, assinatura(caminho), coluna, valor, tamanho_bloco)
+
+
+@lru_cache(maxsize=8)
+def _regressao_em_blocos(caminho, versao, x, y, tamanho_bloco):
+    acumulado = CoMomentos()
+    for bloco in ler_em_blocos([x, y], caminho, tamanho_bloco):
+        acumulado.atualizar(bloco[x].to_numpy(dtype="float64"), bloco[y].to_numpy(dtype="float64"))
+    return acumulado
+
+
+def regressao_em_blocos(x="salary", y="salary_in_usd", caminho=CAMINHO_DATASET, tamanho_bloco=TAMANHO_BLOCO):
+    """Co-momentos de (x, y) acumulados bloco a bloco, em cache por versão do arquivo."""
+    caminho = str(caminho)
+    return _regressao_em_blocos(caminho, assinatura(caminho), x, y, tamanho_bloco)
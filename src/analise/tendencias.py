@@ -0,0 +1,151 @@
+"""Evolução dos salários ao longo de ``work_year``.
+
+Médias e intervalos t por ano (e por ano x dimensão) saem do cubo de
+estatísticas suficientes, sem reler as linhas. As medianas precisam das
+observações: todos os anos são calculados em uma única passada agrupada,
+em cache pela versão do dataset.
+
+A variação entre anos consecutivos usa o teste t de Welch para as médias e o
+teste de Mann-Whitney (sobre as observações) para as medianas.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from analise.cubo import agregar, cubo, dimensoes_consulta
+from analise.dados import CAMINHO_DATASET, assinatura, carregar_dataset, modo_streaming
+from analise.intervalos import VALOR, intervalos_quantil, intervalos_t, momentos
+from analise.testes import corrigir_pvalores, teste_t_welch
+
+ANO = "work_year"
+
+
+def _colunas(dimensao):
+    return [ANO] if dimensao is None else [ANO, dimensao]
+
+
+@lru_cache(maxsize=16)
+def _estatisticas_anuais(caminho, versao, robusto, streaming, dimensao):
+    tabela = cubo(caminho=caminho, robusto=robusto, dimensoes=dimensoes_consulta(_colunas(dimensao)))
+    return agregar(tabela, _colunas(dimensao))
+
+
+def estatisticas_anuais(dimensao=None, caminho=CAMINHO_DATASET, robusto=None):
+    """Estatísticas suficientes por ano (ou por ano e ``dimensao``), consolidadas do cubo."""
+    caminho = str(caminho)
+    return _estatisticas_anuais(caminho, assinatura(caminho), robusto, modo_streaming(), dimensao)
+
+
+def medias_anuais(dimensao=None, confianca=95, escala=1, caminho=CAMINHO_DATASET, robusto=None):
+    """Média e intervalo t por ano (e grupo de ``dimensao``)."""
+    estatisticas = estatisticas_anuais(dimensao, caminho, robusto)
+    tabela = intervalos_t(estatisticas, confianca, escala)
+    tabela.index = estatisticas.index
+    return tabela
+
+
+@lru_cache(maxsize=32)
+def _medianas_anuais(caminho, versao, robusto, dimensao, confianca, escala):
+    df = carregar_dataset(caminho, colunas=_colunas(dimensao) + [VALOR], robusto=robusto)
+    return intervalos_quantil(df[df[ANO].notna()], _colunas(dimensao), 0.5, confianca, escala=escala)
+
+
+def medianas_anuais(dimensao=None, confianca=95, escala=1, caminho=CAMINHO_DATASET, robusto=None):
+    """Mediana e intervalo livre de distribuição por ano (e grupo de ``dimensao``).
+
+    Todos os anos saem de uma única ordenação por (ano, grupo, valor), em cache
+    pela versão do dataset. Não disponível no modo streaming.
+    """
+    caminho = str(caminho)
+    return _medianas_anuais(caminho, assinatura(caminho), robusto, dimensao, confianca, escala)
+
+
+def _variacoes_medias(dimensao, n_minimo, caminho, robusto):
+    estatisticas = estatisticas_anuais(dimensao, caminho, robusto)
+    estatisticas = estatisticas.reset_index()
+    estatisticas = estatisticas[(estatisticas["n"] >= max(n_minimo, 2)) & estatisticas[ANO].notna()]
+    grupos = [dimensao] if dimensao is not None else []
+    estatisticas = estatisticas.sort_values(grupos + [ANO], kind="stable")
+
+    media, desvio = momentos(estatisticas)
+    atual = estatisticas.assign(media=media, variancia=desvio**2)
+    anterior = atual.groupby(grupos, observed=True).shift(1) if grupos else atual.shift(1)
+    validos = anterior[ANO].notna().to_numpy()
+    atual, anterior = atual[validos], anterior[validos]
+
+    t, p, gl = teste_t_welch(
+        anterior["n"].to_numpy(dtype="float64"),
+        anterior["media"].to_numpy(),
+        anterior["variancia"].to_numpy(),
+        atual["n"].to_numpy(dtype="float64"),
+        atual["media"].to_numpy(),
+        atual["variancia"].to_numpy(),
+    )
+    # Diferença atual - anterior: inverte o sinal da estatística de (anterior - atual)
+    variacao = atual["media"].to_numpy() - anterior["media"].to_numpy()
+    return pd.DataFrame(
+        {
+            **({dimensao: atual[dimensao].to_numpy()} if dimensao is not None else {}),
+            "ano_anterior": anterior[ANO].to_numpy(dtype="int64"),
+            "ano": atual[ANO].to_numpy(dtype="int64"),
+            "media_anterior": anterior["media"].to_numpy(),
+            "media": atual["media"].to_numpy(),
+            "variacao": variacao,
+            "variacao_pct": 100 * variacao / anterior["media"].to_numpy(),
+            "t": -np.asarray(t),
+            "gl": gl,
+            "p": p,
+        }
+    )
+
+
+@lru_cache(maxsize=16)
+def _variacoes_medianas(caminho, versao, robusto, dimensao, n_minimo):
+    df = carregar_dataset(caminho, colunas=_colunas(dimensao) + [VALOR], robusto=robusto)
+    df = df[df[VALOR].notna()]
+    grupos = df.groupby(dimensao, observed=True, dropna=False) if dimensao is not None else [(None, df)]
+
+    linhas = []
+    for grupo, do_grupo in grupos:
+        anos = [(int(ano), fatia[VALOR].to_numpy(dtype="float64")) for ano, fatia in do_grupo.groupby(ANO, sort=True)]
+        anos = [(ano, valores) for ano, valores in anos if len(valores) >= n_minimo]
+        for (ano_anterior, anterior), (ano, atual) in zip(anos, anos[1:]):
+            u, p = stats.mannwhitneyu(atual, anterior, alternative="two-sided")
+            mediana_anterior, mediana = np.median(anterior), np.median(atual)
+            linhas.append(
+                {
+                    **({dimensao: grupo} if dimensao is not None else {}),
+                    "ano_anterior": ano_anterior,
+                    "ano": ano,
+                    "mediana_anterior": mediana_anterior,
+                    "mediana": mediana,
+                    "variacao": mediana - mediana_anterior,
+                    "variacao_pct": 100 * (mediana - mediana_anterior) / mediana_anterior,
+                    "u": u,
+                    "p": p,
+                }
+            )
+    colunas = ["ano_anterior", "ano", "mediana_anterior", "mediana", "variacao", "variacao_pct", "u", "p"]
+    return pd.DataFrame(linhas, columns=([dimensao] if dimensao is not None else []) + colunas)
+
+
+def variacoes_anuais(dimensao=None, correcao="holm", n_minimo=2, estatistica="media", caminho=CAMINHO_DATASET, robusto=None):
+    """Compara cada ano ao ano anterior disponível, por grupo.
+
+    Com ``estatistica="media"`` aplica o teste t de Welch às médias do cubo; com
+    ``"mediana"``, o teste de Mann-Whitney às observações dos dois anos (não
+    disponível no modo streaming). Só entram os anos com ao menos ``n_minimo``
+    observações no grupo. Os p-valores são ajustados (``holm`` ou ``bh``) sobre
+    todas as comparações da tabela.
+    """
+    if estatistica == "media":
+        resultado = _variacoes_medias(dimensao, n_minimo, caminho, robusto)
+    elif estatistica == "mediana":
+        caminho = str(caminho)
+        resultado = _variacoes_medianas(caminho, assinatura(caminho), robusto, dimensao, n_minimo)
+    else:
+        raise ValueError("estatistica deve ser 'media' ou 'mediana'")
+    return resultado.assign(p_ajustado=corrigir_pvalores(resultado["p"], correcao))
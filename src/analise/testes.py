@@ -0,0 +1,201 @@
+"""Testes de hipótese: paramétricos a partir de resumos, de permutação e não paramétricos."""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from analise.dados import CAMINHO_DATASET, assinatura, modo_streaming, valores_grupo
+from analise.intervalos import estatisticas_grupo, momentos
+from analise.paralelo import Processos
+
+# Limite de elementos da matriz de permutações de cada lote (~32 MB em float64)
+ELEMENTOS_POR_LOTE = 4_000_000
+# Cada rodada tem sempre o mesmo número de tarefas, para que o resultado não
+# dependa da quantidade de processos
+TAREFAS_POR_RODADA = 4
+PERMUTACOES_POR_TAREFA = 2_500
+
+
+def teste_t_welch(n1, media1, var1, n2, media2, var2):
+    """Teste t bicaudal de Welch a partir de contagens, médias e variâncias amostrais.
+
+    Equivale a ``stats.ttest_ind(a, b, equal_var=False)``. Retorna (t, p, gl).
+    """
+    se1 = var1 / n1
+    se2 = var2 / n2
+    t = (media1 - media2) / np.sqrt(se1 + se2)
+    gl = (se1 + se2) ** 2 / (se1**2 / (n1 - 1) + se2**2 / (n2 - 1))
+    p = 2 * stats.t.sf(np.abs(t), gl)
+    return t, p, gl
+
+
+def teste_proporcao_z(sucessos, total, p0=0.5):
+    """Teste z unilateral (H₁: p > p0) para uma proporção. Retorna (z, p)."""
+    proporcao = sucessos / total
+    z = (proporcao - p0) / np.sqrt(p0 * (1 - p0) / total)
+    return z, stats.norm.sf(z)
+
+
+def comparacoes_pareadas(estatisticas, n_minimo=2):
+    """Teste t de Welch para todos os pares de grupos em uma única passada vetorizada.
+
+    ``estatisticas`` está no formato de ``estatisticas_suficientes``; grupos com
+    menos de ``n_minimo`` observações são ignorados.
+    """
+    estatisticas = estatisticas[estatisticas["n"] >= max(n_minimo, 2)]
+    n = estatisticas["n"].to_numpy(dtype="float64")
+    media, desvio = momentos(estatisticas)
+    variancia = desvio**2
+    i, j = np.triu_indices(len(n), k=1)
+    t, p, gl = teste_t_welch(n[i], media[i], variancia[i], n[j], media[j], variancia[j])
+    grupos = estatisticas.index.to_numpy()
+    return pd.DataFrame(
+        {
+            "grupo_a": grupos[i],
+            "grupo_b": grupos[j],
+            "n_a": n[i].astype("int64"),
+            "n_b": n[j].astype("int64"),
+            "media_a": media[i],
+            "media_b": media[j],
+            "diferenca": media[i] - media[j],
+            "t": t,
+            "gl": gl,
+            "p": p,
+        }
+    )
+
+
+@lru_cache(maxsize=16)
+def _comparacoes_dimensao(caminho, versao, robusto, streaming, coluna, n_minimo):
+    return comparacoes_pareadas(estatisticas_grupo(coluna, caminho=caminho, robusto=robusto), n_minimo)
+
+
+def comparacoes_dimensao(coluna, n_minimo=2, caminho=CAMINHO_DATASET, robusto=None):
+    """Todos os pares de uma dimensão, a partir das estatísticas suficientes em cache."""
+    caminho = str(caminho)
+    return _comparacoes_dimensao(caminho, assinatura(caminho), robusto, modo_streaming(), coluna, n_minimo)
+
+
+def corrigir_pvalores(p, metodo="holm"):
+    """Ajusta p-valores para comparações múltiplas (``holm`` ou ``bh`` - Benjamini-Hochberg)."""
+    p = np.asarray(p, dtype="float64")
+    m = len(p)
+    if m == 0:
+        return p
+    ordem = np.argsort(p)
+    ordenados = p[ordem]
+    posicoes = np.arange(1, m + 1)
+    if metodo == "holm":
+        ajustados = np.maximum.accumulate((m - posicoes + 1) * ordenados)
+    elif metodo == "bh":
+        ajustados = np.minimum.accumulate((m / posicoes * ordenados)[::-1])[::-1]
+    else:
+        raise ValueError(f"Método de correção desconhecido: {metodo}")
+    resultado = np.empty(m)
+    resultado[ordem] = np.clip(ajustados, 0, 1)
+    return resultado
+
+
+@lru_cache(maxsize=64)
+def teste_binomial_exato(sucessos, total, p0=0.5, alternativa="greater"):
+    """Teste binomial exato para uma proporção. Retorna (proporção, p)."""
+    resultado = stats.binomtest(int(sucessos), int(total), p0, alternative=alternativa)
+    return resultado.statistic, resultado.pvalue
+
+
+def _diferencas(a, b, estatistica):
+    if estatistica == "mediana":
+        return np.median(a, axis=-1) - np.median(b, axis=-1)
+    return a.mean(axis=-1) - b.mean(axis=-1)
+
+
+def _permutar(combinados, n_a, estatistica, permutacoes, semente):
+    """Diferenças da estatística para ``permutacoes`` rótulos embaralhados, em lotes."""
+    rng = np.random.default_rng(semente)
+    n = len(combinados)
+    lote = max(1, ELEMENTOS_POR_LOTE // n)
+    resultado = np.empty(permutacoes)
+    for inicio in range(0, permutacoes, lote):
+        fim = min(inicio + lote, permutacoes)
+        # As n_a menores chaves aleatórias de cada linha formam um subconjunto uniforme
+        indices = np.argpartition(rng.random((fim - inicio, n)), n_a - 1, axis=1)
+        amostras = combinados[indices]
+        if estatistica == "media":
+            soma_a = amostras[:, :n_a].sum(axis=1)
+            total = combinados.sum()
+            resultado[inicio:fim] = soma_a / n_a - (total - soma_a) / (n - n_a)
+        else:
+            resultado[inicio:fim] = _diferencas(amostras[:, :n_a], amostras[:, n_a:], estatistica)
+    return resultado
+
+
+def teste_permutacao(a, b, estatistica="media", max_permutacoes=100_000, precisao=0.002, semente=0, processos=None):
+    """Teste de permutação bicaudal para a diferença de médias (ou medianas).
+
+    As permutações são geradas em rodadas; o teste para assim que o erro padrão
+    do p-valor estimado fica abaixo de ``precisao`` ou ao atingir
+    ``max_permutacoes``. Retorna (diferença observada, p, permutações usadas).
+    """
+    a = np.asarray(a, dtype="float64")
+    b = np.asarray(b, dtype="float64")
+    observado = _diferencas(a, b, estatistica)
+    limite = abs(observado) * (1 - 1e-12)
+    combinados = np.concatenate([a, b])
+    sementes = np.random.SeedSequence(semente)
+
+    extremos = 0
+    realizadas = 0
+    p = 1.0
+    if max_permutacoes <= TAREFAS_POR_RODADA * PERMUTACOES_POR_TAREFA:
+        processos = 1
+    with Processos(combinados, processos, TAREFAS_POR_RODADA) as pool:
+        while realizadas < max_permutacoes:
+            restantes = max_permutacoes - realizadas
+            tamanhos = [min(PERMUTACOES_POR_TAREFA, max(restantes - i * PERMUTACOES_POR_TAREFA, 0)) for i in range(TAREFAS_POR_RODADA)]
+            tarefas = [(len(a), estatistica, t, s) for t, s in zip(tamanhos, sementes.spawn(TAREFAS_POR_RODADA)) if t > 0]
+            for diferencas in pool.mapear(_permutar, tarefas):
+                extremos += int(np.sum(np.abs(diferencas) >= limite))
+                realizadas += len(diferencas)
+            p = (extremos + 1) / (realizadas + 1)
+            if np.sqrt(p * (1 - p) / realizadas) <= precisao:
+                break
+    return observado, p, realizadas
+
+
+@lru_cache(maxsize=32)
+def _permutacao_grupos(caminho, versao, robusto, coluna, grupo_a, grupo_b, estatistica, max_permutacoes, precisao, semente):
+    a = valores_grupo(coluna, grupo_a, caminho=caminho, robusto=robusto)
+    b = valores_grupo(coluna, grupo_b, caminho=caminho, robusto=robusto)
+    return teste_permutacao(a, b, estatistica, max_permutacoes, precisao, semente)
+
+
+def teste_permutacao_grupos(coluna, grupo_a, grupo_b, estatistica="media", max_permutacoes=100_000, precisao=0.002, semente=0, caminho=CAMINHO_DATASET, robusto=None):
+    """Teste de permutação entre dois grupos do dataset, em cache por conjunto de parâmetros."""
+    caminho = str(caminho)
+    return _permutacao_grupos(caminho, assinatura(caminho), robusto, coluna, grupo_a, grupo_b, estatistica, max_permutacoes, precisao, semente)
+
+
+@lru_cache(maxsize=16)
+def _testes_nao_parametricos(caminho, versao, robusto, coluna, grupos):
+    amostras = [valores_grupo(coluna, g, caminho=caminho, robusto=robusto) for g in grupos]
+    h, p_kruskal = stats.kruskal(*amostras)
+
+    pares = []
+    for i in range(len(grupos)):
+        for j in range(i + 1, len(grupos)):
+            u, p = stats.mannwhitneyu(amostras[i], amostras[j], alternative="two-sided")
+            pares.append({"grupo_a": grupos[i], "grupo_b": grupos[j], "u": u, "p": p})
+    return h, p_kruskal, pd.DataFrame(pares)
+
+
+def testes_nao_parametricos(coluna, grupos, correcao="holm", caminho=CAMINHO_DATASET, robusto=None):
+    """Kruskal-Wallis entre ``grupos`` e Mann-Whitney para cada par.
+
+    Retorna (H, p do Kruskal-Wallis, tabela de pares), com os p-valores dos pares
+    ajustados por ``correcao`` (``holm`` ou ``bh``). Em cache por versão do dataset.
+    """
+    caminho = str(caminho)
+    h, p_kruskal, pares = _testes_nao_parametricos(caminho, assinatura(caminho), robusto, coluna, tuple(grupos))
+    return h, p_kruskal, pares.assign(p_ajustado=corrigir_pvalores(pares["p"], correcao))
@@ -0,0 +1,203 @@
+"""Validação cruzada k-fold repetida para comparar regressores do salário.
+
+As dobras rodam em um pool de processos e cada resultado é gravado em disco,
+indexado pelo hash do dataset, pela receita robusta (se houver) e pela
+configuração do modelo e da dobra.
+Execuções seguintes (ou reruns da página) leem as dobras já calculadas.
+``validar_em_segundo_plano`` roda a validação em uma thread, compartilhada por
+todas as sessões que pedem a mesma configuração, para que a página não fique
+bloqueada enquanto as dobras são calculadas.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from analise.dados import CAMINHO_DATASET, carregar_dataset, hash_dataset
+from analise.paralelo import Processos
+from analise.regressao import ALVO, ajustar_sistema, one_hot
+
+MODELOS = {
+    "ols": "MQO",
+    "log_ols": "MQO em log(salário)",
+    "huber": "Huber",
+    "quantil": "Regressão quantílica (mediana)",
+}
+
+DIRETORIO_CACHE = CAMINHO_DATASET.parent / ".cache" / "validacao"
+# Execuções concluídas mantidas em memória para as sessões que as pediram
+MAX_EXECUCOES = 16
+
+_EXECUCOES = OrderedDict()
+_TRAVA = threading.Lock()
+
+
+def _desenho(codigos, niveis, linhas):
+    """Matriz esparsa [1 | one-hot de cada preditor] para as ``linhas`` escolhidas."""
+    blocos = [sparse.csr_matrix(np.ones((len(linhas), 1)))]
+    blocos += [one_hot(c[linhas], k) for c, k in zip(codigos, niveis)]
+    return sparse.hstack(blocos, format="csr")
+
+
+def _mqo(x, y):
+    gram = (x.T @ x).toarray()
+    xty = x.T @ y
+    return ajustar_sistema(gram, xty, y @ y, len(y))[0]
+
+
+def _ajustar_prever(modelo, x_treino, y_treino, x_teste):
+    if modelo == "ols":
+        return x_teste @ _mqo(x_treino, y_treino)
+    if modelo == "log_ols":
+        beta = _mqo(x_treino, np.log(y_treino))
+        # Fator de smearing de Duan para voltar à escala original sem viés
+        fator = np.mean(np.exp(np.log(y_treino) - x_treino @ beta))
+        return np.exp(x_teste @ beta) * fator
+    if modelo == "huber":
+        from sklearn.linear_model import HuberRegressor
+
+        # A escala do alvo é normalizada para a convergência do otimizador
+        escala = np.median(y_treino)
+        regressor = HuberRegressor(fit_intercept=False, max_iter=500).fit(x_treino, y_treino / escala)
+        return regressor.predict(x_teste) * escala
+    if modelo == "quantil":
+        from sklearn.linear_model import QuantileRegressor
+
+        regressor = QuantileRegressor(quantile=0.5, alpha=0.0, fit_intercept=False, solver="highs")
+        return regressor.fit(x_treino, y_treino).predict(x_teste)
+    raise ValueError(f"Modelo desconhecido: {modelo}")
+
+
+def _avaliar_dobra(dados, modelo, k, repeticao, dobra, semente):
+    """Ajusta ``modelo`` fora da dobra e mede o erro nela (em USD)."""
+    codigos, niveis, y = dados
+    rng = np.random.default_rng([semente, repeticao])
+    teste = np.sort(np.array_split(rng.permutation(len(y)), k)[dobra])
+    treino = np.setdiff1d(np.arange(len(y)), teste, assume_unique=True)
+
+    previsto = _ajustar_prever(
+        modelo,
+        _desenho(codigos, niveis, treino),
+        y[treino],
+        _desenho(codigos, niveis, teste),
+    )
+    erro = y[teste] - previsto
+    soma_total = np.sum((y[teste] - y[teste].mean()) ** 2)
+    return {
+        "modelo": modelo,
+        "repeticao": repeticao,
+        "dobra": dobra,
+        "rmse": float(np.sqrt(np.mean(erro**2))),
+        "mae": float(np.mean(np.abs(erro))),
+        "r2": float(1 - np.sum(erro**2) / soma_total),
+    }
+
+
+def _dados_modelo(preditores, caminho, robusto=None):
+    df = carregar_dataset(caminho, colunas=list(preditores) + [ALVO], robusto=robusto)
+    # Linhas com o alvo ou algum preditor ausente ficam fora, como em ``regressao.ajustar``
+    df = df.dropna(subset=list(preditores) + [ALVO])
+    categorias = [df[p].astype("category") for p in preditores]
+    codigos = [c.cat.codes.to_numpy() for c in categorias]
+    niveis = [len(c.cat.categories) for c in categorias]
+    return codigos, niveis, df[ALVO].to_numpy(dtype="float64")
+
+
+def _arquivo_cache(hash_dados, configuracao):
+    chave = hashlib.sha256(json.dumps(configuracao, sort_keys=True).encode()).hexdigest()[:24]
+    return DIRETORIO_CACHE / f"{hash_dados[:16]}-{chave}.json"
+
+
+def validar(modelos, preditores, k=5, repeticoes=1, semente=0, processos=None, caminho=CAMINHO_DATASET, robusto=None):
+    """Executa a validação cruzada e gera o resultado de cada dobra assim que fica pronto.
+
+    Dobras já presentes no cache em disco são retornadas primeiro, sem recalcular.
+    """
+    hash_dados = hash_dataset(caminho)
+    pendentes = []
+    for modelo in modelos:
+        for repeticao in range(repeticoes):
+            for dobra in range(k):
+                configuracao = {
+                    "modelo": modelo,
+                    "preditores": list(preditores),
+                    "k": k,
+                    "repeticao": repeticao,
+                    "dobra": dobra,
+                    "semente": semente,
+                    "robusto": list(robusto) if robusto is not None else None,
+                }
+                arquivo = _arquivo_cache(hash_dados, configuracao)
+                if arquivo.exists():
+                    yield json.loads(arquivo.read_text())
+                else:
+                    pendentes.append((arquivo, (modelo, k, repeticao, dobra, semente)))
+    if not pendentes:
+        return
+
+    DIRETORIO_CACHE.mkdir(parents=True, exist_ok=True)
+    dados = _dados_modelo(preditores, str(caminho), robusto)
+    with Processos(dados, processos, len(pendentes)) as pool:
+        for indice, resultado in pool.conforme_concluir(_avaliar_dobra, [t for _, t in pendentes]):
+            # Gravação atômica: outra sessão nunca lê uma dobra pela metade
+            arquivo = pendentes[indice][0]
+            temporario = arquivo.with_name(f".{arquivo.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            temporario.write_text(json.dumps(resultado))
+            os.replace(temporario, arquivo)
+            yield resultado
+
+
+class Execucao:
+    """Validação cruzada rodando em uma thread; ``parciais`` retorna as dobras já concluídas."""
+
+    def __init__(self, total):
+        self.total = total
+        self.erro = None
+        self.concluida = False
+        self._resultados = []
+        self._trava = threading.Lock()
+
+    def parciais(self):
+        with self._trava:
+            return list(self._resultados)
+
+    def _executar(self, *args, **kwargs):
+        try:
+            for resultado in validar(*args, **kwargs):
+                with self._trava:
+                    self._resultados.append(resultado)
+        except Exception as erro:
+            self.erro = erro
+        finally:
+            self.concluida = True
+
+
+def validar_em_segundo_plano(modelos, preditores, k=5, repeticoes=1, semente=0, processos=None, caminho=CAMINHO_DATASET, robusto=None):
+    """Inicia a validação em uma thread, ou reaproveita a que já roda com a mesma configuração, e a retorna.
+
+    A configuração inclui o hash do dataset: dados novos iniciam outra execução.
+    Uma execução que falhou é reiniciada no próximo pedido.
+    """
+    caminho = str(caminho)
+    chave = (tuple(modelos), tuple(preditores), k, repeticoes, semente, robusto, hash_dataset(caminho))
+    with _TRAVA:
+        execucao = _EXECUCOES.get(chave)
+        if execucao is None or execucao.erro is not None:
+            execucao = Execucao(len(modelos) * k * repeticoes)
+            _EXECUCOES[chave] = execucao
+            threading.Thread(
+                target=execucao._executar,
+                args=(list(modelos), list(preditores), k, repeticoes, semente, processos, caminho, robusto),
+                name="validacao",
+                daemon=True,
+            ).start()
+        _EXECUCOES.move_to_end(chave)
+        concluidas = [c for c, e in _EXECUCOES.items() if e.concluida]
+        for antiga in concluidas[: max(0, len(_EXECUCOES) - MAX_EXECUCOES)]:
+            del _EXECUCOES[antiga]
+    return execucao
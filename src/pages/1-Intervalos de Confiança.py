@@ -1,17 +1,32 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
-from scipy import stats
+
+from analise.aquecimento import aquecer
+from analise.bootstrap import intervalo_bootstrap
+from analise.dados import modo_streaming
+from analise.graficos import Serie, figura_distribuicao
+from analise.instrumentacao import etapa, iniciar, painel
+from analise.intervalos import estatisticas_grupo, intervalos_t, momentos
+from analise.robustez import seletor
 
 st.set_page_config(page_title="Intervalo de Confiança", layout="wide")
+iniciar("Intervalos de Confiança")
+aquecer()
+
+# No modo streaming as linhas não ficam em memória e os histogramas são omitidos
+streaming = modo_streaming()
+robusto = seletor()
 
-df = pd.read_csv("src/dataset.csv")
+# Estatísticas suficientes em cache: os sliders só recalculam os valores críticos
+with etapa("estatisticas_grupo"):
+    estat_geral = estatisticas_grupo(robusto=robusto)
+    estat_nivel = estatisticas_grupo("experience_level", robusto=robusto)
+    estat_remoto = estatisticas_grupo("remote_ratio", robusto=robusto)
 
-media_salarial = df['salary_in_usd'].mean()
-desvio_padrao = df['salary_in_usd'].std()
+medias, desvios = momentos(estat_geral)
+media_salarial = medias[0]
+desvio_padrao = desvios[0]
+n_observacoes = int(estat_geral["linhas"].iloc[0])
+n_ausentes = n_observacoes - int(estat_geral["n"].iloc[0])
 
 st.markdown(
     r"""
@@ -26,42 +41,31 @@ st.markdown(
     - Média Salarial Anual: **{media_salarial:.2f}** USD/ano  
     - Média Salarial Mensal: **{media_salarial/12:.2f}** USD/mês
     
-    > _Calculada a partir de **{len(df)} observações** com **{df['salary_in_usd'].isnull().sum()} valores ausentes** na coluna `salary_in_usd`._
+    > _Calculada a partir de **{n_observacoes} observações** com **{n_ausentes} valores ausentes** na coluna `salary_in_usd`._
     """
 ) 
 
+if streaming:
+    st.info("ℹ️ Modo streaming ativo: as estatísticas foram calculadas em blocos e os histogramas não são exibidos.")
+
 st.markdown("### Distribuição Normal")
 
 # 🎯 Histograma geral
 mu = media_salarial
 sigma = desvio_padrao
 
-fig, ax = plt.subplots(figsize=(15, 10))
-sns.histplot(data=df['salary_in_usd']/1000, bins=80, kde=True, stat='probability', ax=ax)
-
-ax.set_xlabel('Salário Anual (K USD)')
-ax.set_ylabel('Probabilidade')
-ax.set_title('Distribuição Salarial de Profissionais em AI/ML/DS')
-ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f'{int(x)}K'))
-
-st.pyplot(fig)
+# Histogramas e KDEs pré-calculados por grupo; as imagens ficam em cache por nível de confiança
+if not streaming:
+    with etapa("figura_geral"):
+        st.image(figura_distribuicao([Serie(cor="tab:blue")], 'Distribuição Salarial de Profissionais em AI/ML/DS', bins=80, robusto=robusto))
 
 # 🔍 Intervalo de Confiança para Júnior
 st.markdown("### Intervalo de Confiança para Profissionais Júnior")
 
-salarios = df[df["experience_level"] == "EN"]['salary_in_usd'].dropna()/1000
-
 conf = st.slider("Escolha o nível de confiança (%)", min_value=80, max_value=99, value=95)
-alpha = 1 - (conf / 100)
 
-n = len(salarios)
-media = np.mean(salarios)
-desvio_amostral = np.std(salarios, ddof=1)
-graus_de_liberdade = n - 1
-t_critico = stats.t.ppf(1 - alpha/2, df=graus_de_liberdade)
-margem_erro = t_critico * (desvio_amostral / np.sqrt(n))
-lim_inf = media - margem_erro
-lim_sup = media + margem_erro
+ic_nivel = intervalos_t(estat_nivel, conf, escala=1000)
+media, lim_inf, lim_sup = ic_nivel.loc["EN", ["media", "lim_inf", "lim_sup"]]
 
 st.markdown(
     r"""
@@ -73,19 +77,13 @@ st.markdown(
     """
 )
 
-fig, ax = plt.subplots(figsize=(15, 10))
-sns.histplot(salarios, bins=40, kde=True, stat="probability", ax=ax)
-ax.axvspan(lim_inf, lim_sup, color='skyblue', alpha=0.15)
-ax.axvline(media, color='blue', linestyle='--', label=f'Média: ${media:,.1f}K')
-ax.axvline(lim_inf, color='skyblue', linestyle=':', linewidth=2, label='Limite Inferior')
-ax.axvline(lim_sup, color='skyblue', linestyle=':', linewidth=2, label='Limite Superior')
-
-ax.set_xlabel("Salário Anual (K USD)")
-ax.set_ylabel("Probabilidade")
-ax.set_title(f"Distribuição Salarial com Intervalo de Confiança ({conf}%) - Junior")
-ax.legend()
-
-st.pyplot(fig)
+if not streaming:
+    with etapa("figura_junior"):
+        st.image(figura_distribuicao(
+            [Serie("experience_level", "EN", "tab:blue", None, media, lim_inf, lim_sup)],
+            f"Distribuição Salarial com Intervalo de Confiança ({conf}%) - Junior",
+            robusto=robusto,
+        ))
 
 st.markdown(
     f"""
@@ -98,29 +96,10 @@ st.markdown(
 st.markdown("### Comparando Intervalos de Confiança: Pleno vs Sênior")
 
 conf_2 = st.slider("Escolha o nível de confiança (%)", min_value=80, max_value=99, value=95, key="conf_2")
-alpha_2 = 1 - (conf_2 / 100)
-
-# Separando os dados
-salarios_pleno = df[df['experience_level'] == 'MI']['salary_in_usd'].dropna()/1000
-salarios_senior = df[df['experience_level'] == 'SE']['salary_in_usd'].dropna()/1000
-
-# Pleno
-n_pleno = len(salarios_pleno)
-media_pleno = np.mean(salarios_pleno)
-std_pleno = np.std(salarios_pleno, ddof=1)
-t_pleno = stats.t.ppf(1 - alpha_2/2, df=n_pleno-1)
-erro_pleno = t_pleno * (std_pleno / np.sqrt(n_pleno))
-lim_inf_pleno = media_pleno - erro_pleno
-lim_sup_pleno = media_pleno + erro_pleno
-
-# Sênior
-n_senior = len(salarios_senior)
-media_senior = np.mean(salarios_senior)
-std_senior = np.std(salarios_senior, ddof=1)
-t_senior = stats.t.ppf(1 - alpha_2/2, df=n_senior-1)
-erro_senior = t_senior * (std_senior / np.sqrt(n_senior))
-lim_inf_senior = media_senior - erro_senior
-lim_sup_senior = media_senior + erro_senior
+
+ic_nivel_2 = intervalos_t(estat_nivel, conf_2, escala=1000)
+media_pleno, lim_inf_pleno, lim_sup_pleno = ic_nivel_2.loc["MI", ["media", "lim_inf", "lim_sup"]]
+media_senior, lim_inf_senior, lim_sup_senior = ic_nivel_2.loc["SE", ["media", "lim_inf", "lim_sup"]]
 
 st.markdown(
     r"""
@@ -134,30 +113,16 @@ st.markdown(
     """
 )
 
-# Plot conjunto
-fig2, ax2 = plt.subplots(figsize=(15, 10))
-
-sns.histplot(salarios_pleno, bins=40, kde=True, stat="probability", ax=ax2, color='orange', label='Pleno')
-sns.histplot(salarios_senior, bins=40, kde=True, stat="probability", ax=ax2, color='blue', label='Sênior')
-
-# Pleno - intervalo
-ax2.axvspan(lim_inf_pleno, lim_sup_pleno, color='orange', alpha=0.15)
-ax2.axvline(media_pleno, color='orange', linestyle='--', label=f'Média Pleno: ${media_pleno:,.1f}K')
-ax2.axvline(lim_inf_pleno, color='orange', linestyle=':', linewidth=2, label='Limite Inferior Pleno')
-ax2.axvline(lim_sup_pleno, color='orange', linestyle=':', linewidth=2, label='Limite Superior Pleno')
-
-# Sênior - intervalo
-ax2.axvspan(lim_inf_senior, lim_sup_senior, color='blue', alpha=0.15)
-ax2.axvline(media_senior, color='blue', linestyle='--', label=f'Média Sênior: ${media_senior:,.1f}K')
-ax2.axvline(lim_inf_senior, color='blue', linestyle=':', linewidth=2, label='Limite Inferior Sênior')
-ax2.axvline(lim_sup_senior, color='blue', linestyle=':', linewidth=2, label='Limite Superior Sênior')
-
-ax2.set_xlabel("Salário Anual (K USD)")
-ax2.set_ylabel("Probabilidade")
-ax2.set_title(f"Comparação de Intervalos de Confiança ({conf_2}%) - Pleno vs Sênior")
-ax2.legend()
-
-st.pyplot(fig2)
+if not streaming:
+    with etapa("figura_pleno_senior"):
+        st.image(figura_distribuicao(
+            [
+                Serie("experience_level", "MI", "orange", "Pleno", media_pleno, lim_inf_pleno, lim_sup_pleno, " Pleno"),
+                Serie("experience_level", "SE", "blue", "Sênior", media_senior, lim_inf_senior, lim_sup_senior, " Sênior"),
+            ],
+            f"Comparação de Intervalos de Confiança ({conf_2}%) - Pleno vs Sênior",
+            robusto=robusto,
+        ))
 
 st.markdown(
     f"""
@@ -182,74 +147,23 @@ st.markdown(
 st.markdown("### Comparando Intervalos de Confiança: Remoto vs Presencial vs Híbrido")
 
 conf_3 = st.slider("Escolha o nível de confiança (%)", min_value=80, max_value=99, value=95, key="conf_3")
-alpha_3 = 1 - (conf_3 / 100)
-
-# Separando os dados
-salarios_remoto = df[df['remote_ratio'] == 100]['salary_in_usd'].dropna()/1000
-salarios_presencial = df[df['remote_ratio'] == 0]['salary_in_usd'].dropna()/1000
-salarios_hibrido = df[df['remote_ratio'] == 50]['salary_in_usd'].dropna()/1000
-
-# Remoto
-n_remoto = len(salarios_remoto)
-media_remoto = np.mean(salarios_remoto)
-std_remoto = np.std(salarios_remoto, ddof=1)
-t_remoto = stats.t.ppf(1 - alpha_3/2, df=n_remoto-1)
-erro_remoto = t_remoto * (std_remoto / np.sqrt(n_remoto))
-lim_inf_remoto = media_remoto - erro_remoto
-lim_sup_remoto = media_remoto + erro_remoto
-
-# Presencial
-n_presencial = len(salarios_presencial)
-media_presencial = np.mean(salarios_presencial)
-std_presencial = np.std(salarios_presencial, ddof=1)
-t_presencial = stats.t.ppf(1 - alpha_3/2, df=n_presencial-1)
-erro_presencial = t_presencial * (std_presencial / np.sqrt(n_presencial))
-lim_inf_presencial = media_presencial - erro_presencial
-lim_sup_presencial = media_presencial + erro_presencial
-
-# Híbrido
-n_hibrido = len(salarios_hibrido)
-media_hibrido = np.mean(salarios_hibrido)
-std_hibrido = np.std(salarios_hibrido, ddof=1)
-t_hibrido = stats.t.ppf(1 - alpha_3/2, df=n_hibrido-1)
-erro_hibrido = t_hibrido * (std_hibrido / np.sqrt(n_hibrido))
-lim_inf_hibrido = media_hibrido - erro_hibrido
-lim_sup_hibrido = media_hibrido + erro_hibrido
-
-# Plot conjunto para Remoto, Presencial e Híbrido
-fig3, ax3 = plt.subplots(figsize=(15, 10))
-
-# Plot histograms for each category
-sns.histplot(salarios_remoto, bins=40, kde=True, stat="probability", ax=ax3, color='green', label='Remoto')
-sns.histplot(salarios_presencial, bins=40, kde=True, stat="probability", ax=ax3, color='red', label='Presencial')
-sns.histplot(salarios_hibrido, bins=40, kde=True, stat="probability", ax=ax3, color='purple', label='Híbrido')
-
-# Remoto - intervalo
-ax3.axvspan(lim_inf_remoto, lim_sup_remoto, color='green', alpha=0.15)
-ax3.axvline(media_remoto, color='green', linestyle='--', label=f'Média Remoto: ${media_remoto:,.1f}K')
-ax3.axvline(lim_inf_remoto, color='green', linestyle=':', linewidth=2, label='Limite Inferior Remoto')
-ax3.axvline(lim_sup_remoto, color='green', linestyle=':', linewidth=2, label='Limite Superior Remoto')
-
-# Presencial - intervalo
-ax3.axvspan(lim_inf_presencial, lim_sup_presencial, color='red', alpha=0.15)
-ax3.axvline(media_presencial, color='red', linestyle='--', label=f'Média Presencial: ${media_presencial:,.1f}K')
-ax3.axvline(lim_inf_presencial, color='red', linestyle=':', linewidth=2, label='Limite Inferior Presencial')
-ax3.axvline(lim_sup_presencial, color='red', linestyle=':', linewidth=2, label='Limite Superior Presencial')
-
-# Híbrido - intervalo
-ax3.axvspan(lim_inf_hibrido, lim_sup_hibrido, color='purple', alpha=0.15)
-ax3.axvline(media_hibrido, color='purple', linestyle='--', label=f'Média Híbrido: ${media_hibrido:,.1f}K')
-ax3.axvline(lim_inf_hibrido, color='purple', linestyle=':', linewidth=2, label='Limite Inferior Híbrido')
-ax3.axvline(lim_sup_hibrido, color='purple', linestyle=':', linewidth=2, label='Limite Superior Híbrido')
-
-# Configure plot labels and title
-ax3.set_xlabel("Salário Anual (K USD)")
-ax3.set_ylabel("Probabilidade")
-ax3.set_title(f"Comparação de Intervalos de Confiança ({conf_3}%) - Remoto vs Presencial vs Híbrido")
-ax3.legend()
-
-# Display the plot
-st.pyplot(fig3)
+
+ic_remoto = intervalos_t(estat_remoto, conf_3, escala=1000)
+media_remoto, lim_inf_remoto, lim_sup_remoto = ic_remoto.loc[100, ["media", "lim_inf", "lim_sup"]]
+media_presencial, lim_inf_presencial, lim_sup_presencial = ic_remoto.loc[0, ["media", "lim_inf", "lim_sup"]]
+media_hibrido, lim_inf_hibrido, lim_sup_hibrido = ic_remoto.loc[50, ["media", "lim_inf", "lim_sup"]]
+
+if not streaming:
+    with etapa("figura_remoto"):
+        st.image(figura_distribuicao(
+            [
+                Serie("remote_ratio", 100, "green", "Remoto", media_remoto, lim_inf_remoto, lim_sup_remoto, " Remoto"),
+                Serie("remote_ratio", 0, "red", "Presencial", media_presencial, lim_inf_presencial, lim_sup_presencial, " Presencial"),
+                Serie("remote_ratio", 50, "purple", "Híbrido", media_hibrido, lim_inf_hibrido, lim_sup_hibrido, " Híbrido"),
+            ],
+            f"Comparação de Intervalos de Confiança ({conf_3}%) - Remoto vs Presencial vs Híbrido",
+            robusto=robusto,
+        ))
 
 st.markdown(
     f"""
@@ -263,4 +177,63 @@ st.markdown(
     Isso sugere que o regime de trabalho Híbrido pode estar associado a uma maior variação salarial, possivelmente devido a fatores como localização geográfica e flexibilidade de trabalho.
     Além disso, a média salarial dos profissionais Remoto é insignificativamente maior do que a dos profissionais Presenciais, o que pode indicar uma equivalência salarial entre os dois regimes.
     """
-)
\ No newline at end of file
+)
+
+# 🔁 Intervalos bootstrap
+st.markdown("### Intervalos de Confiança por Bootstrap")
+st.markdown(
+    r"""
+    Os salários têm cauda longa à direita, o que torna o intervalo t menos confiável.
+    O **bootstrap** reamostra os dados com reposição milhares de vezes e usa a distribuição das estatísticas
+    reamostradas para construir o intervalo, sem supor normalidade:
+    - **Percentil**: usa diretamente os quantis $\alpha/2$ e $1-\alpha/2$ das réplicas.
+    - **BCa**: corrige o viés e a assimetria das réplicas (mais preciso para a mediana e dados assimétricos).
+    """
+)
+
+GRUPOS_BOOTSTRAP = {
+    "Todos": (None, None),
+    "Júnior": ("experience_level", "EN"),
+    "Pleno": ("experience_level", "MI"),
+    "Sênior": ("experience_level", "SE"),
+    "Remoto": ("remote_ratio", 100),
+    "Presencial": ("remote_ratio", 0),
+    "Híbrido": ("remote_ratio", 50),
+}
+
+if streaming:
+    st.info("ℹ️ O bootstrap precisa das observações individuais e não está disponível no modo streaming.")
+else:
+    col1, col2, col3 = st.columns(3)
+    grupo_bootstrap = col1.selectbox("Grupo", list(GRUPOS_BOOTSTRAP))
+    estatistica_bootstrap = col2.selectbox("Estatística", ["media", "mediana"], format_func={"media": "Média", "mediana": "Mediana"}.get)
+    metodo_bootstrap = col3.selectbox("Método", ["percentil", "bca"], format_func={"percentil": "Percentil", "bca": "BCa"}.get)
+
+    col4, col5, col6 = st.columns(3)
+    conf_4 = col4.slider("Escolha o nível de confiança (%)", min_value=80, max_value=99, value=95, key="conf_4")
+    reamostras = col5.select_slider("Número de reamostras (B)", options=[1_000, 5_000, 10_000, 50_000, 100_000], value=10_000)
+    semente = col6.number_input("Semente", min_value=0, value=0, step=1)
+
+    # Réplicas em cache por (grupo, estatística, B, semente): mudar a confiança ou o método não reamostra
+    coluna_bootstrap, valor_bootstrap = GRUPOS_BOOTSTRAP[grupo_bootstrap]
+    with st.spinner("Reamostrando..."), etapa("bootstrap"):
+        estimativa, lim_inf_boot, lim_sup_boot = intervalo_bootstrap(
+            coluna_bootstrap,
+            valor_bootstrap,
+            estatistica_bootstrap,
+            conf_4,
+            metodo_bootstrap,
+            reamostras,
+            int(semente),
+            robusto=robusto,
+        )
+
+    st.markdown(
+        f"""
+        {"Média" if estatistica_bootstrap == "media" else "Mediana"} salarial do grupo **{grupo_bootstrap}**: **{estimativa/1000:.1f}K**  
+        Intervalo bootstrap ({metodo_bootstrap.upper() if metodo_bootstrap == "bca" else "percentil"}, B = {reamostras:,}):
+        **({lim_inf_boot/1000:.1f}K, {lim_sup_boot/1000:.1f}K)** com **{conf_4}% de confiança**.
+        """
+    )
+
+painel()
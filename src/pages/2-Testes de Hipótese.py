@@ -1,15 +1,31 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from scipy import stats
-import seaborn as sns
-import matplotlib.pyplot as plt
+
+from analise.aquecimento import aquecer
+from analise.dados import DIMENSOES, modo_streaming
+from analise.instrumentacao import etapa, iniciar, painel
+from analise.intervalos import estatisticas_grupo, momentos
+from analise.robustez import seletor
+from analise.testes import (
+    comparacoes_dimensao,
+    corrigir_pvalores,
+    teste_binomial_exato,
+    teste_permutacao_grupos,
+    teste_proporcao_z,
+    teste_t_welch,
+    testes_nao_parametricos,
+)
 
 st.set_page_config(page_title="Testes de Hipótese", layout="wide")
+iniciar("Testes de Hipótese")
+aquecer()
 st.title("🔍 Testes de Hipótese - Análise Salarial em AI/ML/DS")
 
-# Carregar o dataset
-df = pd.read_csv("src/dataset.csv")
+robusto = seletor()
+
+# Estatísticas suficientes por grupo (em cache; em blocos no modo streaming)
+with etapa("estatisticas_grupo"):
+    estat_nivel = estatisticas_grupo("experience_level", robusto=robusto)
+    estat_nivel_remoto = estatisticas_grupo(["experience_level", "remote_ratio"], robusto=robusto)
 
 # Introdução
 st.markdown(
@@ -23,13 +39,10 @@ st.markdown(
     """
 )
 
-# Filtrar os dados para Pleno e Sênior
-salarios_pleno = df[df['experience_level'] == 'MI']['salary_in_usd'].dropna()
-salarios_senior = df[df['experience_level'] == 'SE']['salary_in_usd'].dropna()
-
-# Exibir as médias salariais
-media_pleno = np.mean(salarios_pleno)
-media_senior = np.mean(salarios_senior)
+# Médias e desvios de Pleno e Sênior a partir das somas por grupo
+pleno_senior = estat_nivel.loc[["MI", "SE"]]
+(media_pleno, media_senior), (std_pleno, std_senior) = momentos(pleno_senior)
+n_pleno, n_senior = pleno_senior["n"]
 
 st.markdown(f"""
 ### Salários Médios
@@ -37,8 +50,9 @@ st.markdown(f"""
 - **Sênior**: ${media_senior:,.2f}
 """)
 
-# Teste T de duas amostras
-t_stat, p_val = stats.ttest_ind(salarios_pleno, salarios_senior, equal_var=False)
+# Teste T de duas amostras (Welch), equivalente a stats.ttest_ind(..., equal_var=False)
+with etapa("teste_t"):
+    t_stat, p_val, _ = teste_t_welch(n_pleno, media_pleno, std_pleno**2, n_senior, media_senior, std_senior**2)
 
 # Exibir os resultados do teste
 st.markdown(f"""
@@ -61,9 +75,10 @@ st.markdown("""
         - H₁: p > 0,5
 """)
 
-# Filtrar os dados para Sêniores que trabalham remoto
-remote_seniors = len(df[(df['experience_level'] == 'SE') & (df['remote_ratio'] == 100)])
-total_seniors = len(df[df['experience_level'] == 'SE'])
+# Contagens de Sêniores que trabalham remoto
+seniors = estat_nivel_remoto.xs("SE", level="experience_level")["linhas"]
+remote_seniors = int(seniors.get(100, 0))
+total_seniors = int(seniors.sum())
 
 # Calcular a proporção
 proporcao_remote = remote_seniors / total_seniors if total_seniors > 0 else 0
@@ -75,8 +90,9 @@ st.markdown(f"""
 """)
 
 # Teste de Proporção
-z = (proporcao_remote - 0.5) / np.sqrt((0.5 * (1 - 0.5)) / total_seniors)
-p_val_proporcao = 1 - stats.norm.cdf(z)
+with etapa("teste_proporcao"):
+    z, p_val_proporcao = teste_proporcao_z(remote_seniors, total_seniors, p0=0.5)
+
 st.markdown(f"""
 ### Resultados do Teste de Proporção
 - Estatística z: {z:.2f}
@@ -89,6 +105,135 @@ if p_val_proporcao < alpha:
 else:
     st.info(f"Não rejeitamos H₀ ao nível de significância de {alpha*100:.0f}%. A proporção de Sêniores que trabalham remoto não é maior que 50%.")
 
+# Teste binomial exato para a mesma proporção
+with etapa("teste_binomial"):
+    proporcao_exata, p_val_binomial = teste_binomial_exato(remote_seniors, total_seniors, 0.5, "greater")
+
+st.markdown(f"""
+### Teste Binomial Exato
+O teste z acima usa a aproximação normal. O teste binomial exato calcula o p-valor diretamente da distribuição binomial:
+- p-valor (exato): {p_val_binomial:.4f}
+""")
+
+if p_val_binomial < alpha:
+    st.success(f"Pelo teste exato, rejeitamos H₀ ao nível de significância de {alpha*100:.0f}%.")
+else:
+    st.info(f"Pelo teste exato, não rejeitamos H₀ ao nível de significância de {alpha*100:.0f}%.")
+
+# Comparações entre todos os pares de uma dimensão
+st.markdown(
+    r"""
+    ## Comparações entre Todos os Pares
+    Aplica o teste T de Welch a todos os pares de grupos da dimensão escolhida. Com muitas comparações,
+    a chance de falsos positivos cresce, então os p-valores são ajustados por **Holm** (controla a taxa de erro
+    por família) ou **Benjamini-Hochberg** (controla a taxa de falsas descobertas).
+    """
+)
+
+col1, col2, col3 = st.columns(3)
+dimensao_pares = col1.selectbox("Dimensão", DIMENSOES, index=DIMENSOES.index("experience_level"))
+n_minimo_pares = col2.number_input("Tamanho mínimo do grupo", min_value=2, value=30, step=1, key="n_minimo_pares")
+correcao = col3.selectbox("Correção", ["holm", "bh"], format_func={"holm": "Holm", "bh": "Benjamini-Hochberg"}.get)
+
+# Todos os pares em uma passada vetorizada sobre as estatísticas suficientes em cache
+with etapa("comparacoes_pareadas"):
+    pares = comparacoes_dimensao(dimensao_pares, int(n_minimo_pares), robusto=robusto)
+    pares = pares.assign(p_ajustado=corrigir_pvalores(pares["p"], correcao))
+pares = pares.assign(significativo=pares["p_ajustado"] < alpha)
+
+st.markdown(f"**{len(pares):,} comparações**, das quais **{int(pares['significativo'].sum()):,}** são significativas a {alpha*100:.0f}% após a correção.")
+if st.checkbox("Exibir apenas pares significativos"):
+    pares = pares[pares["significativo"]]
+
+st.dataframe(
+    pares.sort_values("p_ajustado").rename(
+        columns={
+            "grupo_a": "Grupo A",
+            "grupo_b": "Grupo B",
+            "media_a": "Média A",
+            "media_b": "Média B",
+            "diferenca": "Diferença",
+            "t": "Estatística t",
+            "gl": "Graus de liberdade",
+            "p": "p-valor",
+            "p_ajustado": "p-valor ajustado",
+            "significativo": "Significativo",
+        }
+    ),
+    hide_index=True,
+)
 
+st.markdown("## Testes sem Suposição de Normalidade")
 
+if modo_streaming():
+    st.info("ℹ️ Os testes de permutação e não paramétricos precisam das observações individuais e não estão disponíveis no modo streaming.")
+    painel()
+    st.stop()
+
+# Teste de permutação para Pleno vs Sênior
+st.markdown(
+    r"""
+    ### Teste de Permutação: Pleno vs Sênior
+    O teste de permutação embaralha os rótulos Pleno/Sênior milhares de vezes e compara a diferença observada
+    com a distribuição das diferenças sob H₀, sem supor normalidade dos salários.
+    As permutações param assim que o p-valor atinge a precisão escolhida.
+    """
+)
+
+col1, col2, col3 = st.columns(3)
+estatistica_permutacao = col1.selectbox("Estatística", ["media", "mediana"], format_func={"media": "Diferença de médias", "mediana": "Diferença de medianas"}.get)
+max_permutacoes = col2.select_slider("Máximo de permutações", options=[10_000, 50_000, 100_000, 500_000], value=100_000)
+precisao = col3.select_slider("Precisão do p-valor (erro padrão)", options=[0.01, 0.005, 0.002, 0.001], value=0.002)
+
+# Resultado em cache por conjunto de parâmetros: mudar a significância não refaz as permutações
+with st.spinner("Executando permutações..."), etapa("teste_permutacao"):
+    diferenca, p_val_permutacao, permutacoes_usadas = teste_permutacao_grupos(
+        "experience_level", "MI", "SE", estatistica_permutacao, max_permutacoes, precisao, robusto=robusto
+    )
+
+st.markdown(f"""
+- Diferença observada (Pleno - Sênior): ${diferenca:,.2f}
+- p-valor: {p_val_permutacao:.4f} (com {permutacoes_usadas:,} permutações)
+""")
+
+if p_val_permutacao < alpha:
+    st.success(f"Rejeitamos H₀ ao nível de significância de {alpha*100:.0f}%. Existe diferença significativa entre os salários de Pleno e Sênior.")
+else:
+    st.info(f"Não rejeitamos H₀ ao nível de significância de {alpha*100:.0f}%. Não foi encontrada diferença significativa entre os salários de Pleno e Sênior.")
+
+# Kruskal-Wallis e Mann-Whitney por tamanho de empresa
+st.markdown(
+    r"""
+    ### Tamanho da Empresa: Pequena vs Média vs Grande
+    O **teste de Kruskal-Wallis** verifica se as distribuições salariais das empresas pequenas, médias e grandes são iguais,
+    comparando postos (ranks) em vez de médias. Em seguida, o **teste de Mann-Whitney** compara cada par de tamanhos, com os
+    p-valores ajustados pela mesma correção das comparações entre todos os pares.
+    - **H₀**: Os salários têm a mesma distribuição nos três tamanhos de empresa.
+    - **H₁**: Pelo menos um tamanho de empresa tem distribuição salarial diferente.
+    """
+)
+
+with etapa("testes_nao_parametricos"):
+    h_stat, p_val_kruskal, pares_mann_whitney = testes_nao_parametricos("company_size", ["S", "M", "L"], correcao, robusto=robusto)
+
+st.markdown(f"""
+- Estatística H: {h_stat:.2f}
+- p-valor: {p_val_kruskal:.4f}
+""")
+
+if p_val_kruskal < alpha:
+    st.success(f"Rejeitamos H₀ ao nível de significância de {alpha*100:.0f}%. Existe diferença significativa entre os salários por tamanho de empresa.")
+else:
+    st.info(f"Não rejeitamos H₀ ao nível de significância de {alpha*100:.0f}%. Não foi encontrada diferença significativa entre os salários por tamanho de empresa.")
+
+NOMES_TAMANHOS = {"S": "Pequena", "M": "Média", "L": "Grande"}
+st.dataframe(
+    pares_mann_whitney.assign(
+        grupo_a=pares_mann_whitney["grupo_a"].map(NOMES_TAMANHOS),
+        grupo_b=pares_mann_whitney["grupo_b"].map(NOMES_TAMANHOS),
+        significativo=pares_mann_whitney["p_ajustado"] < alpha,
+    ).rename(columns={"grupo_a": "Grupo A", "grupo_b": "Grupo B", "u": "Estatística U", "p": "p-valor", "p_ajustado": "p-valor ajustado", "significativo": "Significativo"}),
+    hide_index=True,
+)
 
+painel()
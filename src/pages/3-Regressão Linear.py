@@ -1,7 +1,12 @@
 import streamlit as st
-import pandas as pd
+from analise.aquecimento import aquecer
+from analise.dados import NOMES_DIMENSOES, modo_streaming
+from analise.instrumentacao import etapa, iniciar, painel
+from analise.robustez import seletor
 
-df = pd.read_csv("src/dataset.csv")
+iniciar("Regressão Linear")
+aquecer()
+robusto = seletor()
 
 st.markdown(f"""
 # Análise de Correlação e Regressão Linear
@@ -41,52 +46,79 @@ Onde:
 """)
 
 # Análise de correlação e regressão entre salary e salary_in_usd
-import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
+# (numpy, pandas e scipy só são importados depois do texto introdutório; as bibliotecas de
+# gráficos, só nos trechos que desenham)
+import pandas as pd
+
+from analise.regressao import PREDITORES, ajustar, regressao_simples
+from analise.validacao import MODELOS, validar_em_segundo_plano
 
 st.markdown("---")
 st.markdown("## Análise prática: salary vs salary_in_usd")
 
-# Remover dados nulos para evitar erros
-df_limpo = df.dropna(subset=["salary", "salary_in_usd"])
+# Correlação e reta de MQO em forma fechada a partir dos co-momentos de (salary, salary_in_usd):
+# vêm do artefato pré-calculado, da leitura em blocos (modo streaming) ou do dataset em memória
+with etapa("regressao_simples"):
+    acumulado = regressao_simples("salary", "salary_in_usd", robusto=robusto)
+correlacao = acumulado.correlacao
+a = acumulado.intercepto
+b = acumulado.inclinacao
+r2 = acumulado.r2
 
-# Calcular correlação de Pearson
-correlacao = df_limpo["salary"].corr(df_limpo["salary_in_usd"])
 st.write(f"**Coeficiente de correlação de Pearson (salary x salary_in_usd):** `{correlacao:.2f}`")
-
-# Ajustar regressão linear
-X = df_limpo[["salary"]]
-y = df_limpo["salary_in_usd"]
-modelo = LinearRegression()
-modelo.fit(X, y)
-a = modelo.intercept_
-b = modelo.coef_[0]
-r2 = modelo.score(X, y)
 st.write(f"**Equação da reta ajustada:** salary_in_usd = {a:.2f} + {b:.2f} * salary")
 st.write(f"**R² do modelo:** `{r2:.2f}`")
 
-# Gráfico de dispersão com reta de regressão (tamanho reduzido)
-fig, ax = plt.subplots(figsize=(4, 3))
-ax.scatter(df_limpo["salary"], df_limpo["salary_in_usd"], alpha=0.5, label="Dados")
-x_vals = np.linspace(df_limpo["salary"].min(), df_limpo["salary"].max(), 100)
-y_vals = modelo.predict(x_vals.reshape(-1, 1))
-ax.plot(x_vals, y_vals, color="red", label="Regressão Linear")
-ax.set_xlabel("salary")
-ax.set_ylabel("salary_in_usd")
-ax.set_title("Dispersão e Regressão Linear")
-ax.legend()
-st.pyplot(fig)
-
-# Gráfico de resíduos (tamanho reduzido)
-residuos = y - modelo.predict(X)
-fig2, ax2 = plt.subplots(figsize=(4, 3))
-ax2.scatter(df_limpo["salary"], residuos, color="purple", alpha=0.5)
-ax2.axhline(0, color='gray', linestyle='--')
-ax2.set_xlabel("salary")
-ax2.set_ylabel("Resíduo")
-ax2.set_title("Gráfico de Resíduos")
-st.pyplot(fig2)
+if modo_streaming():
+    st.info("ℹ️ Modo streaming ativo: a regressão foi ajustada em blocos e os gráficos de dispersão não são exibidos.")
+else:
+    import numpy as np
+    from matplotlib.colors import LogNorm
+    from matplotlib.figure import Figure
+
+    from analise.graficos import amostra_regressao, densidades_regressao
+
+    # Reta e resíduos vêm do ajuste em todas as linhas; só o desenho é agregado ou amostrado
+    modo_grafico = st.radio(
+        "Visualização dos pontos",
+        ["Densidade", "Amostra estratificada"],
+        horizontal=True,
+        help="Densidade agrega todas as linhas em um raster 2D; a amostra estratificada exibe até 5.000 pontos mantendo os valores extremos.",
+    )
+    x_vals = np.linspace(acumulado.minimo_x, acumulado.maximo_x, 100)
+    y_vals = a + b * x_vals
+
+    # Figuras sem pyplot: não ficam registradas no estado global entre execuções
+    fig = Figure(figsize=(4, 3))
+    ax = fig.subplots()
+    fig2 = Figure(figsize=(4, 3))
+    ax2 = fig2.subplots()
+    with etapa("dados_dispersao"):
+        if modo_grafico == "Densidade":
+            (contagens, x_bordas, y_bordas), (contagens_res, x_bordas_res, r_bordas) = densidades_regressao("salary", "salary_in_usd", a, b, robusto=robusto)
+            ax.pcolormesh(x_bordas, y_bordas, np.ma.masked_equal(contagens, 0).T, norm=LogNorm(), cmap="Blues")
+            ax2.pcolormesh(x_bordas_res, r_bordas, np.ma.masked_equal(contagens_res, 0).T, norm=LogNorm(), cmap="Purples")
+        else:
+            x_amostra, y_amostra, residuos_amostra = amostra_regressao("salary", "salary_in_usd", a, b, robusto=robusto)
+            ax.scatter(x_amostra, y_amostra, alpha=0.5, label="Dados")
+            ax2.scatter(x_amostra, residuos_amostra, color="purple", alpha=0.5)
+
+    # Gráfico de dispersão com reta de regressão (tamanho reduzido)
+    ax.plot(x_vals, y_vals, color="red", label="Regressão Linear")
+    ax.set_xlabel("salary")
+    ax.set_ylabel("salary_in_usd")
+    ax.set_title("Dispersão e Regressão Linear")
+    ax.legend()
+    with etapa("renderizacao_dispersao"):
+        st.pyplot(fig)
+
+    # Gráfico de resíduos (tamanho reduzido)
+    ax2.axhline(0, color='gray', linestyle='--')
+    ax2.set_xlabel("salary")
+    ax2.set_ylabel("Resíduo")
+    ax2.set_title("Gráfico de Resíduos")
+    with etapa("renderizacao_residuos"):
+        st.pyplot(fig2)
 
 # Conclusão
 st.markdown(f"""
@@ -103,4 +135,200 @@ Outro ponto importante a ser considerado é que, **para profissionais que atuam
 
 Portanto, **não é possível afirmar que praticamente toda a variação em `salary_in_usd` pode ser explicada por `salary`**. Na prática, a conversão de salários para dólar americano não preserva uma relação linear forte, possivelmente devido à diversidade de moedas, volatilidade cambial e possíveis erros ou outliers no dataset.  
 Para uma modelagem mais precisa, seria necessário tratar os outliers, analisar as moedas e considerar outros fatores que impactam a conversão salarial.
-""")
\ No newline at end of file
+""")
+
+st.markdown("---")
+st.markdown("""
+## Normalização de Moedas
+A relação fraca acima vem de misturar moedas: `salary` está na moeda de `salary_currency`, enquanto `salary_in_usd`
+está sempre em dólares. Dividindo um pelo outro obtemos a **taxa de câmbio implícita** de cada linha. A taxa de
+referência de cada moeda e ano é a mediana dessas taxas, e uma conversão é marcada como **discrepante** quando a sua
+taxa se afasta da referência além do desvio robusto (MAD) do grupo e de uma tolerância relativa.
+""")
+
+if modo_streaming():
+    st.info("ℹ️ A normalização de moedas não está disponível no modo streaming.")
+else:
+    from analise.moedas import TOLERANCIA, conversoes_discrepantes, regressao_normalizada, regressoes_por_moeda, taxas_implicitas
+
+    # Taxas, marcações e somas por moeda ficam em cache pela versão do dataset
+    with etapa("taxas_implicitas"):
+        taxas = taxas_implicitas(robusto=robusto)
+        discrepantes = conversoes_discrepantes(robusto=robusto)
+        normalizada = regressao_normalizada(robusto=robusto)
+
+    col1, col2 = st.columns(2)
+    col1.metric("R² com `salary` bruto", f"{r2:.3f}")
+    col2.metric("R² com `salary` convertido pela taxa de referência", f"{normalizada.r2:.3f}")
+
+    st.markdown("### Taxas implícitas (unidades da moeda por USD)")
+    st.dataframe(
+        taxas.rename(
+            columns={
+                "taxa": "Taxa de Referência",
+                "taxa_minima": "Taxa Mínima",
+                "taxa_maxima": "Taxa Máxima",
+                "discrepantes": "Discrepantes",
+                "dispersao_pct": "Dispersão (%)",
+            }
+        )
+    )
+
+    st.markdown(
+        f"**{len(discrepantes):,} conversões discrepantes** (diferença acima de {TOLERANCIA:.0%} e do limite robusto do grupo)."
+    )
+    if not discrepantes.empty:
+        st.dataframe(
+            discrepantes.rename(
+                columns={
+                    "taxa_implicita": "Taxa Implícita",
+                    "taxa_referencia": "Taxa de Referência",
+                    "salario_normalizado": "Salário Convertido (USD)",
+                    "desvio_pct": "Diferença (%)",
+                    "z_robusto": "Desvio Robusto",
+                }
+            ),
+            hide_index=True,
+        )
+
+    st.markdown("### Regressão por moeda")
+    st.markdown(
+        "Uma reta `salary_in_usd = a + b * salary` para cada moeda, todas calculadas em uma única agregação. "
+        "A inclinação `b` é a cotação média da moeda em dólares."
+    )
+    col1, col2 = st.columns([3, 1])
+    por_ano = col1.checkbox("Separar também por ano do pagamento")
+    conf_moedas = col2.slider("Nível de confiança (%)", min_value=80, max_value=99, value=95, key="conf_moedas")
+    with etapa("regressoes_por_moeda"):
+        retas = regressoes_por_moeda(por_ano, conf_moedas, robusto=robusto)
+    st.dataframe(
+        retas.rename(
+            columns={
+                "intercepto": "Intercepto (a)",
+                "inclinacao": "Inclinação (b)",
+                "erro_padrao": "Erro Padrão de b",
+                "lim_inf": f"Limite Inferior ({conf_moedas}%)",
+                "lim_sup": f"Limite Superior ({conf_moedas}%)",
+                "correlacao": "Correlação",
+                "r2": "R²",
+                "taxa_implicita": "Taxa Implícita (1/b)",
+            }
+        )
+    )
+
+st.markdown("---")
+st.markdown("""
+## Regressão Múltipla
+Como sugerido na conclusão, o salário em USD depende de outros fatores além do valor bruto.
+Aqui ajustamos `salary_in_usd` em função de variáveis categóricas do dataset. Cada categoria é codificada
+com variáveis indicadoras (one-hot), usando a categoria mais frequente como **referência**: cada coeficiente
+indica quanto o salário médio difere da referência, mantidas as demais variáveis constantes.
+""")
+
+NOMES_PREDITORES = {**NOMES_DIMENSOES, "employee_residence": "País de residência"}
+
+if modo_streaming():
+    st.info("ℹ️ A regressão múltipla não está disponível no modo streaming.")
+else:
+    col1, col2 = st.columns([3, 1])
+    preditores = col1.multiselect(
+        "Variáveis explicativas",
+        PREDITORES,
+        default=["experience_level", "company_location", "job_title"],
+        format_func=NOMES_PREDITORES.get,
+    )
+    conf_regressao = col2.slider("Nível de confiança (%)", min_value=80, max_value=99, value=95)
+
+    if not preditores:
+        st.warning("⚠️ Escolha ao menos uma variável explicativa.")
+    else:
+        # Blocos XᵀX por par de variáveis ficam em cache: trocar as variáveis só resolve o sistema novamente
+        with etapa("regressao_multipla"):
+            ajuste = ajustar(preditores, confianca=conf_regressao, robusto=robusto)
+        st.markdown(f"""
+- **R²:** `{ajuste.r2:.3f}` (ajustado: `{ajuste.r2_ajustado:.3f}`)
+- **Observações:** {ajuste.n:,} — **graus de liberdade dos resíduos:** {ajuste.graus_liberdade:,}
+- **Erro padrão residual:** {ajuste.erro_padrao_residual:,.2f} USD
+""")
+        if ajuste.linhas_excluidas:
+            st.caption(f"{ajuste.linhas_excluidas:,} linhas com alguma variável explicativa ausente ficaram fora do ajuste.")
+        st.dataframe(
+            ajuste.coeficientes.rename(
+                columns={
+                    "coeficiente": "Coeficiente",
+                    "erro_padrao": "Erro Padrão",
+                    "t": "Estatística t",
+                    "p": "p-valor",
+                    "lim_inf": f"Limite Inferior ({conf_regressao}%)",
+                    "lim_sup": f"Limite Superior ({conf_regressao}%)",
+                }
+            )
+        )
+
+st.markdown("---")
+st.markdown("""
+## Validação Cruzada e Comparação de Modelos
+O R² acima é calculado nos mesmos dados usados no ajuste. A **validação cruzada k-fold** divide os dados em *k* partes,
+ajusta o modelo em *k - 1* delas e mede o erro na parte restante, repetindo para cada parte.
+Comparamos MQO, MQO sobre o log do salário e dois regressores robustos a outliers (Huber e regressão quantílica na mediana).
+""")
+
+if modo_streaming():
+    st.info("ℹ️ A validação cruzada não está disponível no modo streaming.")
+else:
+    with st.form("validacao_cruzada"):
+        col1, col2 = st.columns(2)
+        modelos_cv = col1.multiselect("Modelos", list(MODELOS), default=["ols", "log_ols", "huber"], format_func=MODELOS.get)
+        preditores_cv = col2.multiselect(
+            "Variáveis explicativas",
+            PREDITORES,
+            default=["experience_level", "company_size", "remote_ratio"],
+            format_func=NOMES_PREDITORES.get,
+            key="preditores_cv",
+        )
+        col3, col4 = st.columns(2)
+        k_dobras = col3.slider("Número de dobras (k)", min_value=3, max_value=10, value=5)
+        repeticoes_cv = col4.slider("Repetições", min_value=1, max_value=5, value=1)
+        executar_cv = st.form_submit_button("Executar validação cruzada")
+
+    if executar_cv and modelos_cv and preditores_cv:
+        # As dobras rodam em segundo plano (em paralelo e em cache no disco): o rerun termina logo
+        st.session_state["validacao_cv"] = validar_em_segundo_plano(
+            modelos_cv, preditores_cv, k=k_dobras, repeticoes=repeticoes_cv, robusto=robusto
+        )
+
+    execucao_cv = st.session_state.get("validacao_cv")
+    if execucao_cv is not None:
+        em_andamento = not execucao_cv.concluida
+
+        # Enquanto a validação roda, só este trecho é reexecutado a cada segundo
+        @st.fragment(run_every=1 if em_andamento else None)
+        def acompanhar_validacao():
+            resultados = execucao_cv.parciais()
+            if execucao_cv.erro is not None:
+                st.error(f"⚠️ A validação cruzada falhou: {execucao_cv.erro}")
+            elif not execucao_cv.concluida:
+                st.progress(
+                    len(resultados) / execucao_cv.total,
+                    text=f"{len(resultados)}/{execucao_cv.total} dobras concluídas",
+                )
+            if resultados:
+                resumo = pd.DataFrame(resultados).groupby("modelo").agg(
+                    dobras=("rmse", "size"),
+                    rmse=("rmse", "mean"),
+                    mae=("mae", "mean"),
+                    r2=("r2", "mean"),
+                    r2_desvio=("r2", "std"),
+                )
+                st.dataframe(
+                    resumo.rename(index=MODELOS).rename(
+                        columns={"dobras": "Dobras", "rmse": "RMSE (USD)", "mae": "MAE (USD)", "r2": "R² médio", "r2_desvio": "Desvio do R²"}
+                    )
+                )
+            if em_andamento and execucao_cv.concluida:
+                # Uma última execução da página desliga a atualização periódica
+                st.rerun()
+
+        acompanhar_validacao()
+
+painel()
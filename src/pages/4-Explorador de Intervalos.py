@@ -0,0 +1,125 @@
+import streamlit as st
+from matplotlib.figure import Figure
+
+from analise.aquecimento import aquecer
+from analise.cubo import DIMENSOES_BASE, agregar, cubo, dimensoes_consulta, valores_dimensao
+from analise.dados import DIMENSOES, NOMES_DIMENSOES
+from analise.esbocos import ERRO_RELATIVO, quantis_grupo
+from analise.instrumentacao import etapa, iniciar, painel
+from analise.intervalos import intervalos_t
+from analise.robustez import seletor
+
+# Dimensões de alta cardinalidade: o gráfico mostra só os maiores grupos
+MAX_GRUPOS_INTERVALOS = 30
+
+st.set_page_config(page_title="Explorador de Intervalos", layout="wide")
+iniciar("Explorador de Intervalos")
+aquecer()
+
+st.markdown(
+    """
+    ## Explorador de Intervalos de Confiança
+    Escolha qualquer combinação de dimensões para agrupar e filtrar os profissionais.
+    Os intervalos são calculados a partir de um cubo pré-computado de contagens, somas e somas dos quadrados,
+    então cada consulta é respondida sem reprocessar as linhas do dataset.
+
+    Como os salários são assimétricos, também é possível estimar a mediana e os percentis 10 e 90. Eles vêm de
+    esboços de quantis guardados por célula do cubo e têm intervalos livres de distribuição, que não supõem normalidade.
+    """
+)
+
+robusto = seletor()
+
+# Cubo base em cache: construído uma única vez por versão do dataset
+with etapa("cubo"):
+    base = cubo(robusto=robusto)
+
+agrupar_por = st.multiselect(
+    "Agrupar por",
+    DIMENSOES,
+    default=["experience_level"],
+    format_func=NOMES_DIMENSOES.get,
+)
+
+filtros = {}
+with st.expander("Filtros"):
+    for dimensao in DIMENSOES:
+        # Dimensões fora do cubo base listam seus valores a partir do cubo marginal de uma dimensão
+        origem = base if dimensao in DIMENSOES_BASE else cubo(robusto=robusto, dimensoes=[dimensao])
+        filtros[dimensao] = st.multiselect(
+            NOMES_DIMENSOES[dimensao],
+            valores_dimensao(origem, dimensao),
+            key=f"filtro_{dimensao}",
+        )
+
+# Estatística exibida -> quantil (None para a média)
+ESTATISTICAS = {"Média": None, "Mediana": 0.5, "Percentil 10": 0.1, "Percentil 90": 0.9}
+
+col1, col2, col3 = st.columns(3)
+nome_estatistica = col1.selectbox("Estatística", list(ESTATISTICAS))
+conf = col2.slider("Escolha o nível de confiança (%)", min_value=80, max_value=99, value=95)
+n_minimo = col3.number_input("Tamanho mínimo do grupo", min_value=2, value=30, step=1)
+quantil = ESTATISTICAS[nome_estatistica]
+
+if quantil is None:
+    # Consultas com o título do cargo usam um cubo só com as dimensões agrupadas e filtradas
+    with etapa("cubo_consulta"):
+        tabela = cubo(robusto=robusto, dimensoes=dimensoes_consulta(agrupar_por, filtros))
+    with etapa("agregacao"):
+        estatisticas = agregar(tabela, agrupar_por, filtros)
+        estatisticas = estatisticas[estatisticas["n"] >= n_minimo]
+    with etapa("intervalos"):
+        resultado = intervalos_t(estatisticas, conf, escala=1000).rename(columns={"media": "estimativa"})
+else:
+    # Esboços em cache: a consulta soma contagens por balde, sem reler as linhas
+    with etapa("quantis"):
+        resultado = quantis_grupo(agrupar_por, quantil, conf, filtros, escala=1000, robusto=robusto)
+        resultado = resultado[resultado["n"] >= n_minimo]
+
+if resultado.empty:
+    st.warning("⚠️ Nenhum grupo atende aos filtros escolhidos.")
+    painel()
+    st.stop()
+
+resultado = resultado.sort_values("n", ascending=False)
+st.markdown(f"### Intervalos de confiança ({conf}%) - {len(resultado)} grupos")
+colunas = ["n", "estimativa", "lim_inf", "lim_sup"] + (["margem"] if quantil is None else [])
+st.dataframe(
+    resultado[colunas].rename(
+        columns={
+            "estimativa": f"{nome_estatistica} (K USD)",
+            "lim_inf": "Limite Inferior",
+            "lim_sup": "Limite Superior",
+            "margem": "Margem de Erro",
+        }
+    )
+)
+if quantil is not None:
+    st.caption(
+        f"Quantis estimados com erro relativo de até {ERRO_RELATIVO:.0%}; "
+        "os limites são arredondados para fora, preservando a confiança escolhida."
+    )
+
+grafico = resultado.head(MAX_GRUPOS_INTERVALOS).iloc[::-1]
+rotulos = [" / ".join(map(str, g)) if isinstance(g, tuple) else str(g) for g in grafico.index]
+
+fig = Figure(figsize=(15, max(3, 0.4 * len(grafico))))
+ax = fig.subplots()
+ax.errorbar(
+    grafico["estimativa"],
+    range(len(grafico)),
+    xerr=[grafico["estimativa"] - grafico["lim_inf"], grafico["lim_sup"] - grafico["estimativa"]],
+    fmt="o",
+    capsize=4,
+)
+ax.set_yticks(range(len(grafico)))
+ax.set_yticklabels(rotulos)
+ax.set_xlabel("Salário Anual (K USD)")
+ax.set_title(f"{nome_estatistica} Salarial com Intervalo de Confiança ({conf}%)")
+with etapa("renderizacao"):
+    st.pyplot(fig)
+
+if len(resultado) > MAX_GRUPOS_INTERVALOS:
+    st.caption(f"O gráfico exibe os {MAX_GRUPOS_INTERVALOS} maiores grupos; a tabela contém todos.")
+
+painel()
@@ -0,0 +1,142 @@
+import streamlit as st
+from matplotlib.figure import Figure
+
+from analise.aquecimento import aquecer
+from analise.dados import DIMENSOES, NOMES_DIMENSOES, modo_streaming
+from analise.instrumentacao import etapa, iniciar, painel
+from analise.robustez import seletor
+from analise.tendencias import ANO, medianas_anuais, medias_anuais, variacoes_anuais
+
+# Dimensões de alta cardinalidade: o gráfico mostra só as linhas dos maiores grupos
+MAX_GRUPOS_TENDENCIAS = 8
+
+st.set_page_config(page_title="Tendências", layout="wide")
+iniciar("Tendências")
+aquecer()
+robusto = seletor()
+
+st.markdown(
+    """
+    ## Tendências Salariais ao Longo dos Anos
+    Evolução do salário anual (`salary_in_usd`) por ano de pagamento (`work_year`), no geral ou separado por uma dimensão.
+    As médias e seus intervalos t vêm do cubo de estatísticas suficientes; as medianas usam um intervalo livre de
+    distribuição, baseado nas estatísticas de ordem, que não supõe normalidade dos salários.
+    """
+)
+
+col1, col2, col3, col4 = st.columns(4)
+dimensao = col1.selectbox("Separar por", [None] + [d for d in DIMENSOES if d != ANO], format_func=lambda d: NOMES_DIMENSOES.get(d, "Geral"))
+estatistica = col2.radio("Estatística", ["media", "mediana"], format_func={"media": "Média", "mediana": "Mediana"}.get, horizontal=True)
+conf = col3.slider("Escolha o nível de confiança (%)", min_value=80, max_value=99, value=95)
+n_minimo = col4.number_input("Tamanho mínimo do grupo", min_value=2, value=30, step=1)
+
+if estatistica == "mediana" and modo_streaming():
+    st.info("ℹ️ As medianas precisam das observações individuais e não estão disponíveis no modo streaming; exibindo as médias.")
+    estatistica = "media"
+
+# Médias do cubo; medianas de todos os anos em uma única passada, em cache pela versão do dataset
+with etapa("estatisticas_anuais"):
+    if estatistica == "media":
+        tabela = medias_anuais(dimensao, conf, escala=1000, robusto=robusto).rename(columns={"media": "estimativa"})
+    else:
+        tabela = medianas_anuais(dimensao, conf, escala=1000, robusto=robusto)
+tabela = tabela[tabela["n"] >= n_minimo]
+
+if tabela.empty:
+    st.warning("⚠️ Nenhum grupo atende ao tamanho mínimo escolhido.")
+    painel()
+    st.stop()
+
+nome_estatistica = "Média" if estatistica == "media" else "Mediana"
+
+fig = Figure(figsize=(15, 6))
+ax = fig.subplots()
+if dimensao is None:
+    series = [("Geral", tabela)]
+else:
+    maiores = tabela.groupby(level=dimensao, observed=True)["n"].sum().nlargest(MAX_GRUPOS_TENDENCIAS).index
+    series = [(grupo, tabela.xs(grupo, level=dimensao)) for grupo in maiores]
+for rotulo, serie in series:
+    anos = serie.index.get_level_values(ANO)
+    ax.plot(anos, serie["estimativa"], marker="o", label=str(rotulo))
+    ax.fill_between(anos, serie["lim_inf"], serie["lim_sup"], alpha=0.15)
+ax.set_xticks(sorted(tabela.index.get_level_values(ANO).unique()))
+ax.set_xlabel("Ano do pagamento")
+ax.set_ylabel("Salário Anual (K USD)")
+ax.set_title(f"{nome_estatistica} Salarial por Ano com Intervalo de Confiança ({conf}%)")
+ax.legend()
+with etapa("renderizacao"):
+    st.pyplot(fig)
+
+if dimensao is not None and tabela.index.get_level_values(dimensao).nunique() > MAX_GRUPOS_TENDENCIAS:
+    st.caption(f"O gráfico exibe os {MAX_GRUPOS_TENDENCIAS} maiores grupos; a tabela contém todos.")
+
+st.dataframe(
+    tabela[["n", "estimativa", "lim_inf", "lim_sup"]].rename(
+        columns={
+            "estimativa": f"{nome_estatistica} (K USD)",
+            "lim_inf": "Limite Inferior",
+            "lim_sup": "Limite Superior",
+        }
+    )
+)
+
+if estatistica == "media":
+    st.markdown(
+        r"""
+        ### Variação Ano a Ano
+        Para cada grupo, a média de cada ano é comparada à do ano anterior disponível pelo **teste T de Welch**.
+        - **H₀**: A média salarial não mudou entre os dois anos.
+        - **H₁**: A média salarial mudou.
+
+        Como são feitas várias comparações, os p-valores são ajustados pela correção escolhida.
+        """
+    )
+else:
+    st.markdown(
+        r"""
+        ### Variação Ano a Ano
+        Para cada grupo, os salários de cada ano são comparados aos do ano anterior disponível pelo **teste de
+        Mann-Whitney**, baseado em postos e sem supor normalidade.
+        - **H₀**: Os salários dos dois anos têm a mesma distribuição.
+        - **H₁**: Os salários de um dos anos tendem a ser maiores.
+
+        Como são feitas várias comparações, os p-valores são ajustados pela correção escolhida.
+        """
+    )
+
+col1, col2 = st.columns(2)
+alpha = col1.slider("Escolha o nível de significância (%)", min_value=1, max_value=10, value=5) / 100
+correcao = col2.selectbox("Correção", ["holm", "bh"], format_func={"holm": "Holm", "bh": "Benjamini-Hochberg"}.get)
+
+with etapa("variacoes_anuais"):
+    variacoes = variacoes_anuais(dimensao, correcao, n_minimo, estatistica, robusto=robusto)
+    variacoes = variacoes.assign(significativo=variacoes["p_ajustado"] < alpha)
+
+st.markdown(
+    f"**{len(variacoes):,} comparações**, das quais **{int(variacoes['significativo'].sum()):,}** "
+    f"são significativas a {alpha*100:.0f}% após a correção."
+)
+st.dataframe(
+    variacoes.rename(
+        columns={
+            "ano_anterior": "Ano Anterior",
+            "ano": "Ano",
+            "media_anterior": "Média Anterior",
+            "media": "Média",
+            "mediana_anterior": "Mediana Anterior",
+            "mediana": "Mediana",
+            "variacao": "Variação (USD)",
+            "variacao_pct": "Variação (%)",
+            "t": "Estatística t",
+            "gl": "Graus de liberdade",
+            "u": "Estatística U",
+            "p": "p-valor",
+            "p_ajustado": "p-valor ajustado",
+            "significativo": "Significativo",
+        }
+    ),
+    hide_index=True,
+)
+
+painel()